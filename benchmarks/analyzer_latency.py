@@ -0,0 +1,86 @@
+"""
+Compara la latencia de AIAnalyzer en modo directo (un prompt al LLM) y con CrewAI.
+
+Uso:
+    python -m benchmarks.analyzer_latency --iterations 5
+
+La caché de respuestas se desactiva para medir llamadas reales al proveedor. Se mide la
+llamada al LLM o al crew directamente, sin el análisis de respaldo de AIAnalyzer: si un
+modo falla, se informa del error en lugar de medir el respaldo.
+"""
+
+import os
+import time
+import argparse
+import statistics
+from dotenv import load_dotenv
+
+SAMPLE_CHANGES = [
+    {
+        'type': 'staged_file',
+        'path': 'src/utils/helpers.py',
+        'status': 'M',
+        'content': 'def parse_date(value):\n    return datetime.strptime(value, "%Y-%m-%d")\n'
+    },
+    {
+        'type': 'staged_file',
+        'path': 'README.md',
+        'status': 'M',
+        'content': '## Instalación\n\npip install -r requirements.txt\n'
+    }
+]
+
+
+def percentile(values, fraction):
+    """Devuelve el percentil indicado (0-1) de una lista de valores."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(analyzer, iterations):
+    """
+    Ejecuta el análisis varias veces y devuelve las latencias en segundos.
+
+    Los errores se propagan: `analyze_changes` los ocultaría devolviendo el análisis de respaldo.
+    """
+    from src.modules.ai_analysis.ai_analyzer import ANALYSIS_PROMPT
+
+    changes_text = analyzer.format_changes_for_analysis(SAMPLE_CHANGES)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if analyzer.use_crew:
+            analyzer._analyze_with_crew(changes_text)
+        else:
+            analyzer.llm.invoke(ANALYSIS_PROMPT.format(changes_text=changes_text))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia de AIAnalyzer: modo directo vs CrewAI')
+    parser.add_argument('--iterations', type=int, default=5, help='Ejecuciones por modo')
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.environ['LLM_CACHE_ENABLED'] = 'false'
+
+    from src.modules.ai_analysis.ai_analyzer import AIAnalyzer
+
+    for use_crew in (False, True):
+        mode = 'crewai ' if use_crew else 'directo'
+        try:
+            analyzer = AIAnalyzer({'enabled': True, 'use_crew': use_crew, 'verbose': False})
+            latencies = measure(analyzer, args.iterations)
+        except Exception as e:
+            print(f"{mode}: falló ({e})")
+            continue
+        print(f"{mode}: "
+              f"media={statistics.mean(latencies):.2f}s "
+              f"p50={percentile(latencies, 0.5):.2f}s "
+              f"p95={percentile(latencies, 0.95):.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Prueba de carga del pipeline de módulos con el proveedor de LLM simulado.
+
+Uso:
+    python -m benchmarks.load_test --events 200 --workers 8 --latency lognormal:300:0.5
+
+Envía eventos sintéticos de cambio de archivo a todos los módulos habilitados y
+mide el rendimiento (eventos/s) y la latencia de cola de cada evento. No realiza
+ninguna llamada a la red: se usa AI_PROVIDER=fake y la caché de respuestas se
+desactiva para que todas las peticiones lleguen al LLM simulado.
+"""
+
+import os
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, fraction):
+    """Devuelve el percentil indicado (0-1) de una lista de valores."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_event(index):
+    """Genera un evento de cambio de archivo con contenido único."""
+    content = (
+        f"class Service{index}:\n"
+        f"    def handle_{index}(self, value):\n"
+        f"        return value * {index}\n"
+        f"\n"
+        f"def helper_{index}(items):\n"
+        f"    return [item for item in items if item]\n"
+    )
+    return {
+        'type': 'file_change',
+        'event_type': 'modified',
+        'path': f"src/service_{index}.py",
+        'content': content,
+        'repo_path': '.'
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga con el proveedor de LLM simulado')
+    parser.add_argument('--config', help='Ruta al archivo de configuración')
+    parser.add_argument('--events', type=int, default=100, help='Número de eventos a procesar')
+    parser.add_argument('--workers', type=int, default=8, help='Eventos procesados en paralelo')
+    parser.add_argument('--latency', help="Distribución de latencia del LLM ('fixed:200', 'uniform:100:800', 'lognormal:300:0.5')")
+    parser.add_argument('--rate-limit-rate', type=float, help='Probabilidad de un error 429')
+    parser.add_argument('--timeout-rate', type=float, help='Probabilidad de un timeout')
+    parser.add_argument('--malformed-rate', type=float, help='Probabilidad de JSON mal formado')
+    args = parser.parse_args()
+
+    os.environ['AI_PROVIDER'] = 'fake'
+    os.environ['LLM_CACHE_ENABLED'] = 'false'
+    for name, value in (('FAKE_LLM_LATENCY', args.latency),
+                        ('FAKE_LLM_RATE_LIMIT_RATE', args.rate_limit_rate),
+                        ('FAKE_LLM_TIMEOUT_RATE', args.timeout_rate),
+                        ('FAKE_LLM_MALFORMED_RATE', args.malformed_rate)):
+        if value is not None:
+            os.environ[name] = str(value)
+
+    from src.module_manager import ModuleManager
+    from src.utils.ai_provider import AIProvider
+    from src.utils.llm_metrics import format_report
+
+    manager = ModuleManager(args.config)
+
+    def run(index):
+        start = time.perf_counter()
+        manager.process_event(make_event(index))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        latencies = list(executor.map(run, range(args.events)))
+    elapsed = time.perf_counter() - start
+
+    print(f"Eventos: {args.events} en {elapsed:.2f}s ({args.events / elapsed:.2f} eventos/s)")
+    print(f"Latencia por evento: media={statistics.mean(latencies):.2f}s "
+          f"p50={percentile(latencies, 0.5):.2f}s "
+          f"p95={percentile(latencies, 0.95):.2f}s "
+          f"p99={percentile(latencies, 0.99):.2f}s")
+
+    for client in AIProvider._clients.values():
+        stats = client.llm.get_stats()
+        print(f"LLM simulado ({client.model}, temperatura {client.params['temperature']}): "
+              f"llamadas={stats['calls']} errores={stats['errors']} "
+              f"tokens_prompt={stats['prompt_tokens']} tokens_respuesta={stats['completion_tokens']}")
+    print(f"Limitador: {AIProvider.get_rate_limit_stats()}")
+    print(f"Singleflight: {AIProvider.get_singleflight_stats()}")
+    print()
+    print(format_report(AIProvider.get_usage_stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,11 +4,16 @@ import schedule
 import logging
 import sys
 import argparse
+import json
 from dotenv import load_dotenv
 from src.git_monitor import GitMonitor
 from src.slack_notifier import SlackNotifier
 from src.module_manager import ModuleManager
+from src.core.config_manager import ConfigManager
+from src.baseline_scan import BaselineScan
 from src.interfaces.web_ui import init_app, start_server
+from src.utils.rate_limiter import request_priority, PRIORITY_BACKGROUND
+from src.utils.llm_metrics import get_metrics
 import threading
 from datetime import datetime
 
@@ -34,8 +39,29 @@ def main():
         parser.add_argument('--config', type=str, default='config.yaml', help='Ruta al archivo de configuración')
         parser.add_argument('--web', action='store_true', help='Iniciar interfaz web de configuración')
         parser.add_argument('--web-port', type=int, default=5000, help='Puerto para la interfaz web')
+        parser.add_argument('--baseline', action='store_true',
+                            help='Analizar todo el repositorio y guardar sus problemas como línea base')
+        parser.add_argument('--baseline-workers', type=int, default=None,
+                            help='Procesos para el análisis de línea base (por defecto, uno por CPU)')
+        parser.add_argument('--baseline-reset', action='store_true',
+                            help='Descartar la línea base anterior en lugar de reanudarla')
         args = parser.parse_args()
         
+        # Análisis completo del repositorio: no inicia el monitor
+        if args.baseline:
+            config = ConfigManager(args.config).get_config()
+            repo_path = config.get('core', {}).get('repo_path', os.getenv('REPO_PATH'))
+            logger.info(f"Generando línea base de {repo_path}...")
+            try:
+                stats = BaselineScan(repo_path, config.get('modules', {}), workers=args.baseline_workers).run(
+                    reset=args.baseline_reset
+                )
+            except KeyboardInterrupt:
+                logger.info("Análisis interrumpido; se reanudará en la próxima ejecución de --baseline")
+                return
+            print(json.dumps(stats, indent=2, ensure_ascii=False))
+            return
+        
         logger.info("Iniciando el monitor de Git...")
         
         # Inicializar el gestor de módulos
@@ -45,7 +71,7 @@ def main():
         # Iniciar interfaz web si se solicita
         if args.web:
             logger.info(f"Iniciando interfaz web en puerto {args.web_port}")
-            app = init_app(args.config)
+            app = init_app(args.config, module_manager.config_manager)
             web_thread = threading.Thread(
                 target=start_server,
                 kwargs={'host': '0.0.0.0', 'port': args.web_port, 'debug': False}
@@ -79,6 +105,32 @@ def main():
             logger.error("Error en la prueba de conexión con Slack. Verifica las credenciales.")
             return
 
+        def process_and_notify(event_data, header):
+            """Procesa un evento con los módulos y publica los resultados en Slack.
+
+            Los módulos que generan resultados parciales los muestran en un único
+            mensaje que se edita a medida que avanza el análisis.
+            """
+            streams = {}
+
+            def progress_factory(module_name):
+                def on_progress(text):
+                    if module_name not in streams:
+                        streams[module_name] = slack_notifier.start_stream(header(module_name))
+                    streams[module_name].update(text)
+                return on_progress
+
+            results = module_manager.process_event(event_data, progress_factory=progress_factory)
+            for result in results or []:
+                if result and 'module' in result:
+                    module_name = result['module']
+                    summary = result.get('summary', 'Sin resumen')
+                    logger.info(f"Enviando resultados de {module_name} a Slack")
+                    if module_name in streams:
+                        streams[module_name].finish(summary)
+                    else:
+                        slack_notifier.send_message(f"{header(module_name)}\n```\n{summary}\n```")
+
         def check_and_notify():
             logger.info("Verificando cambios...")
             # Check for new changes
@@ -88,6 +140,13 @@ def main():
                     logger.info(f"Cambios detectados: {changes.keys()}")
                     logger.debug(f"Contenido de cambios: {changes}")
                     
+                    # Los módulos agrupan el trabajo de todos los eventos del sondeo (por ejemplo,
+                    # los docstrings que faltan en todos los archivos se piden en pocas peticiones)
+                    events = changes.get('commits', []) + changes.get('local_changes', [])
+                    for event in events:
+                        event['repo_path'] = repo_path
+                    module_manager.prepare_events(events)
+                    
                     # Procesar cambios con los módulos
                     if 'commits' in changes:
                         logger.info(f"Procesando {len(changes['commits'])} commits nuevos")
@@ -95,16 +154,11 @@ def main():
                             # Añadir información del repositorio
                             commit['repo_path'] = repo_path
                             
-                            # Procesar con todos los módulos
-                            results = module_manager.process_event(commit)
-                            
-                            # Enviar resultados a Slack
-                            if results:
-                                for result in results:
-                                    if result and 'module' in result:
-                                        module_name = result['module']
-                                        logger.info(f"Enviando resultados de {module_name} a Slack")
-                                        slack_notifier.send_message(f"📊 Resultados de {module_name} para commit {commit['sha'][:7]}:\n```\n{result.get('summary', 'Sin resumen')}\n```")
+                            # Procesar con todos los módulos y enviar resultados a Slack
+                            process_and_notify(
+                                commit,
+                                lambda module_name: f"📊 Resultados de {module_name} para commit {commit['sha'][:7]}:"
+                            )
                     
                     if 'local_changes' in changes:
                         local_changes = changes['local_changes']
@@ -114,16 +168,11 @@ def main():
                             # Añadir información del repositorio
                             change['repo_path'] = repo_path
                             
-                            # Procesar con todos los módulos
-                            results = module_manager.process_event(change)
-                            
-                            # Enviar resultados a Slack
-                            if results:
-                                for result in results:
-                                    if result and 'module' in result:
-                                        module_name = result['module']
-                                        logger.info(f"Enviando resultados de {module_name} a Slack para cambios locales")
-                                        slack_notifier.send_message(f"📝 Resultados de {module_name} para cambios locales:\n```\n{result.get('summary', 'Sin resumen')}\n```")
+                            # Procesar con todos los módulos y enviar resultados a Slack
+                            process_and_notify(
+                                change,
+                                lambda module_name: f"📝 Resultados de {module_name} para cambios locales:"
+                            )
                     
                     # Procesar cambios en el área de staging
                     if 'staged' in changes and changes['staged']:
@@ -137,33 +186,39 @@ def main():
                             'repo_path': repo_path
                         }
                         
-                        # Procesar con todos los módulos
-                        results = module_manager.process_event(staged_event)
-                        
-                        # Enviar resultados a Slack
-                        if results:
-                            for result in results:
-                                if result and 'module' in result:
-                                    module_name = result['module']
-                                    logger.info(f"Enviando resultados de {module_name} a Slack para cambios en staging")
-                                    slack_notifier.send_message(f"📝 Resultados de {module_name} para cambios en staging:\n```\n{result.get('summary', 'Sin resumen')}\n```")
+                        # Procesar con todos los módulos y enviar resultados a Slack
+                        process_and_notify(
+                            staged_event,
+                            lambda module_name: f"📝 Resultados de {module_name} para cambios en staging:"
+                        )
                 else:
                     logger.debug("No se detectaron cambios")
             except Exception as e:
                 logger.exception("Error durante la verificación de cambios")
 
+        def check_and_notify_background():
+            # Las peticiones de IA del sondeo tienen menos prioridad que las de la interfaz web
+            with request_priority(PRIORITY_BACKGROUND):
+                check_and_notify()
+
         # Start file monitoring
         git_monitor.start_monitoring()
         logger.info("Monitoreo de archivos iniciado")
 
         try:
             # Schedule the job to run based on config
-            schedule.every(poll_interval).seconds.do(check_and_notify)
+            schedule.every(poll_interval).seconds.do(check_and_notify_background)
             logger.info(f"Programador configurado para revisar cada {poll_interval} segundos")
+            
+            # Recargar configuración y módulos en caliente si cambia el archivo
+            schedule.every(5).seconds.do(module_manager.check_config_changes)
+            
+            # Instantánea de métricas LLM para el informe `python -m src.utils.llm_metrics`
+            schedule.every(60).seconds.do(get_metrics().save)
 
             # Run first check immediately
             logger.info("Ejecutando primera verificación...")
-            check_and_notify()
+            check_and_notify_background()
 
             # Run continuously
             logger.info("Iniciando bucle principal...")
@@ -172,6 +227,7 @@ def main():
                 time.sleep(1)
         except KeyboardInterrupt:
             logger.info("\nDeteniendo el monitoreo...")
+            get_metrics().save()
             git_monitor.stop_monitoring()
         except Exception as e:
             logger.exception("Error en el bucle principal")
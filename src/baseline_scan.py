@@ -0,0 +1,340 @@
+"""
+Análisis completo del repositorio (línea base) con los módulos basados en reglas, repartido entre procesos.
+
+Los archivos se obtienen del índice de git y se leen por su blob, de modo que el análisis
+refleja el contenido confirmado o preparado y no depende de cambios sin guardar. Los hallazgos
+se guardan por huella en la línea base (`BaselineStore`); los eventos posteriores solo notifican
+los problemas nuevos.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import git
+from src.utils.baseline_store import get_baseline_store
+from src.modules.code_review.code_reviewer import CodeReviewer, issue_fingerprints, FINGERPRINT_VERSION
+from src.modules.code_review.rule_pack import DEFAULT_RULE_PACK
+from src.modules.code_review.secret_scanner import DEFAULT_SECRET_SCANNER
+from src.modules.documentation.docstring_generator import DocstringGenerator, missing_doc_fingerprints
+
+logger = logging.getLogger(__name__)
+
+# Archivos que procesa cada tarea de un proceso de trabajo
+SHARD_SIZE = 200
+
+# Tareas pendientes por proceso: limita la memoria y lo que se pierde si se interrumpe el análisis
+SHARDS_PER_WORKER = 2
+
+# Archivos más grandes (en bytes) no se analizan
+MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# Bytes iniciales en los que se busca un carácter nulo para descartar archivos binarios
+BINARY_SNIFF_BYTES = 8000
+
+# Segundos entre mensajes de progreso
+PROGRESS_INTERVAL = 5
+
+# Modos del índice que no son archivos normales (enlaces simbólicos y submódulos)
+_SKIPPED_MODES = {'120000', '160000'}
+
+_worker = None
+
+
+class _BaselineWorker:
+    """Estado de un proceso de trabajo: el repositorio y los módulos, creados una sola vez."""
+
+    def __init__(self, repo_path, module_configs):
+        """
+        Inicializa el proceso de trabajo.
+
+        Args:
+            repo_path (str): Ruta del repositorio.
+            module_configs (dict): Configuración de cada módulo.
+        """
+        self.repo = git.Repo(repo_path)
+        self.reviewer, self.docstrings = _baseline_modules(module_configs)
+
+    def scan_shard(self, entries):
+        """
+        Analiza un grupo de archivos.
+
+        Args:
+            entries (list): Tuplas (ruta, blob).
+
+        Returns:
+            tuple: (resultados, errores). Cada resultado es (ruta, blob, hallazgos) y cada error (ruta, mensaje).
+        """
+        results, errors = [], []
+        for path, blob in entries:
+            try:
+                content = self._read_blob(blob)
+                findings = self.scan_file(path, content) if content else []
+            except Exception as e:
+                errors.append((path, str(e)))
+                continue
+            results.append((path, blob, findings))
+        return results, errors
+
+    def _read_blob(self, blob):
+        """
+        Lee el contenido de un blob del repositorio.
+
+        Args:
+            blob (str): Identificador del blob.
+
+        Returns:
+            str: Contenido, o None si es demasiado grande, binario o no es UTF-8.
+        """
+        _, _, size = self.repo.git.get_object_header(blob)
+        if int(size) > MAX_FILE_SIZE:
+            return None
+        data = self.repo.git.get_object_data(blob)[3]
+        if b'\0' in data[:BINARY_SNIFF_BYTES]:
+            return None
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+
+    def scan_file(self, path, content):
+        """
+        Analiza un archivo con los módulos habilitados.
+
+        Args:
+            path (str): Ruta del archivo relativa al repositorio.
+            content (str): Contenido del archivo.
+
+        Returns:
+            list: Hallazgos ('fingerprint', 'module', 'rule', 'line', 'severity', 'message').
+        """
+        findings = []
+        if self.reviewer.is_enabled():
+            issues = self.reviewer._review_file_with_rules(path, content)['issues']
+            for issue, issue_hash in zip(issues, issue_fingerprints(path, content, issues)):
+                findings.append({
+                    'fingerprint': issue_hash,
+                    'module': self.reviewer.name,
+                    'rule': issue.get('rule') or issue.get('type'),
+                    'line': issue.get('line'),
+                    'severity': issue.get('severity'),
+                    'message': issue.get('message')
+                })
+
+        lang = self.docstrings._get_language_from_extension(os.path.splitext(path)[1].lower())
+        if self.docstrings.is_enabled() and lang in self.docstrings.target_langs:
+            missing_docs = self.docstrings._find_missing_docstrings(content, lang)
+            for item, item_hash in zip(missing_docs, missing_doc_fingerprints(path, missing_docs)):
+                findings.append({
+                    'fingerprint': item_hash,
+                    'module': self.docstrings.name,
+                    'rule': 'missing-docstring',
+                    'line': item.get('start_line'),
+                    'severity': 'low',
+                    'message': f"{item['type']} {item.get('qualname') or item['name']} sin docstring"
+                })
+        return findings
+
+
+def _baseline_modules(module_configs):
+    """
+    Crea los módulos con los que se analiza la línea base.
+
+    Solo se usan las reglas locales: sin IA, sin cachés y revisando archivos completos.
+
+    Args:
+        module_configs (dict): Configuración de cada módulo.
+
+    Returns:
+        tuple: (CodeReviewer, DocstringGenerator).
+    """
+    reviewer = CodeReviewer(dict(module_configs.get('CodeReviewer') or {}, use_ai=False,
+                                 review_cache=False, diff_scoped=False, baseline=False))
+    docstrings = DocstringGenerator(dict(module_configs.get('DocstringGenerator') or {}, use_ai=False,
+                                         docstring_cache=False, baseline=False))
+    return reviewer, docstrings
+
+
+def _init_worker(repo_path, module_configs):
+    """Inicializa el estado de un proceso de trabajo (inicializador del pool)."""
+    global _worker
+    _worker = _BaselineWorker(repo_path, module_configs)
+
+
+def _scan_shard(entries):
+    """Analiza un grupo de archivos en el proceso de trabajo actual."""
+    return _worker.scan_shard(entries)
+
+
+class BaselineScan:
+    """
+    Análisis de todos los archivos del repositorio, reanudable e incremental.
+
+    Cada grupo de archivos analizado se guarda en cuanto termina, junto con el blob de
+    cada archivo. Si el análisis se interrumpe, o se vuelve a lanzar más adelante, solo
+    se analizan los archivos cuyo blob no está ya en la línea base.
+    """
+
+    def __init__(self, repo_path, module_configs, store=None, workers=None, shard_size=SHARD_SIZE,
+                 on_progress=None):
+        """
+        Inicializa el análisis.
+
+        Args:
+            repo_path (str): Ruta del repositorio.
+            module_configs (dict): Configuración de cada módulo (sección 'modules' de la configuración).
+            store (BaselineStore, opcional): Almacén de la línea base (por defecto, el de BASELINE_PATH).
+            workers (int, opcional): Procesos de trabajo (por defecto, uno por CPU).
+            shard_size (int, opcional): Archivos por tarea.
+            on_progress (callable, opcional): Recibe (archivos analizados, archivos pendientes al empezar).
+        """
+        self.repo_path = repo_path
+        self.module_configs = {name: module_configs.get(name) or {}
+                               for name in (CodeReviewer.__name__, DocstringGenerator.__name__)}
+        self.store = store or get_baseline_store(create=True)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.shard_size = shard_size
+        self.on_progress = on_progress
+
+    @property
+    def version(self):
+        """
+        Huella de las reglas y de las opciones que cambian los hallazgos: si cambia, la línea base se rehace.
+
+        Solo cuentan las opciones efectivas de los módulos de la línea base (con sus valores por
+        defecto); las de la IA y las cachés no afectan a los hallazgos.
+        """
+        reviewer, docstrings = _baseline_modules(self.module_configs)
+        options = {
+            'CodeReviewer': [reviewer.is_enabled(), sorted(reviewer.review_types), reviewer.severity_threshold,
+                             reviewer.rule_time_budget, reviewer.file_time_budget],
+            'DocstringGenerator': [docstrings.is_enabled(), sorted(docstrings.target_langs)]
+        }
+        payload = json.dumps([options, DEFAULT_RULE_PACK.version, DEFAULT_SECRET_SCANNER.version,
+                              FINGERPRINT_VERSION],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+    def index_entries(self):
+        """
+        Lista los archivos del índice de git.
+
+        Returns:
+            list: Tuplas (ruta, blob) de los archivos normales, ordenadas por ruta.
+        """
+        output = git.Repo(self.repo_path).git.ls_files('-s', '-z')
+        entries = []
+        for record in output.split('\0'):
+            if not record:
+                continue
+            info, path = record.split('\t', 1)
+            mode, blob, stage = info.split()
+            # En conflictos se toma solo la versión sin conflicto (etapa 0)
+            if mode not in _SKIPPED_MODES and stage == '0':
+                entries.append((path, blob))
+        return sorted(entries)
+
+    def run(self, reset=False):
+        """
+        Ejecuta (o reanuda) el análisis.
+
+        Args:
+            reset (bool, opcional): Descartar la línea base anterior y analizar todo de nuevo.
+
+        Returns:
+            dict: Estadísticas del análisis.
+        """
+        started = time.time()
+        version = self.version
+        if reset or self.store.get_meta('version') != version:
+            if not reset and self.store.get_meta('version'):
+                logger.info("La configuración o las reglas cambiaron: se rehace la línea base")
+            self.store.clear()
+            self.store.set_meta('version', version)
+
+        entries = self.index_entries()
+        scanned = self.store.scanned_files()
+        removed = set(scanned) - {path for path, _ in entries}
+        if removed:
+            self.store.remove_files(removed)
+        pending = [(path, blob) for path, blob in entries if scanned.get(path) != blob]
+        logger.info(f"Línea base: {len(entries)} archivos en el índice, {len(entries) - len(pending)} ya analizados, "
+                    f"{len(pending)} pendientes ({self.workers} procesos)")
+
+        shards = [pending[start:start + self.shard_size] for start in range(0, len(pending), self.shard_size)]
+        done, errors = 0, []
+        last_report = started
+        for results, shard_errors in self._run_shards(shards):
+            self.store.replace_files(results)
+            errors.extend(shard_errors)
+            done += len(results) + len(shard_errors)
+            if self.on_progress:
+                self.on_progress(done, len(pending))
+            if time.time() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.time()
+                self._log_progress(done, len(pending), started)
+
+        for path, message in errors:
+            logger.warning(f"No se pudo analizar {path}: {message}")
+        self.store.set_meta('completed_at', str(time.time()))
+        stats = dict(self.store.get_stats(), scanned=done - len(errors), skipped=len(entries) - len(pending),
+                     removed=len(removed), errors=len(errors), elapsed=round(time.time() - started, 2))
+        logger.info(f"Línea base completada: {stats['scanned']} archivos analizados en {stats['elapsed']} s, "
+                    f"{stats['findings']} hallazgos en total")
+        return stats
+
+    def _run_shards(self, shards):
+        """
+        Analiza los grupos de archivos, en este proceso o repartidos entre procesos de trabajo.
+
+        Args:
+            shards (list): Grupos de tuplas (ruta, blob).
+
+        Yields:
+            tuple: (resultados, errores) de cada grupo, en el orden en que terminan.
+        """
+        if not shards:
+            return
+        if self.workers == 1 or len(shards) == 1:
+            worker = _BaselineWorker(self.repo_path, self.module_configs)
+            for shard in shards:
+                yield worker.scan_shard(shard)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), initializer=_init_worker,
+                                 initargs=(self.repo_path, self.module_configs)) as executor:
+            queue = iter(shards)
+            running = set()
+            try:
+                while True:
+                    for shard in queue:
+                        running.add(executor.submit(_scan_shard, shard))
+                        if len(running) >= self.workers * SHARDS_PER_WORKER:
+                            break
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield future.result()
+            except BaseException:
+                # Interrupción: lo ya guardado se conserva y el próximo análisis lo reanuda
+                for future in running:
+                    future.cancel()
+                raise
+
+    def _log_progress(self, done, total, started):
+        """
+        Registra el avance del análisis y el tiempo estimado restante.
+
+        Args:
+            done (int): Archivos analizados.
+            total (int): Archivos pendientes al empezar.
+            started (float): Momento de inicio.
+        """
+        elapsed = max(time.time() - started, 1e-6)
+        rate = done / elapsed
+        remaining = (total - done) / rate if rate else 0
+        logger.info(f"Línea base: {done}/{total} archivos ({done / total:.1%}), {rate:.0f} archivos/s, "
+                    f"quedan ~{int(remaining // 60)}m {int(remaining % 60)}s")
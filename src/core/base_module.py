@@ -6,6 +6,11 @@ logger = logging.getLogger(__name__)
 class BaseModule(ABC):
     """Clase base para todos los módulos de Git-Monitor."""
     
+    # Si es True, el gestor reutiliza el resultado de un evento anterior con las mismas líneas
+    # modificadas (cherry-picks, backports, renombrados) en lugar de volver a procesarlo; si
+    # solo es parecido, lo reutiliza únicamente si `refresh_similar_result` lo actualiza
+    reuse_similar_results = False
+    
     def __init__(self, config=None):
         """
         Inicializa un módulo base.
@@ -30,6 +35,47 @@ class BaseModule(ABC):
         """
         pass
     
+    def process_streaming(self, event_data, on_progress):
+        """
+        Procesa un evento notificando resultados parciales a medida que se generan.
+        
+        Por defecto el módulo no genera resultados parciales y equivale a `process`.
+        
+        Args:
+            event_data (dict): Datos del evento a procesar.
+            on_progress (callable): Función que recibe el texto parcial del resumen.
+            
+        Returns:
+            dict: Resultado del procesamiento.
+        """
+        return self.process(event_data)
+    
+    def refresh_similar_result(self, result, event_data):
+        """
+        Actualiza el resultado de un evento parecido (pero no idéntico) para el evento actual.
+        
+        Por defecto no se reutiliza: el evento se procesa de nuevo.
+        
+        Args:
+            result (dict): Resultado del evento parecido, con las rutas ya adaptadas.
+            event_data (dict): Datos del evento actual.
+            
+        Returns:
+            dict: Resultado actualizado, o None para procesar el evento.
+        """
+        return None
+    
+    def prepare(self, events):
+        """
+        Prepara el procesamiento de los eventos de un mismo sondeo, antes de procesarlos uno a uno.
+        
+        Permite agrupar en pocas peticiones el trabajo de todos los eventos. Por defecto no hace nada.
+        
+        Args:
+            events (list): Eventos que se van a procesar.
+        """
+        pass
+    
     @classmethod
     @abstractmethod
     def get_config_schema(cls):
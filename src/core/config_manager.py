@@ -1,7 +1,9 @@
 import os
+import copy
 import json
 import yaml
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +19,68 @@ class ConfigManager:
                                          de entorno GIT_MONITOR_CONFIG o 'config.yaml'.
         """
         self.config_path = config_path or os.environ.get('GIT_MONITOR_CONFIG', 'config.yaml')
+        self._lock = threading.RLock()
+        self._listeners = []
         self._config = self._load_config()
+        self._mtime = self._get_mtime()
         logger.info(f"Configuración cargada desde: {self.config_path}")
     
+    def _get_mtime(self):
+        """
+        Obtiene la fecha de modificación del archivo de configuración.
+        
+        Returns:
+            float: Fecha de modificación o None si el archivo no existe.
+        """
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+    
+    def add_listener(self, callback):
+        """
+        Registra una función que se llamará cuando cambie la configuración.
+        
+        Args:
+            callback (callable): Función que recibe (config_anterior, config_nueva).
+        """
+        self._listeners.append(callback)
+    
+    def _notify_listeners(self, old_config, new_config):
+        """
+        Notifica a los listeners registrados de un cambio de configuración.
+        
+        Args:
+            old_config (dict): Configuración anterior.
+            new_config (dict): Configuración nueva.
+        """
+        for callback in list(self._listeners):
+            try:
+                callback(old_config, new_config)
+            except Exception as e:
+                logger.error(f"Error al notificar cambio de configuración: {e}")
+    
+    def reload_if_changed(self):
+        """
+        Recarga la configuración si el archivo ha sido modificado en disco.
+        
+        Returns:
+            bool: True si la configuración se recargó, False en caso contrario.
+        """
+        with self._lock:
+            mtime = self._get_mtime()
+            if mtime is None or mtime == self._mtime:
+                return False
+            
+            old_config = copy.deepcopy(self._config)
+            self._config = self._load_config()
+            self._mtime = mtime
+            new_config = copy.deepcopy(self._config)
+            
+        logger.info(f"Configuración recargada desde: {self.config_path}")
+        self._notify_listeners(old_config, new_config)
+        return True
+    
     def _load_config(self):
         """
         Carga la configuración desde el archivo.
@@ -100,14 +161,20 @@ class ConfigManager:
             bool: True si la actualización fue exitosa, False en caso contrario.
         """
         try:
-            self._config.update(new_config)
-            self._save_config()
+            with self._lock:
+                old_config = copy.deepcopy(self._config)
+                self._config.update(new_config)
+                self._save_config()
+                self._mtime = self._get_mtime()
+                current_config = copy.deepcopy(self._config)
             logger.info("Configuración actualizada correctamente")
-            return True
         except Exception as e:
             logger.error(f"Error al actualizar configuración: {e}")
             return False
         
+        self._notify_listeners(old_config, current_config)
+        return True
+        
     def _save_config(self):
         """
         Guarda la configuración en el archivo.
@@ -1,37 +1,19 @@
 import os
+import time
 from typing import List, Dict
-from crewai import Agent, Task, Crew
-from langchain.tools import Tool
-from langchain_openai import ChatOpenAI
-from .claude_client import ClaudeClient
+from src.utils.ai_provider import AIProvider
+from src.modules.ai_analysis.ai_analyzer import ANALYSIS_PROMPT
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 class CrewAnalyzer:
-    def __init__(self):
+    def __init__(self, use_crew: bool = False):
         self.ai_provider = os.getenv('AI_PROVIDER', 'openai').lower()
-        
-        if self.ai_provider == 'openai':
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                logger.error("No se encontró OPENAI_API_KEY en las variables de entorno")
-                raise ValueError("OPENAI_API_KEY no está configurada")
-                
-            logger.info("Inicializando CrewAnalyzer con OpenAI")
-            self.llm = ChatOpenAI(
-                model_name="gpt-3.5-turbo",
-                temperature=0,
-                api_key=api_key
-            )
-        elif self.ai_provider == 'claude':
-            logger.info("Inicializando CrewAnalyzer con Claude")
-            claude_client = ClaudeClient()
-            self.llm = claude_client.llm
-        else:
-            logger.error(f"Proveedor de AI no válido: {self.ai_provider}")
-            raise ValueError(f"AI_PROVIDER debe ser 'openai' o 'claude', no '{self.ai_provider}'")
+        self.use_crew = use_crew
+        logger.info(f"Inicializando CrewAnalyzer con {self.ai_provider}")
+        self.llm = AIProvider.get_llm({'openai_model': "gpt-3.5-turbo", 'temperature': 0})
 
     def format_changes_for_analysis(self, changes: List[Dict]) -> str:
         """Formatea los cambios para un mejor análisis"""
@@ -56,52 +38,54 @@ class CrewAnalyzer:
 
     def analyze_changes(self, changes: List[Dict]) -> str:
         try:
-            logger.info(f"Analizando cambios con CrewAI: {len(changes)} cambios")
+            logger.info(f"Analizando cambios: {len(changes)} cambios")
             
             # Formatear los cambios para análisis
             changes_text = self.format_changes_for_analysis(changes)
+            prompt = ANALYSIS_PROMPT.format(changes_text=changes_text)
             
-            # Create agents
-            analyzer = Agent(
-                role='Code Analyzer',
-                goal='Analyze code changes and provide technical insights',
-                backstory='Expert code reviewer with experience in multiple programming languages',
-                llm=self.llm,
-                verbose=True
-            )
-
-            # Create tasks
-            analysis_task = Task(
-                description=f"""Analiza los siguientes cambios y proporciona un resumen claro y conciso:
-
-                {changes_text}
-
-                Tu resumen debe incluir:
-                1. Qué archivos fueron modificados
-                2. Tipo de cambios realizados
-                3. Impacto potencial de los cambios
-                
-                Formato tu respuesta usando Markdown y emojis para mejor legibilidad.
-                """,
-                agent=analyzer,
-                expected_output="Un resumen técnico y claro de los cambios, formateado con Markdown y emojis"
-            )
-
-            # Create and run the crew
-            crew = Crew(
-                agents=[analyzer],
-                tasks=[analysis_task],
-                verbose=True
-            )
-
-            logger.info("Iniciando análisis con CrewAI")
-            result = crew.kickoff()
-            logger.info("Análisis completado exitosamente")
+            start = time.perf_counter()
+            if self.use_crew:
+                result = self._analyze_with_crew(prompt)
+            else:
+                # Modo directo: un único prompt al cliente LLM compartido
+                result = self.llm.invoke(prompt)
+            logger.info(f"Análisis completado exitosamente en {time.perf_counter() - start:.2f}s")
             return result
         except Exception as e:
             logger.error(f"Error durante el análisis: {str(e)}")
             return self.fallback_analysis(changes)
     
+    def _analyze_with_crew(self, prompt: str) -> str:
+        """Análisis con CrewAI (opcional, para flujos con varios agentes)"""
+        from crewai import Agent, Task, Crew
+        
+        # Create agents
+        analyzer = Agent(
+            role='Code Analyzer',
+            goal='Analyze code changes and provide technical insights',
+            backstory='Expert code reviewer with experience in multiple programming languages',
+            llm=self.llm.llm,
+            verbose=True
+        )
+
+        # Create tasks
+        analysis_task = Task(
+            description=prompt,
+            agent=analyzer,
+            expected_output="Un resumen técnico y claro de los cambios, formateado con Markdown y emojis"
+        )
+
+        # Create and run the crew
+        crew = Crew(
+            agents=[analyzer],
+            tasks=[analysis_task],
+            verbose=True
+        )
+
+        logger.info("Iniciando análisis con CrewAI")
+        return str(crew.kickoff())
+    
     def fallback_analysis(self, changes: List[Dict]) -> str:
         """Análisis de respaldo cuando falla OpenAI"""
         try:
@@ -136,14 +136,29 @@ class GitMonitor:
                     
                     # Obtener los cambios detallados del commit
                     diffs = []
-                    for diff in commit.diff(commit.parents[0] if commit.parents else git.NULL_TREE):
-                        if diff.a_path:
+                    if commit.parents:
+                        commit_diffs = commit.parents[0].diff(commit, create_patch=True)
+                    else:
+                        commit_diffs = commit.diff(git.NULL_TREE, create_patch=True, R=True)
+                    for diff in commit_diffs:
+                        path = diff.b_path or diff.a_path
+                        if path:
+                            patch = diff.diff.decode('utf-8', errors='replace') if diff.diff else ''
+                            lines = patch.split('\n')
                             diffs.append({
-                                'file': diff.a_path,
+                                'file': path,
                                 'type': diff.change_type,
-                                'insertions': diff.diff.count(b'+'),
-                                'deletions': diff.diff.count(b'-')
+                                'insertions': sum(1 for line in lines if line.startswith('+')),
+                                'deletions': sum(1 for line in lines if line.startswith('-')),
+                                'patch': patch[:20000],  # Limitar el tamaño del parche
+                                'patch_truncated': len(patch) > 20000
                             })
+                            # Blob del archivo en el commit (el mismo identificador que `git hash-object`)
+                            if diff.b_blob is not None:
+                                diffs[-1]['blob'] = diff.b_blob.hexsha
+                            # Ruta anterior de los archivos renombrados
+                            if diff.renamed_file and diff.a_path and diff.a_path != path:
+                                diffs[-1]['old_file'] = diff.a_path
                     
                     commit_changes.append({
                         'type': 'commit',
@@ -1,8 +1,12 @@
+import copy
 import json
 import os
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from src.core.module_registry import ModuleRegistry
 from src.core.config_manager import ConfigManager
+from src.utils.ai_provider import AIProvider
+from src.utils.rate_limiter import request_priority, PRIORITY_INTERACTIVE
+from src.utils.llm_metrics import llm_module
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,15 +17,17 @@ app = Flask(__name__,
 
 config_manager = None
 
-def init_app(config_path=None):
+def init_app(config_path=None, shared_config_manager=None):
     """
     Inicializa la aplicación Flask.
     
     Args:
         config_path (str, opcional): Ruta al archivo de configuración.
+        shared_config_manager (ConfigManager, opcional): Gestor de configuración compartido con
+            el ModuleManager en ejecución, para que los cambios se apliquen sin reiniciar.
     """
     global config_manager
-    config_manager = ConfigManager(config_path)
+    config_manager = shared_config_manager or ConfigManager(config_path)
     logger.info("Aplicación web inicializada")
     return app
 
@@ -62,6 +68,17 @@ def modules_api():
     
     return jsonify(result)
 
+@app.route('/api/llm-stats', methods=['GET'])
+def llm_stats_api():
+    """API para obtener las estadísticas de uso del LLM (métricas por módulo, caché, peticiones agrupadas, límites y proveedores)."""
+    return jsonify({
+        'metrics': AIProvider.get_usage_stats(),
+        'cache': AIProvider.get_cache_stats(),
+        'singleflight': AIProvider.get_singleflight_stats(),
+        'rate_limits': AIProvider.get_rate_limit_stats(),
+        'providers': AIProvider.get_provider_stats()
+    })
+
 @app.route('/module/<module_name>', methods=['GET', 'POST'])
 def module_config(module_name):
     """Página de configuración para un módulo específico."""
@@ -85,7 +102,7 @@ def module_config(module_name):
                 module_config[key] = request.form.get(key, schema_item.get('default', ''))
         
         # Actualizar configuración
-        current_config = config_manager.get_config()
+        current_config = copy.deepcopy(config_manager.get_config())
         if 'modules' not in current_config:
             current_config['modules'] = {}
         current_config['modules'][module_name] = module_config
@@ -144,12 +161,14 @@ def generate_commit_message():
                 'repo_path': repo_path
             }
             
-            # Generar mensaje para un archivo específico
-            result = commit_generator.process(event_data)
+            # Generar mensaje para un archivo específico (petición interactiva, prioridad alta)
+            with request_priority(PRIORITY_INTERACTIVE), llm_module(commit_generator.name):
+                result = commit_generator.process(event_data)
             
         else:  # source_type == 'staged'
             # Generar mensaje para cambios en stage
-            result = commit_generator.process_staged_changes(repo_path)
+            with request_priority(PRIORITY_INTERACTIVE), llm_module(commit_generator.name):
+                result = commit_generator.process_staged_changes(repo_path)
         
         if not result or not result.get('success'):
             return jsonify({'error': 'Error al generar mensaje de commit'}), 500
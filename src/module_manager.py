@@ -2,8 +2,13 @@ import logging
 import importlib
 import pkgutil
 import os
+import json
+import hashlib
+import threading
 from src.core.module_registry import ModuleRegistry
 from src.core.config_manager import ConfigManager
+from src.utils.similarity_index import SimilarityIndex
+from src.utils.llm_metrics import llm_module
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +24,11 @@ class ModuleManager:
         """
         self.config_manager = ConfigManager(config_path)
         self.modules = {}
+        self._lock = threading.RLock()
+        self.similarity_index = self._create_similarity_index()
         self._discover_and_register_modules()
         self._initialize_modules()
+        self.config_manager.add_listener(self._on_config_changed)
         
     def _discover_and_register_modules(self):
         """Descubre y registra automáticamente todos los módulos disponibles."""
@@ -62,33 +70,170 @@ class ModuleManager:
             except Exception as e:
                 logger.error(f"Error al inicializar módulo {module_name}: {e}")
                 
-    def process_event(self, event_data):
+    def process_event(self, event_data, progress_factory=None):
         """
         Procesa un evento a través de todos los módulos habilitados.
         
         Args:
             event_data (dict): Datos del evento a procesar.
+            progress_factory (callable, opcional): Recibe el nombre de un módulo y devuelve la
+                función a la que ese módulo enviará sus resultados parciales.
             
         Returns:
             list: Lista de resultados de procesamiento de cada módulo.
         """
         results = []
         
-        for name, module in self.modules.items():
+        # Tomar una instantánea: si hay una recarga en curso, el evento termina con las instancias antiguas
+        modules = list(self.modules.items())
+        index = self.similarity_index
+        
+        # Buscar un evento anterior casi idéntico (cherry-pick, backport, renombrado...)
+        signature = index.signature(_event_text(event_data)) if index else None
+        match = index.query(signature) if signature else None
+        paths = _event_paths(event_data)
+        changes = _event_changes(event_data)
+        
+        # Solo se reutiliza si cada ruta del evento anterior tiene su equivalente en el actual
+        mapping = _path_mapping(match[1]['paths'], paths, _event_renames(event_data)) if match else None
+        if match and mapping is None:
+            logger.debug("Evento similar con rutas sin equivalencia en el evento actual: no se reutiliza")
+            match = None
+        # Con las mismas líneas modificadas el resultado se reutiliza tal cual; si solo son
+        # parecidas, cada módulo decide cómo actualizarlo (por defecto, vuelve a procesar el evento)
+        identical = bool(match) and match[1]['changes'] == changes
+        stored = {}
+        
+        for name, module in modules:
             if module.is_enabled():
                 try:
-                    logger.debug(f"Procesando evento con módulo {name}")
-                    result = module.process(event_data)
+                    reusable = module.reuse_similar_results
+                    result = None
+                    if reusable and match and name in match[1]['results']:
+                        result = _adapt_result(match[1]['results'][name], mapping, match[2], event_data)
+                        if not identical:
+                            result = module.refresh_similar_result(result, event_data)
+                        if result is not None:
+                            logger.info(f"Reutilizando el resultado de {name} de un evento similar "
+                                        f"({match[2]:.0%} de similitud)")
+                    if result is None:
+                        logger.debug(f"Procesando evento con módulo {name}")
+                        with llm_module(name):
+                            if progress_factory:
+                                result = module.process_streaming(event_data, progress_factory(name))
+                            else:
+                                result = module.process(event_data)
                     if result:
                         results.append(result)
+                        if reusable:
+                            stored[name] = result
                         logger.debug(f"Módulo {name} generó resultado: {result}")
                 except Exception as e:
                     logger.error(f"Error al procesar evento con módulo {name}: {e}")
             else:
                 logger.debug(f"Módulo {name} deshabilitado, ignorando evento")
+        
+        if signature and stored:
+            index.add(signature, {'paths': paths, 'changes': changes, 'results': stored})
                 
         return results
         
+    def prepare_events(self, events):
+        """
+        Permite a los módulos habilitados preparar de una vez los eventos de un sondeo.
+        
+        Args:
+            events (list): Eventos que se van a procesar después con `process_event`.
+        """
+        if not events:
+            return
+        for name, module in list(self.modules.items()):
+            if not module.is_enabled():
+                continue
+            try:
+                with llm_module(name):
+                    module.prepare(events)
+            except Exception as e:
+                logger.error(f"Error al preparar eventos con módulo {name}: {e}")
+        
+    def _create_similarity_index(self):
+        """
+        Crea el índice de eventos similares según la configuración 'core'.
+        
+        Returns:
+            SimilarityIndex: Índice, o None si `similarity_threshold` es 0.
+        """
+        core = self.config_manager.get_config().get('core', {}) or {}
+        threshold = float(core.get('similarity_threshold', 0.9))
+        if threshold <= 0:
+            return None
+        return SimilarityIndex(threshold=threshold, max_entries=int(core.get('similarity_max_entries', 1000)))
+        
+    def check_config_changes(self):
+        """
+        Comprueba si el archivo de configuración cambió en disco y aplica los cambios.
+        
+        Returns:
+            bool: True si la configuración se recargó, False en caso contrario.
+        """
+        return self.config_manager.reload_if_changed()
+        
+    def _on_config_changed(self, old_config, new_config):
+        """
+        Reconstruye solo los módulos cuya configuración ha cambiado.
+        
+        Args:
+            old_config (dict): Configuración anterior.
+            new_config (dict): Configuración nueva.
+        """
+        old_config = old_config or {}
+        new_config = new_config or {}
+        
+        if old_config.get('core', {}) != new_config.get('core', {}):
+            logger.warning("La configuración 'core' cambió; se requiere reiniciar para aplicarla")
+        
+        old_modules = old_config.get('modules', {}) or {}
+        new_modules = new_config.get('modules', {}) or {}
+        changed = [name for name in ModuleRegistry.get_all_modules()
+                   if old_modules.get(name, {}) != new_modules.get(name, {})]
+        
+        if changed:
+            self.reload_modules(changed)
+        else:
+            logger.debug("Configuración actualizada sin cambios en los módulos")
+        
+    def reload_modules(self, names):
+        """
+        Reconstruye las instancias de los módulos indicados con su configuración actual.
+        
+        Las instancias nuevas se publican de forma atómica; los eventos en curso terminan
+        con las instancias anteriores. Si un módulo falla al reconstruirse, se conserva
+        la instancia anterior.
+        
+        Args:
+            names (list): Nombres de los módulos a reconstruir.
+        """
+        with self._lock:
+            modules = dict(self.modules)
+            
+            for module_name in names:
+                module_class = ModuleRegistry.get_module(module_name)
+                if not module_class:
+                    continue
+                    
+                try:
+                    module_config = self.config_manager.get_module_config(module_name)
+                    module_instance = module_class(module_config)
+                    modules[module_name] = module_instance
+                    logger.info(f"Módulo recargado: {module_name} (enabled={module_instance.is_enabled()})")
+                except Exception as e:
+                    logger.error(f"Error al recargar módulo {module_name}, se mantiene la instancia anterior: {e}")
+            
+            self.modules = modules
+            
+            # Los resultados guardados pueden no corresponder a la nueva configuración
+            self.similarity_index = self._create_similarity_index()
+        
     def get_module(self, name):
         """
         Obtiene una instancia de módulo por nombre.
@@ -109,3 +254,160 @@ class ModuleManager:
             dict: Diccionario con los nombres de los módulos como claves y las instancias como valores.
         """
         return self.modules
+
+
+def _event_text(event_data):
+    """
+    Obtiene el texto (diffs y contenidos) que identifica un evento para buscar eventos similares.
+    
+    Args:
+        event_data (dict): Datos del evento.
+        
+    Returns:
+        str: Texto del evento.
+    """
+    parts = []
+    for item in [event_data] + list(event_data.get('files', []) or []) + list(event_data.get('diffs', []) or []):
+        if isinstance(item, dict):
+            parts.extend(str(item[key]) for key in ('patch', 'diff', 'content') if item.get(key))
+    return '\n'.join(parts)
+
+
+def _event_paths(event_data):
+    """
+    Obtiene las rutas de los archivos de un evento.
+    
+    Args:
+        event_data (dict): Datos del evento.
+        
+    Returns:
+        list: Rutas ordenadas.
+    """
+    paths = []
+    for item in [event_data] + list(event_data.get('files', []) or []) + list(event_data.get('diffs', []) or []):
+        if isinstance(item, dict):
+            path = item.get('path') or item.get('file')
+            if path:
+                paths.append(path)
+        elif isinstance(item, str):
+            paths.append(item)
+    return sorted(set(paths))
+
+
+def _event_changes(event_data):
+    """
+    Calcula una huella de las líneas modificadas de un evento, sin rutas ni cabeceras del diff.
+    
+    Dos eventos con la misma huella (por ejemplo, un cherry-pick sin conflictos) cambian
+    exactamente las mismas líneas, aunque el contexto del diff sea distinto.
+    
+    Args:
+        event_data (dict): Datos del evento.
+        
+    Returns:
+        str: Huella hexadecimal.
+    """
+    digests = []
+    for item in [event_data] + list(event_data.get('files', []) or []) + list(event_data.get('diffs', []) or []):
+        if not isinstance(item, dict):
+            continue
+        patch = item.get('patch') or item.get('diff')
+        if patch:
+            text = '\n'.join(line for line in str(patch).splitlines()
+                             if line[:1] in ('+', '-') and not line.startswith(('+++', '---')))
+        elif item.get('content'):
+            text = str(item['content'])
+        else:
+            continue
+        digests.append(hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest())
+    return hashlib.sha256('|'.join(sorted(digests)).encode('utf-8')).hexdigest()
+
+
+def _event_renames(event_data):
+    """
+    Obtiene los archivos renombrados de un evento.
+    
+    Args:
+        event_data (dict): Datos del evento.
+        
+    Returns:
+        dict: Ruta nueva de cada ruta anterior.
+    """
+    renames = {}
+    for item in list(event_data.get('files', []) or []) + list(event_data.get('diffs', []) or []):
+        if isinstance(item, dict) and item.get('old_file') and (item.get('file') or item.get('path')):
+            renames[item['old_file']] = item.get('file') or item.get('path')
+    return renames
+
+
+def _path_mapping(old_paths, new_paths, renames):
+    """
+    Empareja las rutas de un evento anterior con las del evento actual.
+    
+    Una ruta se empareja consigo misma si está en el evento actual, o con su nueva
+    ruta si el evento actual la renombra.
+    
+    Args:
+        old_paths (list): Rutas del evento anterior.
+        new_paths (list): Rutas del evento actual.
+        renames (dict): Ruta nueva de cada ruta renombrada en el evento actual.
+        
+    Returns:
+        dict: Ruta actual de cada ruta anterior, o None si alguna no tiene equivalente.
+    """
+    current = set(new_paths)
+    mapping = {}
+    for old in old_paths:
+        if old in current:
+            mapping[old] = old
+        elif renames.get(old) in current:
+            mapping[old] = renames[old]
+        else:
+            return None
+    return mapping
+
+
+def _replace_paths(value, mapping):
+    """
+    Sustituye las rutas de los campos 'file' y 'path' de un resultado, a cualquier profundidad.
+    
+    Args:
+        value (object): Resultado (o parte de él) deserializado de JSON.
+        mapping (dict): Ruta actual de cada ruta anterior.
+        
+    Returns:
+        object: Copia con las rutas sustituidas.
+    """
+    if isinstance(value, list):
+        return [_replace_paths(item, mapping) for item in value]
+    if isinstance(value, dict):
+        return {key: mapping.get(item, item) if key in ('file', 'path') and isinstance(item, str)
+                else _replace_paths(item, mapping) for key, item in value.items()}
+    return value
+
+
+def _adapt_result(result, mapping, similarity, event_data):
+    """
+    Adapta el resultado de un evento similar al evento actual.
+    
+    Si los archivos tienen otro nombre (por ejemplo, tras un renombrado masivo), se
+    sustituyen las rutas de los campos estructurados ('file', 'path', y los de
+    'file_reviews'); el texto libre no se modifica. El identificador pasa a ser el del
+    evento actual y el resumen indica que el resultado se ha reutilizado.
+    
+    Args:
+        result (dict): Resultado del evento anterior.
+        mapping (dict): Ruta actual de cada ruta del evento anterior.
+        similarity (float): Similitud entre ambos eventos.
+        event_data (dict): Datos del evento actual.
+        
+    Returns:
+        dict: Copia adaptada del resultado.
+    """
+    adapted = _replace_paths(json.loads(json.dumps(result, ensure_ascii=False, default=str)), mapping)
+    
+    if isinstance(adapted, dict) and 'id' in adapted:
+        adapted['id'] = event_data.get('id', '')
+    if isinstance(adapted, dict) and isinstance(adapted.get('summary'), str):
+        adapted['summary'] += f"\n(Resultado reutilizado de un cambio similar al {similarity:.0%})"
+    return adapted
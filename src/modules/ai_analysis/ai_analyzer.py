@@ -1,21 +1,36 @@
 import os
+import time
 from typing import List, Dict, Optional
-from crewai import Agent, Task, Crew
-from langchain.tools import Tool
-from langchain_openai import ChatOpenAI
-from src.utils.claude_client import ClaudeClient
 import logging
 from datetime import datetime
 from src.core.base_module import BaseModule
+from src.utils.ai_provider import AIProvider
+from src.utils.llm_client import response_to_text
 
 logger = logging.getLogger(__name__)
 
+ANALYSIS_PROMPT = """Analiza los siguientes cambios y proporciona un resumen claro y conciso:
+
+                {changes_text}
+
+                Tu resumen debe incluir:
+                1. Qué archivos fueron modificados
+                2. Tipo de cambios realizados
+                3. Impacto potencial de los cambios
+                
+                Formato tu respuesta usando Markdown y emojis para mejor legibilidad.
+                """
+
 class AIAnalyzer(BaseModule):
     """
     Módulo para analizar cambios en el código utilizando inteligencia artificial.
-    Utiliza CrewAI para crear agentes que analizan los cambios y proporcionan insights.
+    Por defecto envía el prompt de análisis directamente al LLM; opcionalmente puede
+    utilizar CrewAI para crear agentes que analizan los cambios y proporcionan insights.
     """
     
+    # El resumen describe el commit (autor, mensaje y archivos): no sirve para otro evento
+    reuse_similar_results = False
+    
     def __init__(self, config=None):
         """
         Inicializa el analizador de IA.
@@ -26,6 +41,8 @@ class AIAnalyzer(BaseModule):
         super().__init__(config)
         # No establecer self.name directamente, ya que es una propiedad en la clase base
         # self.name = "ai_analyzer"
+        self.use_crew = self.config.get('use_crew', False)
+        self.last_latency = None
         
         if self.is_enabled():
             self._initialize_llm()
@@ -61,32 +78,19 @@ class AIAnalyzer(BaseModule):
                 'type': 'boolean',
                 'description': 'Mostrar información detallada durante el análisis',
                 'default': True
+            },
+            'use_crew': {
+                'type': 'boolean',
+                'description': 'Usar CrewAI (Agent/Task/Crew) en lugar de enviar el prompt directamente al LLM',
+                'default': False
             }
         }
 
     def _initialize_llm(self):
-        """Inicializa el modelo de lenguaje según la configuración."""
+        """Inicializa el modelo de lenguaje (cliente compartido) según la configuración."""
         self.ai_provider = os.getenv('AI_PROVIDER', 'openai').lower()
-        
-        if self.ai_provider == 'openai':
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                logger.error("No se encontró OPENAI_API_KEY en las variables de entorno")
-                raise ValueError("OPENAI_API_KEY no está configurada")
-                
-            logger.info("Inicializando AIAnalyzer con OpenAI")
-            self.llm = ChatOpenAI(
-                model_name=self.config.get('openai_model', "gpt-3.5-turbo"),
-                temperature=self.config.get('temperature', 0),
-                api_key=api_key
-            )
-        elif self.ai_provider == 'claude':
-            logger.info("Inicializando AIAnalyzer con Claude")
-            claude_client = ClaudeClient()
-            self.llm = claude_client.llm
-        else:
-            logger.error(f"Proveedor de AI no válido: {self.ai_provider}")
-            raise ValueError(f"AI_PROVIDER debe ser 'openai' o 'claude', no '{self.ai_provider}'")
+        self.llm = AIProvider.get_llm(self.config)
+        logger.info(f"Inicializando AIAnalyzer con {self.ai_provider} (modo {'CrewAI' if self.use_crew else 'directo'})")
 
     def format_changes_for_analysis(self, changes: List[Dict]) -> str:
         """
@@ -123,63 +127,101 @@ class AIAnalyzer(BaseModule):
                 )
         return "\n---\n".join(formatted)
 
-    def analyze_changes(self, changes: List[Dict]) -> str:
+    def analyze_changes(self, changes: List[Dict], on_progress=None) -> str:
         """
-        Analiza los cambios utilizando CrewAI.
+        Analiza los cambios con el LLM (directamente o mediante CrewAI).
         
         Args:
             changes (List[Dict]): Lista de cambios a analizar.
+            on_progress (callable, opcional): Si se indica, el análisis se obtiene en streaming
+                directamente del LLM y se envía el texto parcial a esta función.
             
         Returns:
             str: Resultado del análisis.
         """
         try:
-            logger.info(f"Analizando cambios con CrewAI: {len(changes)} cambios")
-            
             # Formatear los cambios para análisis
             changes_text = self.format_changes_for_analysis(changes)
             
-            # Create agents
-            analyzer = Agent(
-                role='Code Analyzer',
-                goal='Analyze code changes and provide technical insights',
-                backstory='Expert code reviewer with experience in multiple programming languages',
-                llm=self.llm,
-                verbose=self.config.get('verbose', True)
-            )
-
-            # Create tasks
-            analysis_task = Task(
-                description=f"""Analiza los siguientes cambios y proporciona un resumen claro y conciso:
-
-                {changes_text}
-
-                Tu resumen debe incluir:
-                1. Qué archivos fueron modificados
-                2. Tipo de cambios realizados
-                3. Impacto potencial de los cambios
-                
-                Formato tu respuesta usando Markdown y emojis para mejor legibilidad.
-                """,
-                agent=analyzer,
-                expected_output="Un resumen técnico y claro de los cambios, formateado con Markdown y emojis"
-            )
-
-            # Create and run the crew
-            crew = Crew(
-                agents=[analyzer],
-                tasks=[analysis_task],
-                verbose=self.config.get('verbose', True)
-            )
-
-            logger.info("Iniciando análisis con CrewAI")
-            result = crew.kickoff()
-            logger.info("Análisis completado exitosamente")
+            if on_progress is not None:
+                return self._analyze_streaming(changes_text, on_progress)
+            
+            start = time.perf_counter()
+            if self.use_crew:
+                logger.info(f"Analizando cambios con CrewAI: {len(changes)} cambios")
+                result = self._analyze_with_crew(changes_text)
+            else:
+                logger.info(f"Analizando cambios con el LLM: {len(changes)} cambios")
+                result = self.llm.invoke(ANALYSIS_PROMPT.format(changes_text=changes_text))
+            
+            self.last_latency = time.perf_counter() - start
+            logger.info(f"Análisis completado exitosamente en {self.last_latency:.2f}s "
+                        f"(modo {'CrewAI' if self.use_crew else 'directo'})")
             return result
         except Exception as e:
             logger.error(f"Error durante el análisis: {str(e)}")
             return self.fallback_analysis(changes)
     
+    def _analyze_with_crew(self, changes_text: str) -> str:
+        """
+        Analiza los cambios creando un agente, una tarea y un crew de CrewAI.
+        
+        Args:
+            changes_text (str): Cambios formateados para el análisis.
+            
+        Returns:
+            str: Resultado del análisis.
+        """
+        # Importación diferida: CrewAI solo se carga si se usa este modo
+        from crewai import Agent, Task, Crew
+        
+        # Create agents
+        analyzer = Agent(
+            role='Code Analyzer',
+            goal='Analyze code changes and provide technical insights',
+            backstory='Expert code reviewer with experience in multiple programming languages',
+            llm=self.llm.llm,
+            verbose=self.config.get('verbose', True)
+        )
+
+        # Create tasks
+        analysis_task = Task(
+            description=ANALYSIS_PROMPT.format(changes_text=changes_text),
+            agent=analyzer,
+            expected_output="Un resumen técnico y claro de los cambios, formateado con Markdown y emojis"
+        )
+
+        # Create and run the crew
+        crew = Crew(
+            agents=[analyzer],
+            tasks=[analysis_task],
+            verbose=self.config.get('verbose', True)
+        )
+
+        logger.info("Iniciando análisis con CrewAI")
+        return str(crew.kickoff())
+    
+    def _analyze_streaming(self, changes_text: str, on_progress) -> str:
+        """
+        Obtiene el análisis en streaming directamente del LLM.
+        
+        Args:
+            changes_text (str): Cambios formateados para el análisis.
+            on_progress (callable): Función que recibe el texto acumulado.
+            
+        Returns:
+            str: Resultado completo del análisis.
+        """
+        logger.info("Iniciando análisis en streaming")
+        chunks = []
+        for chunk in self.llm.stream(ANALYSIS_PROMPT.format(changes_text=changes_text)):
+            text = response_to_text(chunk)
+            if text:
+                chunks.append(text)
+                on_progress(''.join(chunks))
+        logger.info("Análisis completado exitosamente")
+        return ''.join(chunks)
+    
     def fallback_analysis(self, changes: List[Dict]) -> str:
         """
         Análisis de respaldo cuando falla el análisis principal.
@@ -235,6 +277,32 @@ class AIAnalyzer(BaseModule):
         Args:
             event_data (dict): Datos del evento a procesar.
             
+        Returns:
+            dict: Resultado del procesamiento.
+        """
+        return self._process(event_data)
+    
+    def process_streaming(self, event_data, on_progress):
+        """
+        Procesa un evento enviando el análisis parcial a medida que se genera.
+        
+        Args:
+            event_data (dict): Datos del evento a procesar.
+            on_progress (callable): Función que recibe el texto parcial del análisis.
+            
+        Returns:
+            dict: Resultado del procesamiento.
+        """
+        return self._process(event_data, on_progress)
+    
+    def _process(self, event_data, on_progress=None):
+        """
+        Implementación común de `process` y `process_streaming`.
+        
+        Args:
+            event_data (dict): Datos del evento a procesar.
+            on_progress (callable, opcional): Función que recibe el texto parcial del análisis.
+            
         Returns:
             dict: Resultado del procesamiento.
         """
@@ -268,7 +336,7 @@ class AIAnalyzer(BaseModule):
                 return None
                 
             # Analizar los cambios
-            analysis = self.analyze_changes(changes)
+            analysis = self.analyze_changes(changes, on_progress)
             
             # Devolver el resultado
             return {
@@ -1,16 +1,122 @@
 import os
 import re
+import json
+import time
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.core.base_module import BaseModule
 from src.core.module_registry import ModuleRegistry
 from src.utils.ai_provider import AIProvider
+from src.utils.prompt_builder import PromptBuilder, estimate_tokens
+from src.utils.incremental_json import IncrementalArrayParser
+from src.utils.model_router import ModelRouter
+from src.utils.source_index import get_source_index
+from src.utils.diff_scope import DiffScope
+from src.utils.code_chunks import split_code
+from src.utils.rate_limiter import current_priority, request_priority
+from src.utils.llm_metrics import current_module, llm_module
+from src.utils.python_structure import parse_python
+from src.utils.js_structure import parse_javascript, JS_EXTENSIONS
+from src.utils.result_cache import get_result_cache
+from src.utils.baseline_store import get_baseline_store, fingerprints
+from src.modules.code_review.rule_pack import DEFAULT_RULE_PACK, SHORT_NAMES_ALLOWED
+from src.modules.code_review.secret_scanner import DEFAULT_SECRET_SCANNER
 
 logger = logging.getLogger(__name__)
 
+FUNCTION_PATTERN = re.compile(r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(.*?\):')
+
+# Reglas que en Python se comprueban con el árbol sintáctico en lugar de con su patrón
+AST_RULES = {'short-variable-name'}
+
+# Fragmentos máximos de un archivo grande revisado por partes; con más, se revisa un extracto
+DEFAULT_MAX_REVIEW_CHUNKS = 16
+
+# Versión del formato de las huellas de línea base: si cambia, la línea base se rehace
+FINGERPRINT_VERSION = 2
+
+# Caché de revisiones por blob (se puede cambiar con REVIEW_CACHE_PATH)
+DEFAULT_REVIEW_CACHE_PATH = os.path.join('.git_monitor_cache', 'review_cache.sqlite')
+
+# Esquemas de las respuestas de la IA
+ISSUE_SCHEMA = {
+    'type': 'object',
+    'required': ['message'],
+    'properties': {
+        'line': {'type': ['integer', 'string', 'null']},
+        'severity': {'type': 'string', 'default': 'medium'},
+        'type': {'type': 'string', 'default': 'quality'},
+        'message': {'type': 'string'},
+        'suggestion': {'type': ['string', 'null']}
+    }
+}
+
+REVIEW_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'issues': {'type': 'array', 'items': ISSUE_SCHEMA, 'default': []},
+        'summary': {'type': 'string', 'default': "No se encontraron problemas significativos."},
+        'confidence': {'type': 'number'}
+    }
+}
+
+BATCH_REVIEW_SCHEMA = {
+    'type': 'object',
+    'required': ['files'],
+    'properties': {
+        'files': {'type': 'object', 'additionalProperties': REVIEW_SCHEMA},
+        'confidence': {'type': 'number'}
+    }
+}
+
+
+def blob_id(content):
+    """
+    Calcula el identificador del blob de git de un contenido (el mismo que `git hash-object`).
+    
+    Args:
+        content (str): Contenido del archivo.
+        
+    Returns:
+        str: SHA-1 hexadecimal del blob.
+    """
+    data = content.encode('utf-8', 'surrogateescape')
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def issue_fingerprints(file_path, content, issues):
+    """
+    Calcula la huella de línea base de los problemas de una revisión.
+    
+    Cada problema se identifica por su regla (o tipo), su mensaje y el texto normalizado
+    de su línea, no por el número de línea.
+    
+    Args:
+        file_path (str): Ruta del archivo relativa al repositorio.
+        content (str): Contenido revisado.
+        issues (list): Problemas de la revisión.
+        
+    Returns:
+        list: Huella de cada problema.
+    """
+    index = get_source_index(content)
+    keys = []
+    for issue in issues:
+        line = issue.get('line')
+        text = index.line_text(line) if isinstance(line, int) else ''
+        keys.append((issue.get('rule') or issue.get('type'), f"{issue.get('message')}|{' '.join(text.split())}"))
+    return fingerprints(CodeReviewer.__name__, file_path, keys)
+
+
 @ModuleRegistry.register
 class CodeReviewer(BaseModule):
     """Revisa automáticamente el código y proporciona sugerencias de mejora."""
     
+    # Revisiones en paralelo de los fragmentos de archivos grandes (la concurrencia real la limita el proveedor)
+    _chunk_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='review-chunk')
+    
     def __init__(self, config=None):
         """
         Inicializa el revisor de código.
@@ -23,11 +129,32 @@ class CodeReviewer(BaseModule):
         self.suggest_fixes = self.config.get('suggest_fixes', True)
         self.severity_threshold = self.config.get('severity_threshold', 'low')
         self.use_ai = self.config.get('use_ai', False)
+        # Reutilizar resultados de eventos casi idénticos solo cuando evitan llamadas a la IA
+        self.reuse_similar_results = self.use_ai
+        self.prompt_builder = PromptBuilder(self.config.get('openai_model'), self.config.get('max_prompt_tokens'))
+        self.packed_review = self.config.get('packed_review', True)
+        self.rule_pack = DEFAULT_RULE_PACK
+        self.secret_scanner = DEFAULT_SECRET_SCANNER
+        self.diff_scoped = self.config.get('diff_scoped', True)
+        self.rule_time_budget = self.config.get('rule_time_budget_ms', 200) / 1000
+        self.file_time_budget = self.config.get('file_time_budget_ms', 2000) / 1000
+        self.use_baseline = self.config.get('baseline', True)
+        self.chunked_review = self.config.get('chunked_review', True)
+        self.max_review_chunks = self.config.get('max_review_chunks', DEFAULT_MAX_REVIEW_CHUNKS)
+        
+        # Caché de revisiones por blob, rule pack y configuración, persistente entre reinicios
+        self.review_cache = None
+        if self.config.get('review_cache', True):
+            self.review_cache = get_result_cache(os.getenv('REVIEW_CACHE_PATH', DEFAULT_REVIEW_CACHE_PATH))
+        self.config_hash = hashlib.sha256(json.dumps(
+            {key: value for key, value in self.config.items() if key != 'enabled'}, sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()[:12]
         
         # Inicializar LLM si se va a usar IA
         if self.use_ai and self.is_enabled():
             try:
                 self.llm = AIProvider.get_llm(self.config)
+                self.router = ModelRouter(self.config, self.llm)
                 logger.info(f"LLM inicializado para {self.__class__.__name__}")
             except Exception as e:
                 logger.error(f"Error al inicializar LLM: {e}")
@@ -40,6 +167,32 @@ class CodeReviewer(BaseModule):
         Args:
             event_data (dict): Datos del evento a procesar.
             
+        Returns:
+            dict: Resultado de la revisión de código.
+        """
+        return self._process(event_data)
+    
+    def process_streaming(self, event_data, on_progress):
+        """
+        Procesa un evento mostrando los problemas encontrados por la IA a medida que llegan.
+        
+        Args:
+            event_data (dict): Datos del evento a procesar.
+            on_progress (callable): Función que recibe el texto parcial del resumen.
+            
+        Returns:
+            dict: Resultado de la revisión de código.
+        """
+        return self._process(event_data, on_progress)
+    
+    def _process(self, event_data, on_progress=None):
+        """
+        Implementación común de `process` y `process_streaming`.
+        
+        Args:
+            event_data (dict): Datos del evento a procesar.
+            on_progress (callable, opcional): Función que recibe el texto parcial del resumen.
+            
         Returns:
             dict: Resultado de la revisión de código.
         """
@@ -53,17 +206,18 @@ class CodeReviewer(BaseModule):
             
         # Para commits, revisar todos los archivos modificados
         if event_data['type'] == 'commit':
-            files = event_data.get('files', [])
+            files = event_data.get('files') or [diff['file'] for diff in event_data.get('diffs', [])]
             if not files:
                 logger.warning(f"Commit sin archivos modificados, ignorando")
                 return None
                 
-            # Revisión de código para cada archivo en el commit
-            reviews = []
-            for file_path in files:
-                file_review = self._review_file(file_path, event_data.get('repo_path', '.'))
-                if file_review and file_review.get('issues'):
-                    reviews.append(file_review)
+            # Revisión de código de los archivos del commit (agrupados en un mismo prompt si es posible)
+            repo_path = event_data.get('repo_path', '.')
+            contents, scopes = self._event_files(event_data)
+            files_content = dict(contents)
+            reviews = [self._exclude_baseline(review, files_content[review['file']])
+                       for review in self._review_files(contents, repo_path, scopes, on_progress) if review]
+            reviews = [review for review in reviews if review.get('issues')]
                     
             if not reviews:
                 logger.info(f"No se encontraron problemas en los archivos del commit")
@@ -93,8 +247,12 @@ class CodeReviewer(BaseModule):
             logger.warning(f"Evento sin ruta de archivo, ignorando")
             return None
             
-        # Revisar el archivo
-        review = self._review_file(file_path, event_data.get('repo_path', '.'), event_data.get('content', ''))
+        # Revisar el archivo (solo las líneas modificadas si el evento incluye su diff)
+        content = event_data.get('content', '')
+        _, scopes = self._event_files(event_data)
+        review = self._review_file(file_path, event_data.get('repo_path', '.'), content,
+                                   on_progress=on_progress, scope=scopes.get(file_path))
+        review = self._exclude_baseline(review, content)
         if not review or not review.get('issues'):
             logger.info(f"No se encontraron problemas en {file_path}")
             return {
@@ -114,7 +272,411 @@ class CodeReviewer(BaseModule):
             'summary': f'Se encontraron {len(review.get("issues", []))} problemas en {file_path}'
         }
     
-    def _review_file(self, file_path, repo_path, content=None, event_type='modified'):
+    def refresh_similar_result(self, result, event_data):
+        """
+        Reutiliza la revisión con IA de un evento parecido, con las reglas locales aplicadas a este evento.
+        
+        Un cambio parecido puede añadir un secreto o un problema nuevo, así que las reglas
+        locales y el escáner de secretos se vuelven a aplicar a las líneas modificadas del
+        evento actual y sustituyen a los problemas de reglas del resultado reutilizado;
+        de este solo se conservan los problemas de la IA.
+        
+        Args:
+            result (dict): Resultado del evento parecido, con las rutas ya adaptadas.
+            event_data (dict): Datos del evento actual.
+            
+        Returns:
+            dict: Resultado actualizado, o None si el evento no se revisa.
+        """
+        if event_data.get('type') not in ('file_change', 'commit') or not isinstance(result, dict):
+            return None
+        if event_data['type'] == 'file_change' and not event_data.get('path'):
+            return None
+            
+        contents, scopes = self._event_files(event_data)
+        fresh = {}
+        for path, content in contents:
+            scope = scopes.get(path)
+            if not content or scope is not None and scope.is_empty:
+                continue
+            review = self._exclude_baseline(self._review_file_with_rules(path, content, scope), content)
+            fresh[path] = review['issues']
+            
+        def merge(path, issues):
+            # Los problemas de reglas del evento anterior se sustituyen por los del actual
+            merged = list(fresh.pop(path, []))
+            seen = {(issue.get('line'), issue.get('message')) for issue in merged}
+            merged.extend(issue for issue in issues
+                          if not issue.get('rule') and (issue.get('line'), issue.get('message')) not in seen)
+            merged.sort(key=lambda issue: (not isinstance(issue.get('line'), int), issue.get('line') or 0))
+            return merged
+        
+        note = " (revisión con IA reutilizada de un cambio similar; reglas locales aplicadas a este cambio)"
+        if event_data['type'] == 'commit':
+            reviews = [dict(review, issues=merge(review['file'], review.get('issues', [])))
+                       for review in result.get('file_reviews', [])]
+            reviews.extend({'file': path, 'issues': issues, 'summary': self._generate_review_summary(issues)}
+                           for path, issues in list(fresh.items()))
+            reviews = [review for review in reviews if review['issues']]
+            total_issues = sum(len(review['issues']) for review in reviews)
+            refreshed = {key: value for key, value in result.items() if key != 'file_reviews'}
+            refreshed['issues_found'] = total_issues
+            if reviews:
+                refreshed['file_reviews'] = reviews
+                refreshed['summary'] = f'Se encontraron {total_issues} problemas en {len(reviews)} archivos' + note
+            else:
+                refreshed['summary'] = 'No se detectaron problemas' + note
+            return refreshed
+            
+        file_path = event_data.get('path')
+        issues = merge(file_path, result.get('issues', []))
+        refreshed = {key: value for key, value in result.items() if key != 'issues'}
+        refreshed['issues_found'] = len(issues)
+        if issues:
+            refreshed['issues'] = issues
+            refreshed['summary'] = f'Se encontraron {len(issues)} problemas en {file_path}' + note
+        else:
+            refreshed['summary'] = 'No se detectaron problemas' + note
+        return refreshed
+    
+    def _event_files(self, event_data):
+        """
+        Obtiene el contenido de los archivos de un evento y el ámbito de su diff.
+        
+        Args:
+            event_data (dict): Datos del evento ('commit' o 'file_change').
+            
+        Returns:
+            tuple: Lista de tuplas (ruta, contenido) y ámbito (DiffScope) de cada ruta que se revisa solo en parte.
+        """
+        if event_data['type'] == 'commit':
+            repo_path = event_data.get('repo_path', '.')
+            files = event_data.get('files') or [diff['file'] for diff in event_data.get('diffs', [])]
+            blobs = {diff['file']: diff.get('blob') for diff in event_data.get('diffs', [])}
+            contents = [(file_path, self._load_file_content(repo_path, file_path, event_data.get('sha'),
+                                                            blobs.get(file_path)))
+                        for file_path in files]
+            return contents, self._diff_scopes(contents, event_data.get('diffs', []))
+            
+        file_path = event_data.get('path')
+        contents = [(file_path, event_data.get('content', ''))]
+        return contents, self._diff_scopes(contents, [{'file': file_path, 'patch': event_data.get('patch')}])
+    
+    def _exclude_baseline(self, review, content):
+        """
+        Quita de una revisión los problemas que ya estaban en la línea base del repositorio.
+        
+        La huella de un problema incluye cuántos iguales le preceden en el archivo, por lo
+        que se calcula sobre la revisión con reglas del archivo completo (igual que en la
+        línea base) y no sobre los problemas de la revisión, que puede limitarse al diff.
+        Los problemas sin regla (los de la IA) no aparecen en la revisión completa y no se
+        quitan; si la revisión solo tiene problemas de la IA, el archivo no se vuelve a revisar.
+        
+        Args:
+            review (dict): Resultado de la revisión (puede ser None).
+            content (str): Contenido revisado.
+            
+        Returns:
+            dict: Revisión con solo los problemas nuevos y, si se quitó alguno, su número en 'baseline_issues'.
+        """
+        store = get_baseline_store() if self.use_baseline else None
+        if store is None or not review or not review.get('issues'):
+            return review
+            
+        if not any(issue.get('rule') for issue in review['issues']):
+            return review
+            
+        by_location = {}
+        for rule, message, line_num, issue_hash in self._rule_fingerprints(review['file'], content):
+            by_location.setdefault((rule, message, line_num), []).append(issue_hash)
+        hashes = []
+        for issue in review['issues']:
+            candidates = by_location.get((issue.get('rule'), issue.get('message'), issue.get('line')))
+            hashes.append(candidates.pop(0) if candidates and issue.get('rule') else None)
+        
+        known = store.known(issue_hash for issue_hash in hashes if issue_hash)
+        if not known:
+            return review
+        issues = [issue for issue, issue_hash in zip(review['issues'], hashes) if issue_hash not in known]
+        logger.debug(f"{len(review['issues']) - len(issues)} problemas de {review['file']} ya estaban en la línea base")
+        return dict(review, issues=issues, baseline_issues=len(review['issues']) - len(issues))
+    
+    def _rule_fingerprints(self, file_path, content):
+        """
+        Obtiene los problemas de la revisión con reglas del archivo completo y su huella de línea base.
+        
+        El resultado se guarda en la caché de revisiones por blob y ruta, de modo que un
+        mismo archivo no se vuelve a revisar completo en cada evento.
+        
+        Args:
+            file_path (str): Ruta del archivo relativa al repositorio.
+            content (str): Contenido del archivo.
+            
+        Returns:
+            list: Listas [regla, mensaje, línea, huella] de cada problema.
+        """
+        cache_key = hashlib.sha256('|'.join([
+            'fingerprints', blob_id(content), file_path, self.rule_pack.version, self.secret_scanner.version,
+            str(FINGERPRINT_VERSION), self.config_hash
+        ]).encode('utf-8')).hexdigest()
+        if self.review_cache is not None:
+            cached = self.review_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+        issues = self._review_file_with_rules(file_path, content)['issues']
+        found = [[issue.get('rule') or issue.get('type'), issue.get('message'), issue.get('line'), issue_hash]
+                 for issue, issue_hash in zip(issues, issue_fingerprints(file_path, content, issues))]
+        self._store_review(cache_key, found)
+        return found
+    
+    def _load_file_content(self, repo_path, file_path, sha=None, blob=None):
+        """
+        Obtiene el contenido de un archivo en un commit o, si no se indica, del disco.
+        
+        El contenido de un commit se lee del blob sin modificar (`git show` quita el salto
+        de línea final), para que coincida con el del disco y con el de la línea base.
+        
+        Args:
+            repo_path (str): Ruta base del repositorio.
+            file_path (str): Ruta del archivo relativa al repositorio.
+            sha (str, opcional): Commit del que leer el archivo.
+            blob (str, opcional): Blob del archivo en el commit, si el evento lo incluye.
+            
+        Returns:
+            str: Contenido del archivo o None si no se puede leer.
+        """
+        try:
+            if blob:
+                import git
+                return git.Repo(repo_path).git.get_object_data(blob)[3].decode('utf-8')
+            if sha:
+                import git
+                return git.Repo(repo_path).commit(sha).tree[file_path].data_stream.read().decode('utf-8')
+            with open(os.path.join(repo_path, file_path), 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            logger.debug(f"No se pudo leer el contenido de {file_path}: {e}")
+            return None
+    
+    def _diff_scopes(self, contents, diffs):
+        """
+        Calcula el ámbito de revisión de cada archivo a partir de su diff.
+        
+        Los archivos sin diff, o con un diff recortado por tamaño, se revisan completos.
+        
+        Args:
+            contents (list): Lista de tuplas (ruta, contenido).
+            diffs (list): Diffs del evento ('file', 'patch' y, opcionalmente, 'patch_truncated').
+            
+        Returns:
+            dict: Ámbito (DiffScope) de cada ruta que se revisa solo en parte.
+        """
+        if not self.diff_scoped:
+            return {}
+            
+        patches = {diff['file']: diff for diff in diffs if diff.get('patch') and not diff.get('patch_truncated')}
+        scopes = {}
+        for path, content in contents:
+            if content and path in patches:
+                file_ext = os.path.splitext(path)[1].lower()
+                scopes[path] = DiffScope.from_diff(patches[path]['patch'], content, file_ext)
+        return scopes
+    
+    def _review_files(self, contents, repo_path, scopes=None, on_progress=None):
+        """
+        Revisa varios archivos, agrupando los pequeños en prompts compartidos cuando se usa IA.
+        
+        Args:
+            contents (list): Lista de tuplas (ruta, contenido).
+            repo_path (str): Ruta base del repositorio.
+            scopes (dict, opcional): Ámbito del diff de los archivos que se revisan solo en parte.
+            on_progress (callable, opcional): Función que recibe el texto parcial con los problemas
+                de todos los archivos revisados hasta el momento.
+            
+        Returns:
+            list: Revisiones de cada archivo.
+        """
+        scopes = scopes or {}
+        contents = [(path, content) for path, content in contents if content]
+        progress = self._progress_by_file(on_progress)
+        if not (self.packed_review and self.use_ai and getattr(self, 'llm', None)):
+            return [self._review_file(path, repo_path, content, on_progress=progress(path), scope=scopes.get(path))
+                    for path, content in contents]
+            
+        # Los archivos ya revisados, o repetidos en el mismo commit, no entran en los lotes enviados a la IA
+        reviews, keys, pending, duplicates, first_path = {}, {}, [], [], {}
+        for path, content in contents:
+            keys[path] = self._review_key(path, content, scopes.get(path))
+            if keys[path] in first_path:
+                duplicates.append((path, first_path[keys[path]]))
+                continue
+            first_path[keys[path]] = path
+            reviews[path] = self._cached_review(keys[path], path)
+            if reviews[path] is None:
+                pending.append((path, content))
+            
+        for batch in self._pack_files(pending, scopes):
+            if len(batch) == 1:
+                path, content = batch[0]
+                reviews[path] = self._review_file(path, repo_path, content, on_progress=progress(path),
+                                                  scope=scopes.get(path), cache_key=keys[path])
+            else:
+                for review in self._review_batch_with_ai(batch, repo_path, scopes, keys):
+                    reviews[review['file']] = review
+                    if on_progress is not None and review.get('issues'):
+                        progress(review['file'])(self._format_partial_issues(review['file'], review['issues']))
+        for path, original in duplicates:
+            reviews[path] = dict(reviews[original], file=path) if reviews[original] else None
+        return [reviews[path] for path, _ in contents]
+    
+    def _progress_by_file(self, on_progress):
+        """
+        Combina en un solo texto los resultados parciales de varios archivos.
+        
+        Args:
+            on_progress (callable): Función que recibe el texto parcial, o None.
+            
+        Returns:
+            callable: Recibe una ruta y devuelve la función a la que enviar el texto parcial de
+                ese archivo (None si no se piden resultados parciales).
+        """
+        if on_progress is None:
+            return lambda path: None
+        texts = {}
+        lock = threading.Lock()
+        
+        def for_file(path):
+            def update(text):
+                with lock:
+                    texts[path] = text
+                    on_progress('\n\n'.join(texts.values()))
+            return update
+        return for_file
+    
+    def _pack_files(self, contents, scopes=None):
+        """
+        Agrupa archivos en lotes cuyo tamaño total no supera el presupuesto de tokens.
+        
+        Los archivos que ocupan más de la mitad del presupuesto se revisan por separado.
+        
+        Args:
+            contents (list): Lista de tuplas (ruta, contenido).
+            scopes (dict, opcional): Ámbito del diff de los archivos que se revisan solo en parte.
+            
+        Returns:
+            list: Lotes de tuplas (ruta, contenido).
+        """
+        scopes = scopes or {}
+        budget = self.prompt_builder.budget
+        batches = []
+        current, used = [], 0
+        
+        for path, content in contents:
+            cost = estimate_tokens(self._review_content(content, scopes.get(path)))
+            if cost > budget // 2:
+                batches.append([(path, content)])
+                continue
+            if current and used + cost > budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append((path, content))
+            used += cost
+            
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _review_batch_with_ai(self, batch, repo_path, scopes=None, keys=None):
+        """
+        Revisa varios archivos con una sola petición a la IA y separa el resultado por archivo.
+        
+        Los archivos que no aparecen en la respuesta, o todos si la respuesta no se
+        puede interpretar, se revisan de nuevo de forma individual.
+        
+        Args:
+            batch (list): Lista de tuplas (ruta, contenido).
+            repo_path (str): Ruta base del repositorio.
+            scopes (dict, opcional): Ámbito del diff de los archivos que se revisan solo en parte.
+            keys (dict, opcional): Clave de caché de cada archivo, ya consultada.
+            
+        Returns:
+            list: Revisiones de cada archivo del lote.
+        """
+        scopes = scopes or {}
+        keys = keys or {}
+        sections = []
+        for path, content in batch:
+            file_type = self._get_file_type(os.path.splitext(path)[1].lower())
+            scoped = " (solo las líneas modificadas y su bloque, con su número de línea)" if path in scopes else ""
+            sections.append(f"### Archivo: {path}{scoped}\n```{file_type}\n"
+                            f"{self._review_content(content, scopes.get(path))}\n```")
+        files_text = "\n\n".join(sections)
+        
+        prompt = f"""
+            Realiza una revisión de código para cada uno de los siguientes archivos:
+            
+            {files_text}
+            
+            {"En los archivos marcados, revisa únicamente el código mostrado y usa los números de línea indicados." if any(path in scopes for path, _ in batch) else ""}
+            
+            Tipos de revisión solicitados: {', '.join(self.review_types)}
+            Sugerir correcciones: {'Sí' if self.suggest_fixes else 'No'}
+            
+            Por favor, proporciona una revisión por archivo en el siguiente formato JSON,
+            usando como clave la ruta exacta de cada archivo:
+            
+            ```json
+            {{
+                "files": {{
+                    "ruta/del/archivo": {{
+                        "issues": [
+                            {{
+                                "line": número_de_línea,
+                                "severity": "critical|high|medium|low|info",
+                                "type": "quality|security|performance",
+                                "message": "Descripción del problema",
+                                "suggestion": "Sugerencia de corrección (si aplica)"
+                            }}
+                        ],
+                        "summary": "Resumen de la revisión del archivo"
+                    }}
+                }},
+                "confidence": confianza_en_la_revisión_entre_0_y_1
+            }}
+            ```
+            
+            Responde SOLO con el JSON, sin texto adicional.
+            """
+        
+        per_file = {}
+        try:
+            security_issue = any(self._has_security_issues(path, content, scopes.get(path)) for path, content in batch)
+            per_file = self.router.invoke_structured(prompt, BATCH_REVIEW_SCHEMA, [path for path, _ in batch],
+                                                     security_issue)['files']
+        except Exception as e:
+            logger.error(f"Error en la revisión agrupada de {len(batch)} archivos, se revisarán por separado: {e}")
+        
+        reviews = []
+        for path, content in batch:
+            result = per_file.get(path)
+            if not isinstance(result, dict):
+                reviews.append(self._review_file(path, repo_path, content, scope=scopes.get(path),
+                                                 cache_key=keys.get(path)))
+                continue
+            review = {
+                'file': path,
+                'issues': self._filter_to_scope(result['issues'], scopes.get(path)),
+                'summary': result['summary']
+            }
+            self._store_review(keys.get(path), review)
+            reviews.append(review)
+        
+        logger.info(f"Revisión agrupada: {len(batch)} archivos en una sola petición")
+        return reviews
+    
+    def _review_file(self, file_path, repo_path, content=None, event_type='modified', on_progress=None, scope=None,
+                     cache_key=None):
         """
         Revisa un archivo y genera sugerencias.
         
@@ -123,6 +685,9 @@ class CodeReviewer(BaseModule):
             repo_path (str): Ruta base del repositorio.
             content (str, opcional): Contenido del archivo. Si es None, se intentará leer del disco.
             event_type (str): Tipo de evento (created, modified, deleted).
+            on_progress (callable, opcional): Función que recibe los resultados parciales de la IA.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
+            cache_key (str, opcional): Clave de caché ya consultada sin éxito; evita repetir la consulta.
             
         Returns:
             dict: Resultado de la revisión.
@@ -130,29 +695,110 @@ class CodeReviewer(BaseModule):
         if not content or event_type == 'deleted':
             return None
             
+        # Un cambio sin líneas en el lado nuevo (renombrado, cambio de permisos) no tiene nada que revisar
+        if scope is not None and scope.is_empty:
+            return None
+            
+        # Un blob ya revisado con las mismas reglas y configuración no se vuelve a revisar
+        if cache_key is None:
+            cache_key = self._review_key(file_path, content, scope)
+            cached = self._cached_review(cache_key, file_path)
+            if cached is not None:
+                return cached
+            
         # Si está habilitada la IA, usarla para la revisión
         if self.use_ai and hasattr(self, 'llm') and self.llm:
-            return self._review_file_with_ai(file_path, content, event_type)
+            return self._review_file_with_ai(file_path, content, event_type, on_progress, scope, cache_key)
+            
+        review = self._review_file_with_rules(file_path, content, scope)
+        self._store_review(cache_key, review)
+        return review
+        
+    def _review_key(self, file_path, content, scope=None):
+        """
+        Calcula la clave de caché de una revisión.
+        
+        Combina el blob del contenido, la extensión, la versión de las reglas, la
+        configuración del módulo, si se revisa con IA o con reglas y el ámbito del diff.
+        
+        Args:
+            file_path (str): Ruta del archivo.
+            content (str): Contenido del archivo.
+            scope (DiffScope, opcional): Ámbito del diff.
+            
+        Returns:
+            str: Clave hexadecimal.
+        """
+        parts = [
+            blob_id(content),
+            os.path.splitext(file_path)[1].lower(),
+            self.rule_pack.version,
+            self.secret_scanner.version,
+            str(FINGERPRINT_VERSION),
+            self.config_hash,
+            'ai' if self.use_ai and getattr(self, 'llm', None) else 'rules',
+            repr((scope.changed_lines, scope.ranges)) if scope is not None else ''
+        ]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+    
+    def _cached_review(self, cache_key, file_path):
+        """
+        Busca una revisión en la caché.
+        
+        Args:
+            cache_key (str): Clave de la revisión.
+            file_path (str): Ruta del archivo (el mismo blob puede estar en otra ruta).
+            
+        Returns:
+            dict: Revisión almacenada para esta ruta, o None si no existe.
+        """
+        if self.review_cache is None:
+            return None
+        review = self.review_cache.get(cache_key)
+        if review is None:
+            return None
+        logger.debug(f"Revisión de {file_path} obtenida de la caché")
+        review['file'] = file_path
+        return review
+    
+    def _store_review(self, cache_key, review):
+        """
+        Guarda una revisión en la caché.
+        
+        Args:
+            cache_key (str): Clave de la revisión, o None para no guardarla.
+            review (dict): Resultado de la revisión.
+        """
+        if self.review_cache is None or cache_key is None or not review:
+            return
+        try:
+            self.review_cache.set(cache_key, review)
+        except Exception as e:
+            logger.error(f"Error al guardar la revisión en la caché: {e}")
+        
+    def _review_file_with_rules(self, file_path, content, scope=None):
+        """
+        Revisa un archivo con las reglas locales, sin usar IA.
+        
+        Args:
+            file_path (str): Ruta del archivo a revisar.
+            content (str): Contenido del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
             
-        # Revisión basada en reglas si no se usa IA
+        Returns:
+            dict: Resultado de la revisión.
+        """
         file_ext = os.path.splitext(file_path)[1].lower()
         
         issues = []
+        skipped = {'rules': [], 'lines': 0}
         
-        # Revisión de calidad
+        # Revisión de calidad estructural (longitud de líneas y funciones, nombres en Python)
         if 'quality' in self.review_types:
-            quality_issues = self._check_code_quality(content, file_ext)
-            issues.extend(quality_issues)
-            
-        # Revisión de seguridad
-        if 'security' in self.review_types:
-            security_issues = self._check_security_issues(content, file_ext)
-            issues.extend(security_issues)
+            issues.extend(self._check_code_structure(content, file_ext, scope))
             
-        # Revisión de rendimiento
-        if 'performance' in self.review_types:
-            performance_issues = self._check_performance_issues(content, file_ext)
-            issues.extend(performance_issues)
+        # Reglas de calidad, seguridad y rendimiento en un solo recorrido
+        issues.extend(self._scan_rules(content, file_ext, self.review_types, scope, skipped))
             
         # Filtrar por severidad
         severity_levels = {
@@ -166,13 +812,23 @@ class CodeReviewer(BaseModule):
         filtered_issues = [issue for issue in issues 
                           if severity_levels.get(issue['severity'], 0) >= threshold]
         
-        return {
+        review = {
             'file': file_path,
             'issues': filtered_issues,
             'summary': self._generate_review_summary(filtered_issues)
         }
         
-    def _review_file_with_ai(self, file_path, content, event_type='modified'):
+        # Marcar la revisión como parcial si alguna regla no terminó o se omitieron líneas
+        if skipped['rules'] or skipped['lines']:
+            review['skipped'] = skipped
+            review['summary'] += (f" Revisión parcial: {len(skipped['rules'])} reglas sin terminar por tiempo"
+                                  f" y {skipped['lines']} líneas demasiado largas sin analizar.")
+            if skipped['rules']:
+                logger.warning(f"Reglas interrumpidas por tiempo en {file_path}: {', '.join(skipped['rules'])}")
+        return review
+        
+    def _review_file_with_ai(self, file_path, content, event_type='modified', on_progress=None, scope=None,
+                             cache_key=None):
         """
         Revisa un archivo utilizando IA y genera sugerencias.
         
@@ -180,6 +836,9 @@ class CodeReviewer(BaseModule):
             file_path (str): Ruta del archivo a revisar.
             content (str): Contenido del archivo.
             event_type (str): Tipo de evento (created, modified, deleted).
+            on_progress (callable, opcional): Función que recibe los problemas a medida que llegan.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se envían sus líneas.
+            cache_key (str, opcional): Clave con la que guardar la revisión en la caché.
             
         Returns:
             dict: Resultado de la revisión con IA.
@@ -189,14 +848,23 @@ class CodeReviewer(BaseModule):
             file_ext = os.path.splitext(file_path)[1].lower()
             file_type = self._get_file_type(file_ext)
             
-            # Limitar el contenido si es muy grande
-            max_content_length = 10000  # Aproximadamente 10KB
-            if len(content) > max_content_length:
-                content_preview = content[:max_content_length//2] + "\n...\n" + content[-max_content_length//2:]
-                content_truncated = True
+            # Un archivo completo que no cabe en el prompt se revisa por fragmentos en paralelo
+            if scope is None and self.chunked_review and estimate_tokens(content) > self.prompt_builder.budget:
+                chunks = split_code(content, file_ext, self.prompt_builder.budget)
+                if len(chunks) <= self.max_review_chunks:
+                    return self._review_chunks_with_ai(file_path, content, chunks, event_type, on_progress,
+                                                       cache_key)
+                logger.info(f"{file_path} ocupa {len(chunks)} fragmentos (máximo {self.max_review_chunks}): "
+                            f"se revisará solo un extracto")
+            
+            # Ajustar el contenido al presupuesto de tokens del modelo
+            if scope is None:
+                content_preview, content_truncated = self.prompt_builder.fit_file(content)
             else:
-                content_preview = content
-                content_truncated = False
+                content_preview = self._review_content(content, scope)
+                content_truncated = True
+                if estimate_tokens(content_preview) > self.prompt_builder.budget:
+                    content_preview, _ = self.prompt_builder.fit_file(content, changed_lines=scope.changed_lines)
             
             # Crear el prompt para la IA
             prompt = f"""
@@ -206,7 +874,7 @@ class CodeReviewer(BaseModule):
             Tipo: {file_type}
             Evento: {event_type}
             
-            {f"NOTA: El contenido es muy grande y ha sido truncado." if content_truncated else ""}
+            {f"NOTA: Se muestran solo las líneas modificadas y el bloque que las contiene, con su número de línea. Revisa únicamente ese código." if scope is not None else f"NOTA: El contenido es muy grande; se muestran solo las partes más relevantes con su número de línea." if content_truncated else ""}
             
             Contenido:
             ```{file_type}
@@ -229,60 +897,307 @@ class CodeReviewer(BaseModule):
                         "suggestion": "Sugerencia de corrección (si aplica)"
                     }}
                 ],
-                "summary": "Resumen general de la revisión"
+                "summary": "Resumen general de la revisión",
+                "confidence": confianza_en_la_revisión_entre_0_y_1
             }}
             
             Responde SOLO con el JSON, sin texto adicional.
             """
             
-            # Obtener respuesta de la IA
-            response = self.llm.invoke(prompt)
+            # Obtener respuesta de la IA (en streaming si se piden resultados parciales)
+            security_issue = self._has_security_issues(file_path, content, scope)
+            if on_progress is not None and hasattr(self.llm, 'stream'):
+                result = self.router.stream_structured(
+                    REVIEW_SCHEMA, lambda llm: self._stream_review(llm, prompt, file_path, on_progress),
+                    [file_path], security_issue
+                )
+            else:
+                result = self.router.invoke_structured(prompt, REVIEW_SCHEMA, [file_path], security_issue)
             
-            # Intentar parsear la respuesta como JSON
-            try:
-                import json
-                import re
-                
-                # Extraer JSON de la respuesta
-                json_match = re.search(r'```json\n(.*?)\n```', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    json_str = response
-                
-                # Limpiar la cadena JSON
-                json_str = re.sub(r'^```.*\n', '', json_str)
-                json_str = re.sub(r'\n```$', '', json_str)
-                
-                result = json.loads(json_str)
-                
-                # Verificar y formatear el resultado
-                if 'issues' not in result:
-                    result['issues'] = []
-                if 'summary' not in result:
-                    result['summary'] = "No se encontraron problemas significativos."
-                    
-                # Añadir el archivo al resultado
-                result['file'] = file_path
-                
-                return result
+            # Añadir el archivo al resultado
+            result['issues'] = self._filter_to_scope(result['issues'], scope)
+            result['file'] = file_path
+            self._store_review(cache_key, result)
+            return result
                 
+        except Exception as e:
+            logger.error(f"Error al revisar archivo con IA: {e}")
+            # Fallback a la revisión basada en reglas
+            return self._review_file_with_rules(file_path, content, scope)
+            
+    def _review_chunks_with_ai(self, file_path, content, chunks, event_type='modified', on_progress=None,
+                               cache_key=None):
+        """
+        Revisa un archivo grande por fragmentos en paralelo y combina los resultados.
+        
+        Cada fragmento es una petición independiente, de modo que la latencia total es
+        la del fragmento más lento y no la suma de todos. Los fragmentos cuya revisión
+        falla se cubren con las reglas locales.
+        
+        Args:
+            file_path (str): Ruta del archivo a revisar.
+            content (str): Contenido del archivo.
+            chunks (list): Rangos (primera, última línea) de cada fragmento.
+            event_type (str): Tipo de evento (created, modified, deleted).
+            on_progress (callable, opcional): Función que recibe los problemas a medida que termina cada fragmento.
+            cache_key (str, opcional): Clave con la que guardar la revisión en la caché.
+            
+        Returns:
+            dict: Resultado de la revisión del archivo completo.
+        """
+        index = get_source_index(content)
+        security_issue = self._has_security_issues(file_path, content)
+        # Los hilos no heredan la prioridad ni el módulo al que se atribuyen las llamadas
+        priority, module = current_priority(), current_module()
+        futures = {
+            self._chunk_executor.submit(self._review_chunk, file_path, event_type, index, chunk, position, len(chunks),
+                                        security_issue, priority, module): chunk
+            for position, chunk in enumerate(chunks, 1)
+        }
+        
+        results, failed = {}, []
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                results[chunk] = future.result()
             except Exception as e:
-                logger.error(f"Error al parsear la respuesta de la IA: {e}")
-                logger.debug(f"Respuesta recibida: {response}")
+                logger.error(f"Error al revisar las líneas {chunk[0]}-{chunk[1]} de {file_path} con IA: {e}")
+                failed.append(chunk)
+                continue
+            if on_progress is not None:
+                on_progress(self._format_partial_issues(file_path, self._merge_chunk_issues(chunks, results)))
                 
-                # Fallback: crear un resultado básico
-                return {
-                    'file': file_path,
-                    'issues': [],
-                    'summary': "Error al procesar la revisión con IA. Se recomienda revisar manualmente."
-                }
+        issues = self._merge_chunk_issues(chunks, results)
+        if failed:
+            # Las partes que la IA no pudo revisar se cubren con las reglas locales
+            rule_issues = self._review_file_with_rules(file_path, content)['issues']
+            issues.extend(issue for issue in rule_issues
+                          if any(start <= issue['line'] <= end for start, end in failed))
+            issues.sort(key=lambda issue: (issue['line'] is None, issue['line'] or 0))
+            
+        summary = f"{self._generate_review_summary(issues)} Archivo revisado en {len(chunks)} fragmentos."
+        if failed:
+            summary += f" {len(failed)} fragmentos revisados con reglas locales por un error de la IA."
+        review = {'file': file_path, 'issues': issues, 'summary': summary, 'chunks': len(chunks)}
+        if not failed:
+            self._store_review(cache_key, review)
+        logger.info(f"Revisión por fragmentos de {file_path}: {len(chunks)} fragmentos, {len(issues)} problemas")
+        return review
+    
+    def _review_chunk(self, file_path, event_type, index, chunk, position, total, security_issue, priority, module):
+        """
+        Revisa un fragmento de un archivo con IA.
+        
+        Args:
+            file_path (str): Ruta del archivo.
+            event_type (str): Tipo de evento (created, modified, deleted).
+            index (SourceIndex): Índice de líneas del contenido.
+            chunk (tuple): Rango (primera, última línea) del fragmento.
+            position (int): Número del fragmento (desde 1).
+            total (int): Número de fragmentos del archivo.
+            security_issue (bool): True si las reglas locales encontraron un problema de seguridad.
+            priority (int): Prioridad de la petición original.
+            module (str): Módulo al que se atribuye la petición en las métricas.
+            
+        Returns:
+            dict: Revisión del fragmento ('issues' y 'summary').
+        """
+        start, end = chunk
+        file_type = self._get_file_type(os.path.splitext(file_path)[1].lower())
+        numbered = '\n'.join(f"{line_num:>5}| {line}" for line_num, line in index.lines(start, end))
+        prompt = f"""
+            Realiza una revisión de código del siguiente fragmento de un archivo:
+            
+            Archivo: {file_path}
+            Tipo: {file_type}
+            Evento: {event_type}
+            
+            NOTA: Es el fragmento {position} de {total} (líneas {start}-{end}), con su número de línea.
+            El resto del archivo se revisa por separado: revisa únicamente este código y usa los números de línea indicados.
+            
+            Contenido:
+            ```{file_type}
+            {numbered}
+            ```
+            
+            Tipos de revisión solicitados: {', '.join(self.review_types)}
+            Sugerir correcciones: {'Sí' if self.suggest_fixes else 'No'}
+            
+            Por favor, proporciona una revisión detallada en el siguiente formato JSON:
+            
+            ```json
+            {{
+                "issues": [
+                    {{
+                        "line": número_de_línea,
+                        "severity": "critical|high|medium|low|info",
+                        "type": "quality|security|performance",
+                        "message": "Descripción del problema",
+                        "suggestion": "Sugerencia de corrección (si aplica)"
+                    }}
+                ],
+                "summary": "Resumen de la revisión del fragmento",
+                "confidence": confianza_en_la_revisión_entre_0_y_1
+            }}
+            
+            Responde SOLO con el JSON, sin texto adicional.
+            """
+        with request_priority(priority), llm_module(module):
+            return self.router.invoke_structured(prompt, REVIEW_SCHEMA, [file_path], security_issue)
+    
+    def _merge_chunk_issues(self, chunks, results):
+        """
+        Combina los problemas de los fragmentos revisados: numeración, duplicados y orden.
+        
+        Si la IA numera las líneas desde el inicio del fragmento en lugar de usar los
+        números indicados, se convierten a líneas del archivo; los problemas que quedan
+        fuera de su fragmento se descartan. Un mismo problema en la misma línea (o sin
+        línea, como los comentarios generales repetidos en cada fragmento) se informa una vez.
+        
+        Args:
+            chunks (list): Rangos (primera, última línea) de cada fragmento.
+            results (dict): Revisión de cada fragmento terminado, por rango.
+            
+        Returns:
+            list: Problemas del archivo ordenados por línea.
+        """
+        issues, seen = [], set()
+        for start, end in chunks:
+            for issue in (results.get((start, end)) or {}).get('issues', []):
+                try:
+                    line_num = int(issue.get('line'))
+                except (TypeError, ValueError):
+                    line_num = None
+                if line_num is not None and not start <= line_num <= end:
+                    if not 1 <= line_num <= end - start + 1:
+                        continue
+                    line_num += start - 1
+                key = (line_num, ' '.join(str(issue.get('message', '')).lower().split()))
+                if key in seen:
+                    continue
+                seen.add(key)
+                issues.append(dict(issue, line=line_num))
+        issues.sort(key=lambda issue: (issue['line'] is None, issue['line'] or 0))
+        return issues
+    
+    def _review_content(self, content, scope):
+        """
+        Devuelve el código de un archivo que se envía a la IA.
+        
+        Args:
+            content (str): Contenido del archivo.
+            scope (DiffScope): Ámbito del diff, o None para enviar el archivo completo.
+            
+        Returns:
+            str: Contenido completo o líneas del ámbito con su número de línea.
+        """
+        if scope is None:
+            return content
+        return scope.render(get_source_index(content))
+    
+    def _filter_to_scope(self, issues, scope):
+        """
+        Descarta los problemas que la IA sitúa fuera del ámbito del diff.
+        
+        Args:
+            issues (list): Problemas de la revisión.
+            scope (DiffScope): Ámbito del diff, o None si se revisó el archivo completo.
+            
+        Returns:
+            list: Problemas sin línea o con la línea dentro del ámbito.
+        """
+        if scope is None:
+            return issues
+        kept = []
+        for issue in issues:
+            try:
+                line_num = int(issue.get('line'))
+            except (TypeError, ValueError):
+                kept.append(issue)
+                continue
+            if scope.contains(line_num):
+                kept.append(issue)
+        return kept
+            
+    def _has_security_issues(self, file_path, content, scope=None):
+        """
+        Indica si las reglas locales encuentran algún problema de seguridad en un archivo.
+        
+        Se usa para decidir si la revisión con IA debe ir directamente al modelo principal.
+        
+        Args:
+            file_path (str): Ruta del archivo.
+            content (str): Contenido del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
+            
+        Returns:
+            bool: True si hay problemas de seguridad.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        return bool(self._check_security_issues(content, file_ext, scope))
+        
+    def _stream_review(self, llm, prompt, file_path, on_progress):
+        """
+        Obtiene la revisión de la IA en streaming, notificando cada problema al completarse.
+        
+        Args:
+            llm (LLMClient): Cliente con el que realizar la petición.
+            prompt (str): Prompt de revisión.
+            file_path (str): Ruta del archivo revisado.
+            on_progress (callable): Función que recibe el texto parcial del resumen.
+            
+        Returns:
+            str: Respuesta completa de la IA.
+        """
+        parser = IncrementalArrayParser('issues')
+        chunks = []
+        on_progress(f"Revisando {file_path}...")
+        
+        for text in llm.stream(prompt):
+            chunks.append(text)
+            if parser.feed(text):
+                on_progress(self._format_partial_issues(file_path, parser.items))
                 
-        except Exception as e:
-            logger.error(f"Error al revisar archivo con IA: {e}")
-            # Fallback al método tradicional
-            return self._review_file(file_path, content, event_type)
+        return ''.join(chunks)
+    
+    def _format_partial_issues(self, file_path, issues):
+        """
+        Genera el texto parcial con los problemas recibidos hasta el momento.
+        
+        Args:
+            file_path (str): Ruta del archivo revisado.
+            issues (list): Problemas recibidos.
             
+        Returns:
+            str: Texto del resumen parcial.
+        """
+        lines = [f"Revisando {file_path}: {len(issues)} problemas encontrados hasta ahora"]
+        for issue in issues:
+            if isinstance(issue, dict):
+                lines.append(f"- L{issue.get('line', '?')} [{issue.get('severity', 'info')}] {issue.get('message', '')}")
+        return '\n'.join(lines)
+
+    def _generate_review_summary(self, issues):
+        """
+        Genera el resumen de una revisión basada en reglas.
+
+        Args:
+            issues (list): Problemas encontrados.
+
+        Returns:
+            str: Resumen de la revisión.
+        """
+        if not issues:
+            return "No se encontraron problemas significativos."
+
+        counts = {}
+        for issue in issues:
+            counts[issue['severity']] = counts.get(issue['severity'], 0) + 1
+        by_severity = ', '.join(f"{counts[severity]} {severity}"
+                                for severity in ('critical', 'high', 'medium', 'low', 'info')
+                                if severity in counts)
+        return f"Se encontraron {len(issues)} problemas ({by_severity})."
+
     def _get_file_type(self, file_ext):
         """
         Determina el tipo de archivo basado en su extensión.
@@ -323,213 +1238,259 @@ class CodeReviewer(BaseModule):
         
         return file_types.get(file_ext, 'text')
     
-    def _check_code_quality(self, content, file_ext):
+    def _check_code_quality(self, content, file_ext, scope=None):
         """
         Revisa problemas de calidad de código.
         
         Args:
             content (str): Contenido del archivo.
             file_ext (str): Extensión del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
+            
+        Returns:
+            list: Lista de problemas de calidad encontrados.
+        """
+        return (self._check_code_structure(content, file_ext, scope)
+                + self._scan_rules(content, file_ext, ['quality'], scope))
+    
+    def _check_code_structure(self, content, file_ext, scope=None):
+        """
+        Revisa la longitud de las líneas y, en Python y JavaScript/TypeScript, la de las funciones y los nombres de variables.
+        
+        Args:
+            content (str): Contenido del archivo.
+            file_ext (str): Extensión del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas
+                y las funciones que modifica.
             
         Returns:
             list: Lista de problemas de calidad encontrados.
         """
         issues = []
+        index = get_source_index(content)
+        ranges = scope.ranges if scope is not None else [(1, index.line_count)]
         
         # Verificar longitud de líneas (más de 100 caracteres)
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
+        for line_num, line in (item for start, end in ranges for item in index.lines(start, end)):
             if len(line) > 100:
                 issues.append({
                     'type': 'quality',
                     'severity': 'low',
-                    'line': i + 1,
+                    'line': line_num,
                     'message': f'Línea demasiado larga ({len(line)} caracteres)',
-                    'code': line[:50] + '...' if len(line) > 50 else line
+                    'code': line[:50] + '...' if len(line) > 50 else line,
+                    'rule': 'long-line'
                 })
         
-        # Verificar funciones muy largas (Python)
+        # Verificar funciones muy largas y nombres de variables (Python y JavaScript/TypeScript)
         if file_ext == '.py':
-            function_pattern = r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(.*?\):'
-            for match in re.finditer(function_pattern, content):
-                func_name = match.group(1)
-                func_start = content[:match.start()].count('\n') + 1
-                
-                # Contar líneas de la función
-                func_content = content[match.start():]
-                func_lines = 0
-                indent = None
-                
-                for line in func_content.split('\n')[1:]:  # Saltar la línea de definición
-                    if not line.strip():
-                        continue
-                        
-                    # Determinar la indentación base
-                    if indent is None:
-                        match_indent = re.match(r'^(\s+)', line)
-                        if match_indent:
-                            indent = len(match_indent.group(1))
-                        else:
-                            break
-                    
-                    # Si encontramos una línea con menor indentación, hemos salido de la función
-                    curr_indent = len(re.match(r'^(\s*)', line).group(1))
-                    if curr_indent < indent:
-                        break
-                        
-                    func_lines += 1
-                
-                if func_lines > 30:
-                    issues.append({
-                        'type': 'quality',
-                        'severity': 'medium',
-                        'line': func_start,
-                        'message': f'Función {func_name} demasiado larga ({func_lines} líneas)',
-                        'code': f'def {func_name}(...)'
-                    })
+            structure = parse_python(content)
+            if structure is not None:
+                issues.extend(self._check_parsed_structure(structure, index, file_ext, scope))
+            else:
+                issues.extend(self._check_function_length_with_regex(content, index, scope))
+        elif file_ext in JS_EXTENSIONS:
+            issues.extend(self._check_parsed_structure(parse_javascript(content), index, file_ext, scope))
         
-        # Verificar nombres de variables muy cortos
-        var_pattern = r'(?:^|\s+)([a-z][a-z0-9]?)\s*='
-        for match in re.finditer(var_pattern, content, re.MULTILINE):
-            var_name = match.group(1)
-            if len(var_name) < 2 and var_name not in ['i', 'j', 'k', 'x', 'y', 'z']:
-                line_num = content[:match.start()].count('\n') + 1
+        return issues
+    
+    def _check_parsed_structure(self, structure, index, file_ext, scope=None):
+        """
+        Revisa la longitud de las funciones y los nombres de variables a partir de la estructura del archivo.
+        
+        Args:
+            structure (PythonStructure | ScriptStructure): Estructura del archivo.
+            index (SourceIndex): Índice de líneas del contenido.
+            file_ext (str): Extensión del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan las funciones
+                que modifica y las asignaciones de sus líneas.
+            
+        Returns:
+            list: Lista de problemas de calidad encontrados.
+        """
+        issues = []
+        
+        for func in structure.functions:
+            if scope is not None and not scope.touches(func.start_line, func.end_line):
+                continue
+            if func.length > 30:
+                keyword = 'def' if file_ext == '.py' else 'function'
+                if func.is_async:
+                    keyword = f'async {keyword}'
+                issues.append({
+                    'type': 'quality',
+                    'severity': 'medium',
+                    'line': func.line,
+                    'message': f'Función {func.name} demasiado larga ({func.length} líneas)',
+                    'code': f'{keyword} {func.name}(...)',
+                    'rule': 'long-function'
+                })
+        
+        for name, line_num in structure.assignments:
+            if scope is not None and not scope.contains(line_num):
+                continue
+            if len(name) == 1 and name.islower() and name not in SHORT_NAMES_ALLOWED:
                 issues.append({
                     'type': 'quality',
                     'severity': 'low',
                     'line': line_num,
-                    'message': f'Nombre de variable demasiado corto: {var_name}',
-                    'code': content.split('\n')[line_num - 1].strip()
+                    'message': f'Nombre de variable demasiado corto: {name}',
+                    'code': index.line_text(line_num).strip(),
+                    'rule': 'short-variable-name'
                 })
         
         return issues
     
-    def _check_security_issues(self, content, file_ext):
+    def _check_function_length_with_regex(self, content, index, scope=None):
         """
-        Revisa problemas de seguridad en el código.
+        Revisa la longitud de las funciones por indentación, para código que no se puede analizar.
         
         Args:
             content (str): Contenido del archivo.
-            file_ext (str): Extensión del archivo.
+            index (SourceIndex): Índice de líneas del contenido.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan las funciones que modifica.
             
         Returns:
-            list: Lista de problemas de seguridad encontrados.
+            list: Lista de problemas de calidad encontrados.
         """
         issues = []
         
-        # Verificar hardcoded secrets
-        secret_patterns = [
-            (r'password\s*=\s*["\']([^"\']+)["\']', 'Contraseña hardcoded'),
-            (r'api[_-]?key\s*=\s*["\']([^"\']+)["\']', 'API Key hardcoded'),
-            (r'secret\s*=\s*["\']([^"\']+)["\']', 'Secret hardcoded'),
-            (r'token\s*=\s*["\']([^"\']+)["\']', 'Token hardcoded')
-        ]
-        
-        for pattern, message in secret_patterns:
-            for match in re.finditer(pattern, content, re.IGNORECASE):
-                line_num = content[:match.start()].count('\n') + 1
+        for match in FUNCTION_PATTERN.finditer(content):
+            func_name = match.group(1)
+            func_start = index.line_of(match.start())
+            
+            # Contar líneas de la función
+            func_lines = 0
+            indent = None
+            
+            for _, line in index.lines(func_start + 1):  # Saltar la línea de definición
+                if not line.strip():
+                    continue
+                    
+                # Determinar la indentación base
+                curr_indent = len(line) - len(line.lstrip())
+                if indent is None:
+                    if curr_indent:
+                        indent = curr_indent
+                    else:
+                        break
+                
+                # Si encontramos una línea con menor indentación, hemos salido de la función
+                if curr_indent < indent:
+                    break
+                    
+                func_lines += 1
+            
+            if scope is not None and not scope.touches(func_start, func_start + func_lines):
+                continue
+            if func_lines > 30:
                 issues.append({
-                    'type': 'security',
-                    'severity': 'high',
-                    'line': line_num,
-                    'message': message,
-                    'code': content.split('\n')[line_num - 1].strip()
+                    'type': 'quality',
+                    'severity': 'medium',
+                    'line': func_start,
+                    'message': f'Función {func_name} demasiado larga ({func_lines} líneas)',
+                    'code': f'def {func_name}(...)',
+                    'rule': 'long-function'
                 })
         
-        # Verificar inyección SQL (Python)
-        if file_ext == '.py':
-            sql_patterns = [
-                r'execute\s*\(\s*[f]?["\']SELECT.*?\{',
-                r'execute\s*\(\s*[f]?["\']INSERT.*?\{',
-                r'execute\s*\(\s*[f]?["\']UPDATE.*?\{',
-                r'execute\s*\(\s*[f]?["\']DELETE.*?\{'
-            ]
-            
-            for pattern in sql_patterns:
-                for match in re.finditer(pattern, content):
-                    line_num = content[:match.start()].count('\n') + 1
-                    issues.append({
-                        'type': 'security',
-                        'severity': 'high',
-                        'line': line_num,
-                        'message': 'Posible inyección SQL con f-string',
-                        'code': content.split('\n')[line_num - 1].strip()
-                    })
-        
-        # Verificar deserialización insegura (Python)
-        if file_ext == '.py':
-            unsafe_deserialize = [
-                (r'pickle\.loads?\(', 'Uso inseguro de pickle'),
-                (r'yaml\.load\((?!.*Loader=yaml\.SafeLoader)', 'Uso inseguro de yaml.load'),
-                (r'eval\(', 'Uso de eval')
-            ]
-            
-            for pattern, message in unsafe_deserialize:
-                for match in re.finditer(pattern, content):
-                    line_num = content[:match.start()].count('\n') + 1
-                    issues.append({
-                        'type': 'security',
-                        'severity': 'high',
-                        'line': line_num,
-                        'message': message,
-                        'code': content.split('\n')[line_num - 1].strip()
-                    })
-        
         return issues
     
-    def _check_performance_issues(self, content, file_ext):
+    def _check_security_issues(self, content, file_ext, scope=None):
+        """
+        Revisa problemas de seguridad en el código.
+        
+        Args:
+            content (str): Contenido del archivo.
+            file_ext (str): Extensión del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
+            
+        Returns:
+            list: Lista de problemas de seguridad encontrados.
+        """
+        return self._scan_rules(content, file_ext, ['security'], scope)
+    
+    def _check_performance_issues(self, content, file_ext, scope=None):
         """
         Revisa problemas de rendimiento en el código.
         
         Args:
             content (str): Contenido del archivo.
             file_ext (str): Extensión del archivo.
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se revisan sus líneas.
             
         Returns:
             list: Lista de problemas de rendimiento encontrados.
         """
-        issues = []
+        return self._scan_rules(content, file_ext, ['performance'], scope)
+    
+    def _scan_rules(self, content, file_ext, review_types, scope=None, skipped=None):
+        """
+        Aplica en un solo recorrido del contenido todas las reglas de los tipos indicados.
         
-        # Verificar uso ineficiente de listas (Python)
-        if file_ext == '.py':
-            # Concatenación de strings en bucle
-            string_concat = r'for\s+.*?:\s*.*?\s*\+='
-            for match in re.finditer(string_concat, content):
-                line_num = content[:match.start()].count('\n') + 1
-                issues.append({
-                    'type': 'performance',
-                    'severity': 'medium',
-                    'line': line_num,
-                    'message': 'Concatenación ineficiente de strings en bucle',
-                    'code': content.split('\n')[line_num - 1].strip()
-                })
+        Cada regla tiene un presupuesto de tiempo (`rule_time_budget_ms`) y el archivo
+        otro (`file_time_budget_ms`); las reglas que lo agotan se interrumpen.
+        
+        Args:
+            content (str): Contenido del archivo.
+            file_ext (str): Extensión del archivo.
+            review_types (list): Tipos de revisión ('quality', 'security', 'performance').
+            scope (DiffScope, opcional): Ámbito del diff; si se indica, solo se recorren sus líneas.
+            skipped (dict, opcional): Se completa con las reglas interrumpidas ('rules') y las
+                líneas omitidas por su longitud ('lines').
             
-            # Uso de + para concatenar listas
-            list_concat = r'\[.*?\]\s*\+\s*\[.*?\]'
-            for match in re.finditer(list_concat, content):
-                line_num = content[:match.start()].count('\n') + 1
+        Returns:
+            list: Lista de problemas encontrados, en orden de aparición.
+        """
+        issues = []
+        index = get_source_index(content)
+        scanner = self.rule_pack.scanner(file_ext, review_types)
+        segments = scope.segments(index) if scope is not None else [(0, content)]
+        deadline = time.perf_counter() + self.file_time_budget
+        
+        # En JavaScript/TypeScript las reglas se aplican sobre el contenido sin strings, comentarios
+        # ni expresiones regulares, para no detectar código que solo aparece dentro de un literal
+        masked = parse_javascript(content).masked if file_ext in JS_EXTENSIONS else None
+        
+        # En Python válido y en JavaScript/TypeScript, las reglas que cubre la estructura del
+        # archivo no se aplican por patrón
+        skip = AST_RULES if masked is not None or file_ext == '.py' and parse_python(content) is not None else ()
+        
+        for base, text in segments:
+            scanned = text if masked is None else masked[base:base + len(text)]
+            result = scanner.scan(scanned, self.rule_time_budget, deadline)
+            if skipped is not None:
+                skipped['rules'].extend(rule_id for rule_id in result.skipped_rules if rule_id not in skipped['rules'])
+                skipped['lines'] += result.skipped_lines
+            for rule, offset, captured in result.matches:
+                if rule.id in skip:
+                    continue
+                line_num = index.line_of(base + offset)
                 issues.append({
-                    'type': 'performance',
-                    'severity': 'low',
+                    'type': rule.type,
+                    'severity': rule.severity,
                     'line': line_num,
-                    'message': 'Uso de + para concatenar listas (usar extend)',
-                    'code': content.split('\n')[line_num - 1].strip()
+                    'message': rule.message.format(captured) if '{0}' in rule.message else rule.message,
+                    'code': index.line_text(line_num).strip(),
+                    'rule': rule.id
                 })
             
-            # Uso de list comprehension dentro de bucle
-            list_in_loop = r'for\s+.*?:\s*.*?\[.*?for\s+.*?in'
-            for match in re.finditer(list_in_loop, content):
-                line_num = content[:match.start()].count('\n') + 1
-                issues.append({
-                    'type': 'performance',
-                    'severity': 'medium',
-                    'line': line_num,
-                    'message': 'List comprehension dentro de bucle',
-                    'code': content.split('\n')[line_num - 1].strip()
-                })
+            # Secretos: prefiltro por palabras clave y confirmación con patrones y entropía
+            if 'security' in review_types:
+                for finding in self.secret_scanner.scan(text):
+                    issues.append({
+                        'type': 'security',
+                        'severity': finding.severity,
+                        'line': index.line_of(base + finding.offset),
+                        'message': finding.message,
+                        'code': finding.code,
+                        'rule': finding.rule,
+                        'entropy': finding.entropy
+                    })
         
+        issues.sort(key=lambda issue: issue['line'])
         return issues
     
+
     def _generate_fix_suggestion(self, issue, content, file_ext):
         """
         Genera una sugerencia para corregir un problema.
@@ -542,14 +1503,16 @@ class CodeReviewer(BaseModule):
         Returns:
             str: Sugerencia para corregir el problema.
         """
-        # En una implementación real, aquí se usaría IA para generar sugerencias específicas
-        # Por ahora, generamos sugerencias genéricas basadas en el tipo de problema
+        # Los problemas detectados por reglas llevan su sugerencia en la tabla de reglas
+        rule = self.rule_pack.get(issue.get('rule'))
+        if rule and rule.suggestion:
+            return rule.suggestion
         
         if issue['type'] == 'quality':
             if 'Línea demasiado larga' in issue['message']:
                 return "Divide esta línea en múltiples líneas para mejorar la legibilidad."
                 
-            if 'Función demasiado larga' in issue['message']:
+            if issue['message'].startswith('Función') and 'demasiado larga' in issue['message']:
                 return "Refactoriza esta función en múltiples funciones más pequeñas con responsabilidades específicas."
                 
             if 'Nombre de variable demasiado corto' in issue['message']:
@@ -618,5 +1581,61 @@ class CodeReviewer(BaseModule):
                 'type': 'boolean',
                 'default': False,
                 'description': 'Usar inteligencia artificial para generar sugerencias'
+            },
+            'packed_review': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'Agrupar varios archivos pequeños de un commit en una sola petición a la IA'
+            },
+            'diff_scoped': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'Revisar solo las líneas modificadas y el bloque que las contiene cuando el evento incluye el diff'
+            },
+            'rule_time_budget_ms': {
+                'type': 'integer',
+                'default': 200,
+                'description': 'Tiempo máximo de cada regla sobre un archivo; las reglas que lo superan se interrumpen'
+            },
+            'file_time_budget_ms': {
+                'type': 'integer',
+                'default': 2000,
+                'description': 'Tiempo máximo de las reglas sobre un archivo; las restantes se omiten'
+            },
+            'review_cache': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'Guardar las revisiones por blob para no revisar de nuevo un contenido ya revisado'
+            },
+            'baseline': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'No notificar los problemas que ya estaban en la línea base (main.py --baseline)'
+            },
+            'chunked_review': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'Revisar con IA los archivos que no caben en el prompt por fragmentos en paralelo, en lugar de un extracto'
+            },
+            'max_review_chunks': {
+                'type': 'integer',
+                'default': DEFAULT_MAX_REVIEW_CHUNKS,
+                'description': 'Fragmentos máximos por archivo; los archivos más grandes se revisan con un extracto'
+            },
+            'max_prompt_tokens': {
+                'type': 'integer',
+                'default': 6000,
+                'description': 'Máximo de tokens de código/diff a incluir en cada prompt de IA'
+            },
+            'model_cascade': {
+                'type': 'boolean',
+                'default': False,
+                'description': 'Usar un modelo económico para los cambios de bajo riesgo y escalar al modelo principal solo cuando haga falta'
+            },
+            'cheap_model': {
+                'type': 'string',
+                'enum': ['gpt-4o-mini', 'gpt-3.5-turbo'],
+                'default': 'gpt-4o-mini',
+                'description': 'Modelo económico para los cambios de bajo riesgo'
             }
         }
@@ -0,0 +1,520 @@
+"""
+Reglas de revisión de código basadas en patrones: tabla de reglas precompiladas y seleccionadas por extensión.
+
+Uso como perfilador en línea de comandos:
+    python -m src.modules.code_review.rule_pack archivo.py [archivo2.js ...]
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from collections import namedtuple
+from src.utils.source_index import get_source_index
+from src.utils.js_structure import JS_EXTENSIONS
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Las líneas más largas (código minificado o generado) no se analizan con las reglas
+MAX_SCAN_LINE_LENGTH = 1000
+
+# El contenido se recorre en fragmentos de este número de líneas, comprobando el tiempo
+# entre fragmento y fragmento; cada fragmento incluye unas líneas del siguiente para
+# las coincidencias que ocupan varias líneas
+SCAN_CHUNK_LINES = 500
+CHUNK_OVERLAP_LINES = 5
+
+# Metadatos de una regla. `extensions` None = todas las extensiones; `condition` recibe
+# el texto capturado por el patrón y decide si la coincidencia es un problema.
+Rule = namedtuple('Rule', ['id', 'type', 'severity', 'message', 'pattern', 'extensions',
+                           'flags', 'suggestion', 'condition'])
+Rule.__new__.__defaults__ = (None, 0, None, None)
+
+# Nombres de una letra habituales (índices y coordenadas) que no se consideran demasiado cortos
+SHORT_NAMES_ALLOWED = {'i', 'j', 'k', 'x', 'y', 'z'}
+
+# Tabla de reglas. El mensaje puede usar {0} para el primer grupo capturado por el patrón.
+RULES = [
+    # Calidad
+    Rule('short-variable-name', 'quality', 'low', 'Nombre de variable demasiado corto: {0}',
+         r'(?:^|\s+)([a-z][a-z0-9]?)\s*=', flags=re.MULTILINE,
+         suggestion='Usa nombres de variables más descriptivos que expliquen su propósito.',
+         condition=lambda name: len(name) < 2 and name not in SHORT_NAMES_ALLOWED),
+
+    # Seguridad: inyección SQL con f-strings (Python)
+    *(Rule(f'sql-injection-{verb.lower()}', 'security', 'high', 'Posible inyección SQL con f-string',
+           rf'execute\s*\(\s*[f]?["\']{verb}.*?\{{', ('.py',),
+           suggestion='Usa consultas parametrizadas o un ORM en lugar de construir consultas SQL con strings.')
+      for verb in ('SELECT', 'INSERT', 'UPDATE', 'DELETE')),
+
+    # Seguridad: deserialización y ejecución de código (Python)
+    Rule('unsafe-pickle', 'security', 'high', 'Uso inseguro de pickle',
+         r'pickle\.loads?\(', ('.py',),
+         suggestion='Usa un formato de serialización más seguro como JSON.'),
+    Rule('unsafe-yaml-load', 'security', 'high', 'Uso inseguro de yaml.load',
+         r'yaml\.load\((?!.*Loader=yaml\.SafeLoader)', ('.py',),
+         suggestion='Usa yaml.safe_load() en lugar de yaml.load().'),
+    Rule('eval-call', 'security', 'high', 'Uso de eval',
+         r'eval\(', ('.py',) + JS_EXTENSIONS,
+         suggestion='Evita usar eval() y busca alternativas más seguras.'),
+
+    # Seguridad (JavaScript/TypeScript; se aplican sin el contenido de strings y comentarios)
+    Rule('new-function', 'security', 'high', 'Creación de código con new Function',
+         r'\bnew\s+Function\s*\(', JS_EXTENSIONS,
+         suggestion='Evita construir funciones a partir de strings; usa funciones normales o un mapa de manejadores.'),
+    Rule('inner-html', 'security', 'medium', 'Asignación a innerHTML/outerHTML (posible XSS)',
+         r'\.(?:inner|outer)HTML\s*\+?=(?!=)', JS_EXTENSIONS,
+         suggestion='Usa textContent o crea los nodos con el DOM; si necesitas HTML, sanitízalo antes.'),
+    Rule('document-write', 'security', 'medium', 'Uso de document.write',
+         r'\bdocument\.write(?:ln)?\s*\(', JS_EXTENSIONS,
+         suggestion='Modifica el DOM con createElement/appendChild en lugar de document.write().'),
+
+    # Calidad (JavaScript/TypeScript)
+    Rule('debugger-statement', 'quality', 'medium', 'Sentencia debugger olvidada',
+         r'\bdebugger\b', JS_EXTENSIONS,
+         suggestion='Elimina la sentencia debugger antes de confirmar el código.'),
+    Rule('console-log', 'quality', 'low', 'Uso de console.log',
+         r'\bconsole\.log\s*\(', JS_EXTENSIONS,
+         suggestion='Usa un logger configurable o elimina la traza de depuración.'),
+
+    # Rendimiento (Python)
+    Rule('string-concat-in-loop', 'performance', 'medium', 'Concatenación ineficiente de strings en bucle',
+         r'for\s.*?:\s*(?:\S.*?)?\+=', ('.py',),
+         suggestion="Usa una lista para almacenar los strings y luego ''.join(lista) al final del bucle."),
+    Rule('list-concat', 'performance', 'low', 'Uso de + para concatenar listas (usar extend)',
+         r'\[.*?\]\s*\+\s*\[.*?\]', ('.py',),
+         suggestion='Usa lista1.extend(lista2) en lugar de lista1 + lista2.'),
+    Rule('comprehension-in-loop', 'performance', 'medium', 'List comprehension dentro de bucle',
+         r'for\s.*?:\s*(?:\S.*?)?\[.*?for\s.*?in', ('.py',),
+         suggestion='Mueve la list comprehension fuera del bucle o usa un generador.'),
+]
+
+# Resultado de aplicar un escáner: coincidencias (regla, posición, texto capturado), reglas
+# que no terminaron dentro de su presupuesto de tiempo y líneas omitidas por su longitud
+ScanResult = namedtuple('ScanResult', ['matches', 'skipped_rules', 'skipped_lines'])
+
+_REPEATS = (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT)
+_ASCII = [chr(code) for code in range(128)]
+_CATEGORY_PATTERNS = {
+    _sre_parse.CATEGORY_SPACE: re.compile(r'\s'),
+    _sre_parse.CATEGORY_NOT_SPACE: re.compile(r'\S'),
+    _sre_parse.CATEGORY_DIGIT: re.compile(r'\d'),
+    _sre_parse.CATEGORY_NOT_DIGIT: re.compile(r'\D'),
+    _sre_parse.CATEGORY_WORD: re.compile(r'\w'),
+    _sre_parse.CATEGORY_NOT_WORD: re.compile(r'\W')
+}
+
+
+def _char_set(item, flags):
+    """
+    Calcula los caracteres ASCII que acepta un elemento de un carácter de un patrón analizado.
+
+    Returns:
+        set: Caracteres aceptados, o None si el elemento no es de un solo carácter.
+    """
+    op, av = item
+    if op is _sre_parse.ANY:
+        return set(_ASCII) if flags & re.DOTALL else set(_ASCII) - {'\n'}
+    if op is _sre_parse.LITERAL:
+        return {chr(av)}
+    if op is _sre_parse.NOT_LITERAL:
+        return set(_ASCII) - {chr(av)}
+    if op is not _sre_parse.IN:
+        return None
+
+    chars, negate = set(), False
+    for sub_op, sub_av in av:
+        if sub_op is _sre_parse.NEGATE:
+            negate = True
+        elif sub_op is _sre_parse.LITERAL:
+            chars.add(chr(sub_av))
+        elif sub_op is _sre_parse.RANGE:
+            chars.update(chr(code) for code in range(sub_av[0], min(sub_av[1], 127) + 1))
+        elif sub_op is _sre_parse.CATEGORY and sub_av in _CATEGORY_PATTERNS:
+            chars.update(char for char in _ASCII if _CATEGORY_PATTERNS[sub_av].match(char))
+        else:
+            return None
+    return set(_ASCII) - chars if negate else chars
+
+
+def _has_repeat(items):
+    """Indica si una secuencia de un patrón analizado contiene un cuantificador de más de una repetición."""
+    for op, av in items:
+        if op in _REPEATS and av[1] > 1:
+            return True
+        if op is _sre_parse.SUBPATTERN and _has_repeat(av[-1]):
+            return True
+        if op is _sre_parse.BRANCH and any(_has_repeat(branch) for branch in av[1]):
+            return True
+    return False
+
+
+def _lint_sequence(items, flags, warnings):
+    """Recorre una secuencia de un patrón analizado acumulando los avisos de retroceso."""
+    # Caracteres de los cuantificadores ilimitados que pueden competir por la misma posición
+    pending = []
+    for op, av in items:
+        if op in _REPEATS:
+            low, high, sub = av
+            _lint_sequence(sub, flags, warnings)
+            if high != _sre_parse.MAXREPEAT:
+                pending = pending if low == 0 else []
+                continue
+            if _has_repeat(sub):
+                warnings.append('cuantificadores anidados: el retroceso puede ser exponencial')
+            chars = _char_set(sub[0], flags) if len(sub) == 1 else None
+            if chars and any(chars & previous for previous in pending):
+                warnings.append('cuantificadores consecutivos que aceptan los mismos caracteres: '
+                                'el retroceso puede ser polinómico')
+            if chars is None:
+                pending = pending if low == 0 else []
+            else:
+                pending = pending + [chars] if low == 0 else [chars]
+        elif op is _sre_parse.SUBPATTERN:
+            _lint_sequence(av[-1], flags, warnings)
+            pending = []
+        elif op is _sre_parse.BRANCH:
+            for branch in av[1]:
+                _lint_sequence(branch, flags, warnings)
+            pending = []
+        elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            _lint_sequence(av[1], flags, warnings)
+        elif op is not _sre_parse.AT:
+            pending = []
+
+
+def lint_pattern(pattern, flags=0):
+    """
+    Busca construcciones de un patrón propensas al retroceso catastrófico.
+
+    Detecta cuantificadores ilimitados anidados, como `(a+)+`, y cuantificadores
+    ilimitados consecutivos que aceptan los mismos caracteres, como `\\s*.*?`, que
+    con el motor de `re` multiplican los intentos en las líneas que no coinciden.
+
+    Args:
+        pattern (str): Expresión regular.
+        flags (int, opcional): Flags de compilación.
+
+    Returns:
+        list: Avisos encontrados (vacía si el patrón no tiene construcciones de riesgo).
+    """
+    try:
+        tree = _sre_parse.parse(pattern, flags)
+    except re.error:
+        return []
+    warnings = []
+    _lint_sequence(list(tree), flags, warnings)
+    return list(dict.fromkeys(warnings))
+
+
+def _scan_chunks(content):
+    """
+    Divide el contenido en los fragmentos que recorren las reglas.
+
+    Las líneas de más de MAX_SCAN_LINE_LENGTH caracteres quedan fuera de todos los fragmentos.
+
+    Args:
+        content (str): Contenido del archivo.
+
+    Returns:
+        tuple: (lista de fragmentos (posición, texto, límite), número de líneas omitidas). Solo
+            cuentan las coincidencias que empiezan antes del límite; el resto del texto es el
+            solapamiento con el fragmento siguiente.
+    """
+    starts = get_source_index(content).line_starts
+    ends = [start - 1 for start in starts[1:]] + [len(content)]
+    long_lines = [line for line, (start, end) in enumerate(zip(starts, ends))
+                  if end - start > MAX_SCAN_LINE_LENGTH]
+    if not long_lines and len(starts) <= SCAN_CHUNK_LINES:
+        return [(0, content, len(content) + 1)], 0
+
+    chunks = []
+    run_start = 0
+    for run_end in long_lines + [len(starts)]:
+        for first in range(run_start, run_end, SCAN_CHUNK_LINES):
+            limit_line = min(first + SCAN_CHUNK_LINES, run_end)
+            last = min(limit_line + CHUNK_OVERLAP_LINES, run_end) - 1
+            base = starts[first]
+            limit = starts[limit_line] - base if limit_line < len(starts) else ends[-1] - base + 1
+            chunks.append((base, content[base:ends[last]], limit))
+        run_start = run_end + 1
+    return chunks, len(long_lines)
+
+
+class RuleProfiler:
+    """Tiempo acumulado, coincidencias y ejecuciones interrumpidas de cada regla."""
+
+    def __init__(self):
+        """Inicializa el perfilador vacío."""
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, rule_id, elapsed, matches, skipped=False):
+        """
+        Registra una ejecución de una regla sobre un contenido.
+
+        Args:
+            rule_id (str): Identificador de la regla.
+            elapsed (float): Tiempo empleado en segundos.
+            matches (int): Coincidencias encontradas.
+            skipped (bool, opcional): True si la regla se interrumpió por su presupuesto de tiempo.
+        """
+        with self._lock:
+            stats = self._stats.get(rule_id)
+            if stats is None:
+                stats = self._stats[rule_id] = {'runs': 0, 'time': 0.0, 'max_time': 0.0, 'matches': 0, 'skipped': 0}
+            stats['runs'] += 1
+            stats['time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            stats['matches'] += matches
+            stats['skipped'] += int(skipped)
+
+    def get_stats(self):
+        """
+        Devuelve las estadísticas de cada regla.
+
+        Returns:
+            dict: Ejecuciones, tiempo total y máximo (segundos), coincidencias e interrupciones por regla.
+        """
+        with self._lock:
+            return {rule_id: dict(stats) for rule_id, stats in self._stats.items()}
+
+    def reset(self):
+        """Elimina las estadísticas registradas."""
+        with self._lock:
+            self._stats.clear()
+
+
+def format_profile(stats):
+    """
+    Genera un informe de texto del perfilador, ordenado por tiempo acumulado.
+
+    Args:
+        stats (dict): Resultado de `RuleProfiler.get_stats`.
+
+    Returns:
+        str: Informe en forma de tabla.
+    """
+    header = f"{'Regla':<28} {'Ejec.':>6} {'Tiempo ms':>10} {'Máx. ms':>9} {'Coincid.':>9} {'Interr.':>8}"
+    lines = [header, '-' * len(header)]
+    for rule_id, rule_stats in sorted(stats.items(), key=lambda item: item[1]['time'], reverse=True):
+        lines.append(f"{rule_id:<28} {rule_stats['runs']:>6} {rule_stats['time'] * 1000:>10.1f} "
+                     f"{rule_stats['max_time'] * 1000:>9.1f} {rule_stats['matches']:>9} {rule_stats['skipped']:>8}")
+    return '\n'.join(lines)
+
+
+class RuleScanner:
+    """
+    Reglas precompiladas que aplican a un tipo de archivo.
+
+    Cada regla se busca con su propio patrón compilado y las coincidencias de todas
+    se devuelven en un único listado ordenado por posición. Con el motor de `re`
+    esto es más rápido que una alternancia combinada: cada patrón conserva la
+    búsqueda rápida de su prefijo literal, mientras que la alternancia obliga a
+    probar todas las reglas en cada posición del archivo.
+
+    Una búsqueda de `re` no se puede interrumpir, así que el tiempo se limita
+    acotando la entrada: las líneas muy largas se omiten y el contenido se recorre
+    por fragmentos, comprobando los presupuestos entre uno y otro.
+    """
+
+    def __init__(self, rules, compiled, profiler=None):
+        """
+        Inicializa el escáner.
+
+        Args:
+            rules (list): Reglas (Rule) del escáner.
+            compiled (dict): Patrón compilado de cada regla, por identificador.
+            profiler (RuleProfiler, opcional): Perfilador en el que registrar cada ejecución.
+        """
+        self.rules = list(rules)
+        self.profiler = profiler
+        self._patterns = [(rule, compiled[rule.id]) for rule in self.rules]
+
+    def scan(self, content, rule_budget=None, deadline=None):
+        """
+        Aplica todas las reglas al contenido.
+
+        Args:
+            content (str): Contenido del archivo.
+            rule_budget (float, opcional): Tiempo máximo en segundos de cada regla.
+            deadline (float, opcional): Instante (`time.perf_counter`) a partir del cual no se
+                aplican más reglas.
+
+        Returns:
+            ScanResult: Coincidencias (regla, posición, primer grupo capturado por la regla o None)
+                en orden de posición, reglas interrumpidas u omitidas y líneas omitidas.
+        """
+        chunks, skipped_lines = _scan_chunks(content)
+        matches = []
+        skipped_rules = []
+        for order, (rule, pattern) in enumerate(self._patterns):
+            started = time.perf_counter()
+            if deadline is not None and started > deadline:
+                skipped_rules.extend(r.id for r, _ in self._patterns[order:])
+                break
+
+            count, last_end, interrupted = 0, 0, False
+            for base, text, limit in chunks:
+                for match in pattern.finditer(text):
+                    if match.start() >= limit:
+                        break
+                    if base + match.start() < last_end:
+                        continue
+                    last_end = base + match.end()
+                    captured = match.group(1) if pattern.groups else None
+                    if rule.condition is not None and not rule.condition(captured):
+                        continue
+                    matches.append((base + match.start(), order, rule, captured))
+                    count += 1
+                elapsed = time.perf_counter() - started
+                if (rule_budget is not None and elapsed > rule_budget) or \
+                        (deadline is not None and started + elapsed > deadline):
+                    interrupted = True
+                    break
+
+            if interrupted:
+                skipped_rules.append(rule.id)
+            if self.profiler is not None:
+                self.profiler.record(rule.id, time.perf_counter() - started, count, interrupted)
+
+        matches.sort(key=lambda item: item[:2])
+        return ScanResult([(rule, start, captured) for start, _, rule, captured in matches],
+                          skipped_rules, skipped_lines)
+
+
+class RulePack:
+    """
+    Registro de reglas con escáneres por extensión y tipos de revisión.
+
+    Los patrones se compilan al registrar cada regla y la selección de reglas de cada
+    combinación de extensión y tipos se calcula una sola vez; registrar una regla
+    nueva la invalida. Los patrones propensos al retroceso catastrófico generan un
+    aviso al registrarse.
+    """
+
+    def __init__(self, rules=()):
+        """
+        Inicializa el registro.
+
+        Args:
+            rules (list, opcional): Reglas iniciales.
+        """
+        self._rules = {}
+        self._compiled = {}
+        self._lint = {}
+        self._extensions = set()
+        self._scanners = {}
+        self._lock = threading.Lock()
+        self.profiler = RuleProfiler()
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule):
+        """
+        Registra (o sustituye) una regla.
+
+        Args:
+            rule (Rule): Regla a registrar.
+
+        Raises:
+            ValueError: Si el patrón no es válido.
+        """
+        try:
+            compiled = re.compile(rule.pattern, rule.flags)
+        except re.error as e:
+            raise ValueError(f"Patrón no válido en la regla {rule.id}: {e}") from e
+        warnings = lint_pattern(rule.pattern, rule.flags)
+        for warning in warnings:
+            logger.warning(f"Regla {rule.id}: {warning} ({rule.pattern})")
+        with self._lock:
+            self._rules[rule.id] = rule
+            self._compiled[rule.id] = compiled
+            self._lint[rule.id] = warnings
+            self._extensions = {ext for r in self._rules.values() for ext in (r.extensions or ())}
+            self._scanners.clear()
+
+    def get(self, rule_id):
+        """
+        Devuelve una regla por su identificador.
+
+        Args:
+            rule_id (str): Identificador de la regla.
+
+        Returns:
+            Rule: Regla, o None si no existe.
+        """
+        return self._rules.get(rule_id)
+
+    @property
+    def rules(self):
+        """Reglas registradas."""
+        return list(self._rules.values())
+
+    @property
+    def lint_warnings(self):
+        """Avisos de retroceso de las reglas que los tienen, por identificador."""
+        return {rule_id: warnings for rule_id, warnings in self._lint.items() if warnings}
+
+    @property
+    def version(self):
+        """Huella de las reglas registradas: cambia si se añade o modifica alguna."""
+        digest = hashlib.sha256()
+        for rule in sorted(self._rules.values(), key=lambda r: r.id):
+            digest.update(repr((rule.id, rule.type, rule.severity, rule.message, rule.pattern,
+                                rule.extensions, rule.flags)).encode('utf-8'))
+        return digest.hexdigest()[:12]
+
+    def scanner(self, file_ext, review_types):
+        """
+        Devuelve el escáner de las reglas que aplican a una extensión y unos tipos de revisión.
+
+        Args:
+            file_ext (str): Extensión del archivo (con el punto).
+            review_types (iterable): Tipos de revisión ('quality', 'security', 'performance').
+
+        Returns:
+            RuleScanner: Escáner compilado.
+        """
+        with self._lock:
+            # Las extensiones sin reglas propias comparten el escáner de las reglas generales
+            key = (file_ext if file_ext in self._extensions else '', tuple(sorted(review_types)))
+            scanner = self._scanners.get(key)
+            if scanner is None:
+                rules = [rule for rule in self._rules.values()
+                         if rule.type in key[1] and (rule.extensions is None or key[0] in rule.extensions)]
+                scanner = self._scanners[key] = RuleScanner(rules, self._compiled, self.profiler)
+            return scanner
+
+
+DEFAULT_RULE_PACK = RulePack(RULES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil de tiempo de las reglas de revisión sobre archivos')
+    parser.add_argument('paths', nargs='+', help='Archivos a analizar')
+    args = parser.parse_args()
+
+    for rule_id, warnings in DEFAULT_RULE_PACK.lint_warnings.items():
+        for warning in warnings:
+            print(f"Aviso en {rule_id}: {warning}")
+
+    review_types = sorted({rule.type for rule in DEFAULT_RULE_PACK.rules})
+    for path in args.paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            content = f.read()
+        result = DEFAULT_RULE_PACK.scanner(os.path.splitext(path)[1].lower(), review_types).scan(content)
+        print(f"{path}: {len(result.matches)} coincidencias, {result.skipped_lines} líneas omitidas por longitud")
+    print(format_profile(DEFAULT_RULE_PACK.profiler.get_stats()))
+
+
+if __name__ == '__main__':
+    main()
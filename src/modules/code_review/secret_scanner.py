@@ -0,0 +1,313 @@
+"""
+Detección de secretos en el código: prefiltro por palabras clave, confirmación con patrones y entropía.
+"""
+
+import re
+import math
+import hashlib
+from collections import Counter, namedtuple
+
+# Tamaño de los fragmentos en que se recorre el contenido
+CHUNK_SIZE = 1 << 20
+
+# Longitud máxima de un secreto (y del solapamiento entre fragmentos sin salto de línea)
+MAX_SECRET_LENGTH = 512
+
+# Entropía de Shannon (bits por carácter) a partir de la cual un valor parece aleatorio
+ENTROPY_THRESHOLD = 3.0
+
+# Valores más cortos no se consideran secretos
+MIN_SECRET_LENGTH = 4
+
+# Longitud máxima del fragmento de código que se muestra con cada hallazgo
+MAX_CODE_LENGTH = 120
+
+# Revisión del algoritmo de detección (forma parte de la versión): cambiarla si cambian los hallazgos
+SCANNER_REVISION = 2
+
+# Tipo de secreto. `keywords` son las subcadenas (en minúsculas) por las que empieza cualquier
+# coincidencia del patrón; `assignment` indica que el patrón captura el valor asignado y que
+# la severidad depende de su entropía.
+SecretPattern = namedtuple('SecretPattern', ['id', 'keywords', 'message', 'pattern', 'assignment'])
+
+# Asignación de un valor literal a un nombre (también como clave de JSON/YAML): password = "..."
+_ASSIGNMENT = r'(?:{names})["\']?\s*[:=]\s*["\']([^"\'\n]+)["\']'
+
+SECRET_PATTERNS = [
+    SecretPattern('hardcoded-password', ('passw',), 'Contraseña hardcoded',
+                  _ASSIGNMENT.format(names='password|passwd'), True),
+    SecretPattern('hardcoded-api-key', ('api_key', 'api-key', 'apikey'), 'API Key hardcoded',
+                  _ASSIGNMENT.format(names='api[_-]?key'), True),
+    SecretPattern('hardcoded-secret', ('secret',), 'Secret hardcoded',
+                  _ASSIGNMENT.format(names='secret'), True),
+    SecretPattern('hardcoded-token', ('token',), 'Token hardcoded',
+                  _ASSIGNMENT.format(names='token'), True),
+    SecretPattern('aws-access-key', ('akia',), 'Clave de acceso de AWS hardcoded',
+                  r'AKIA[0-9A-Z]{16}\b', False),
+    SecretPattern('github-token', ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_'), 'Token de GitHub hardcoded',
+                  r'gh[pousr]_[A-Za-z0-9]{36}\b', False),
+    SecretPattern('slack-token', ('xox',), 'Token de Slack hardcoded',
+                  r'xox[abprs]-[A-Za-z0-9-]{10,}', False),
+    SecretPattern('openai-api-key', ('sk-',), 'API Key de OpenAI hardcoded',
+                  r'sk-(?:proj-)?[A-Za-z0-9_-]{32,}', False),
+    SecretPattern('google-api-key', ('aiza',), 'API Key de Google hardcoded',
+                  r'AIza[0-9A-Za-z_-]{35}', False),
+    SecretPattern('private-key', ('-----begin',), 'Clave privada hardcoded',
+                  r'-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY-----', False),
+]
+
+# Valores de ejemplo o de plantilla que no son secretos reales
+PLACEHOLDER_PATTERN = re.compile(
+    r'^(?:\$\{.*\}|\$\w+|<.*>|\{\{.*\}\}|%\(.*\)s|\{.*\}|x+|\*+|\.+|changeme|change_me|your[_-].*'
+    r'|example.*|dummy|placeholder|none|null|true|false|todo|redacted|secret|password|token)$',
+    re.IGNORECASE
+)
+
+# Hallazgo: línea y posición (base 1 y base 0) en el contenido, valor y su entropía
+SecretFinding = namedtuple('SecretFinding', ['rule', 'severity', 'message', 'line', 'offset', 'value',
+                                             'entropy', 'code'])
+
+
+def shannon_entropy(value):
+    """
+    Calcula la entropía de Shannon de un texto.
+
+    Args:
+        value (str): Texto a medir.
+
+    Returns:
+        float: Bits por carácter (0 para un texto vacío).
+    """
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(count / length * math.log2(count / length) for count in Counter(value).values())
+
+
+def mask_secret(value):
+    """
+    Oculta un secreto dejando visibles solo sus primeros caracteres.
+
+    Args:
+        value (str): Secreto.
+
+    Returns:
+        str: Secreto enmascarado.
+    """
+    return value[:4] + '*' * min(max(len(value) - 4, 3), 12)
+
+
+class SecretScanner:
+    """
+    Detector de secretos en un solo recorrido del contenido.
+
+    Primero busca las palabras clave de todos los tipos de secreto con `str.find`
+    sobre el texto en minúsculas (una búsqueda en C por palabra, que en Python es
+    más rápida que un autómata Aho-Corasick o una alternancia de `re`). Solo en esas
+    posiciones se aplica el patrón de confirmación del tipo, y los valores asignados
+    se puntúan por entropía para distinguir los secretos reales de los de ejemplo.
+    El contenido se procesa por fragmentos, de modo que la memoria no depende del
+    tamaño del archivo.
+    """
+
+    def __init__(self, patterns=SECRET_PATTERNS, entropy_threshold=ENTROPY_THRESHOLD):
+        """
+        Inicializa el detector.
+
+        Args:
+            patterns (list, opcional): Tipos de secreto (SecretPattern).
+            entropy_threshold (float, opcional): Entropía a partir de la cual un valor asignado es de severidad alta.
+        """
+        self.patterns = list(patterns)
+        self.entropy_threshold = entropy_threshold
+        self._compiled = [re.compile(pattern.pattern, re.IGNORECASE if pattern.assignment else 0)
+                          for pattern in self.patterns]
+        self._keywords = [(keyword, position) for position, pattern in enumerate(self.patterns)
+                          for keyword in pattern.keywords]
+        self._keyword_regex = re.compile('|'.join(re.escape(keyword) for keyword, _ in self._keywords),
+                                         re.IGNORECASE)
+        self._max_keyword = max(len(keyword) for keyword, _ in self._keywords)
+
+    @property
+    def version(self):
+        """Huella de los tipos de secreto y del umbral de entropía: cambia si se modifica alguno."""
+        payload = repr((self.patterns, self.entropy_threshold, PLACEHOLDER_PATTERN.pattern, SCANNER_REVISION))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+    def scan(self, content):
+        """
+        Busca secretos en un contenido.
+
+        Args:
+            content (str): Contenido del archivo.
+
+        Returns:
+            list: Hallazgos (SecretFinding) en orden de aparición.
+        """
+        if len(content) <= CHUNK_SIZE:
+            chunks = [content]
+        else:
+            chunks = (content[start:start + CHUNK_SIZE] for start in range(0, len(content), CHUNK_SIZE))
+        return list(self.scan_chunks(chunks))
+
+    def scan_file(self, path, chunk_size=CHUNK_SIZE):
+        """
+        Busca secretos en un archivo leyéndolo por fragmentos.
+
+        Args:
+            path (str): Ruta del archivo.
+            chunk_size (int, opcional): Caracteres por fragmento.
+
+        Yields:
+            SecretFinding: Hallazgos en orden de aparición.
+        """
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            yield from self.scan_chunks(iter(lambda: f.read(chunk_size), ''))
+
+    def scan_chunks(self, chunks):
+        """
+        Busca secretos en un contenido recibido por fragmentos.
+
+        Cada bloque se corta en el último salto de línea y el resto pasa al siguiente;
+        si un fragmento no tiene saltos de línea (código minificado), se corta igualmente
+        conservando MAX_SECRET_LENGTH caracteres de solapamiento.
+
+        Args:
+            chunks (iterable): Fragmentos consecutivos del contenido.
+
+        Yields:
+            SecretFinding: Hallazgos en orden de aparición.
+        """
+        carry = ''
+        offset, line = 0, 1
+        for chunk in chunks:
+            block = carry + chunk
+            limit = block.rfind('\n') + 1
+            if not limit:
+                if len(block) <= 2 * MAX_SECRET_LENGTH:
+                    carry = block
+                    continue
+                limit = len(block) - MAX_SECRET_LENGTH
+            yield from self._scan_block(block, limit, offset, line)
+            offset += limit
+            line += block.count('\n', 0, limit)
+            carry = block[limit:]
+        if carry:
+            yield from self._scan_block(carry, len(carry), offset, line)
+
+    def _keyword_hits(self, block, limit):
+        """
+        Localiza las palabras clave de un bloque.
+
+        Args:
+            block (str): Texto del bloque.
+            limit (int): Solo se consideran las posiciones anteriores a este límite.
+
+        Returns:
+            list: Tuplas (posición, índice del tipo de secreto), ordenadas.
+        """
+        hits = set()
+        # Una palabra clave que empieza antes del límite puede terminar después
+        end = min(len(block), limit + self._max_keyword - 1)
+        if block.isascii():
+            lowered = block.lower()
+            for keyword, position in self._keywords:
+                found = lowered.find(keyword, 0, end)
+                while found != -1 and found < limit:
+                    hits.add((found, position))
+                    found = lowered.find(keyword, found + 1, end)
+        else:
+            # Con caracteres no ASCII, lower() puede cambiar la longitud y desplazar las posiciones
+            keywords = {}
+            for keyword, position in self._keywords:
+                keywords.setdefault(keyword, []).append(position)
+            for match in self._keyword_regex.finditer(block, 0, end):
+                if match.start() >= limit:
+                    break
+                for position in keywords[match.group(0).lower()]:
+                    hits.add((match.start(), position))
+        return sorted(hits)
+
+    def _scan_block(self, block, limit, offset, line):
+        """
+        Confirma las posiciones candidatas de un bloque.
+
+        Un mismo valor se informa una sola vez: si varias coincidencias se solapan (por
+        ejemplo, `api_key = "AKIA..."` es a la vez una asignación y una clave de AWS), se
+        conserva la del tipo de secreto específico frente a la asignación genérica.
+
+        Args:
+            block (str): Texto del bloque.
+            limit (int): Solo se informan los hallazgos que empiezan antes de esta posición.
+            offset (int): Posición del bloque en el contenido.
+            line (int): Número de línea en el que empieza el bloque.
+
+        Yields:
+            SecretFinding: Hallazgos del bloque.
+        """
+        counted, previous = line, 0
+        seen = set()
+        candidates = []
+        for start, position in self._keyword_hits(block, limit):
+            pattern = self.patterns[position]
+            match = self._compiled[position].match(block, start, start + MAX_SECRET_LENGTH)
+            if not match or (match.start(), pattern.id) in seen:
+                continue
+            seen.add((match.start(), pattern.id))
+
+            value = match.group(1) if pattern.assignment else match.group(0)
+            entropy = shannon_entropy(value)
+            if pattern.assignment:
+                if len(value) < MIN_SECRET_LENGTH or PLACEHOLDER_PATTERN.match(value):
+                    continue
+                severity = 'high' if entropy >= self.entropy_threshold else 'medium'
+            else:
+                severity = 'high'
+
+            counted += block.count('\n', previous, start)
+            previous = start
+            span = match.span(1) if pattern.assignment else match.span(0)
+            candidates.append((span, pattern.assignment, SecretFinding(
+                pattern.id, severity, pattern.message, counted, offset + start, value,
+                round(entropy, 2), self._code(block, start, value))))
+
+        # Agrupar las coincidencias cuyos valores se solapan y quedarse con una por grupo
+        best, end = None, -1
+        kept = []
+        for span, assignment, finding in sorted(candidates, key=lambda candidate: candidate[0]):
+            if best is not None and span[0] < end:
+                if best[0] and not assignment:
+                    best = (assignment, finding)
+                end = max(end, span[1])
+                continue
+            if best is not None:
+                kept.append(best[1])
+            best, end = (assignment, finding), span[1]
+        if best is not None:
+            kept.append(best[1])
+        kept.sort(key=lambda finding: finding.offset)
+        yield from kept
+
+    def _code(self, block, start, value):
+        """
+        Devuelve la línea de un hallazgo, recortada y con el secreto oculto.
+
+        Args:
+            block (str): Texto del bloque.
+            start (int): Posición del hallazgo en el bloque.
+            value (str): Secreto encontrado.
+
+        Returns:
+            str: Código que se muestra con el hallazgo.
+        """
+        line_start = block.rfind('\n', 0, start) + 1
+        line_end = block.find('\n', start)
+        if line_end == -1:
+            line_end = len(block)
+        if line_end - line_start > MAX_CODE_LENGTH:
+            line_start = max(line_start, start - MAX_CODE_LENGTH // 4)
+            line_end = min(line_end, line_start + MAX_CODE_LENGTH)
+        return block[line_start:line_end].replace(value, mask_secret(value)).strip()
+
+
+DEFAULT_SECRET_SCANNER = SecretScanner()
@@ -11,10 +11,23 @@ from collections import defaultdict
 from src.core.base_module import BaseModule
 from src.core.module_registry import ModuleRegistry
 from src.utils.ai_provider import AIProvider
+from src.utils.prompt_builder import PromptBuilder, estimate_tokens
+from src.utils.model_router import ModelRouter
 import json
 
 logger = logging.getLogger(__name__)
 
+# Esquema de la respuesta de la IA
+COMMIT_MESSAGE_SCHEMA = {
+    'type': 'object',
+    'required': ['title'],
+    'properties': {
+        'title': {'type': 'string'},
+        'body': {'type': 'string', 'default': ''},
+        'footer': {'type': 'string', 'default': ''}
+    }
+}
+
 @ModuleRegistry.register
 class CommitMessageGenerator(BaseModule):
     """
@@ -41,11 +54,15 @@ class CommitMessageGenerator(BaseModule):
         
         self.language = self.config.get('language', 'english')
         self.use_ai = self.config.get('use_ai', False)
+        # Reutilizar resultados de eventos casi idénticos solo cuando evitan llamadas a la IA
+        self.reuse_similar_results = self.use_ai
+        self.prompt_builder = PromptBuilder(self.config.get('openai_model'), self.config.get('max_prompt_tokens'))
         
         # Inicializar LLM si se va a usar IA
         if self.use_ai and self.is_enabled():
             try:
                 self.llm = AIProvider.get_llm(self.config)
+                self.router = ModelRouter(self.config, self.llm)
                 logger.info(f"LLM inicializado para {self.__class__.__name__}")
             except Exception as e:
                 logger.error(f"Error al inicializar LLM: {e}")
@@ -125,6 +142,22 @@ class CommitMessageGenerator(BaseModule):
                 'type': 'boolean',
                 'description': 'Usar inteligencia artificial para mejorar la generación de mensajes',
                 'default': False
+            },
+            'max_prompt_tokens': {
+                'type': 'integer',
+                'description': 'Máximo de tokens de código/diff a incluir en cada prompt de IA',
+                'default': 6000
+            },
+            'model_cascade': {
+                'type': 'boolean',
+                'description': 'Usar un modelo económico para los cambios de bajo riesgo y escalar al modelo principal solo cuando haga falta',
+                'default': False
+            },
+            'cheap_model': {
+                'type': 'string',
+                'description': 'Modelo económico para los cambios de bajo riesgo',
+                'enum': ['gpt-4o-mini', 'gpt-3.5-turbo'],
+                'default': 'gpt-4o-mini'
             }
         }
     
@@ -836,7 +869,18 @@ class CommitMessageGenerator(BaseModule):
         if self.use_ai and hasattr(self, 'llm') and self.llm:
             return self._generate_commit_message_with_ai(changes, repo_path)
             
-        # Generar mensaje basado en reglas si no se usa IA
+        return self._generate_commit_message_with_rules(changes)
+        
+    def _generate_commit_message_with_rules(self, changes):
+        """
+        Genera un mensaje de commit con las reglas locales, sin usar IA.
+        
+        Args:
+            changes (list): Lista de cambios para los que generar el mensaje.
+            
+        Returns:
+            dict: Mensaje de commit generado.
+        """
         num_files = len(changes)
         
         # Determinar el tipo de cambio predominante
@@ -916,60 +960,20 @@ class CommitMessageGenerator(BaseModule):
             Responde SOLO con el JSON, sin texto adicional.
             """
             
-            # Obtener respuesta de la IA
-            response = self.llm.invoke(prompt)
-            
-            # Intentar parsear la respuesta como JSON
-            try:
-                import json
-                import re
-                
-                # Extraer JSON de la respuesta
-                json_match = re.search(r'```json\n(.*?)\n```', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    json_str = response
-                
-                # Limpiar la cadena JSON
-                json_str = re.sub(r'^```.*\n', '', json_str)
-                json_str = re.sub(r'\n```$', '', json_str)
-                
-                result = json.loads(json_str)
+            # Obtener respuesta de la IA, validada contra el esquema
+            paths = [change.get('path', '') for change in changes]
+            result = self.router.invoke_structured(prompt, COMMIT_MESSAGE_SCHEMA, paths)
                 
-                # Verificar que el resultado tenga los campos necesarios
-                if 'title' not in result:
-                    result['title'] = "Cambios en el código"
-                if 'body' not in result:
-                    result['body'] = ""
-                if 'footer' not in result:
-                    result['footer'] = ""
-                    
-                # Limitar longitud del título
-                if len(result['title']) > self.max_length:
-                    result['title'] = result['title'][:self.max_length-3] + "..."
-                    
-                return result
-                
-            except Exception as e:
-                logger.error(f"Error al parsear la respuesta de la IA: {e}")
-                logger.debug(f"Respuesta recibida: {response}")
+            # Limitar longitud del título
+            if len(result['title']) > self.max_length:
+                result['title'] = result['title'][:self.max_length-3] + "..."
                 
-                # Fallback: extraer título y cuerpo manualmente
-                lines = response.strip().split('\n')
-                title = lines[0] if lines else "Cambios en el código"
-                body = "\n".join(lines[1:]) if len(lines) > 1 else ""
-                
-                return {
-                    'title': title[:self.max_length] if len(title) > self.max_length else title,
-                    'body': body,
-                    'footer': ""
-                }
+            return result
                 
         except Exception as e:
             logger.error(f"Error al generar mensaje con IA: {e}")
-            # Fallback al método tradicional
-            return self._generate_commit_message_for_changes(changes, repo_path)
+            # Fallback al método basado en reglas
+            return self._generate_commit_message_with_rules(changes)
             
     def _format_changes_for_ai(self, changes, repo_path=None):
         """
@@ -984,6 +988,9 @@ class CommitMessageGenerator(BaseModule):
         """
         formatted = ""
         
+        # Repartir el presupuesto de tokens entre los cambios
+        budget_per_change = max(1, self.prompt_builder.budget // max(1, len(changes)))
+        
         for i, change in enumerate(changes):
             path = change.get('path', '')
             event_type = change.get('event_type', 'modified')
@@ -992,15 +999,22 @@ class CommitMessageGenerator(BaseModule):
             formatted += f"  Archivo: {path}\n"
             formatted += f"  Tipo de cambio: {event_type}\n"
             
+            # El diff tiene prioridad; el contenido usa el presupuesto restante
+            remaining = budget_per_change
+            diff = change.get('diff', '')
+            if diff:
+                diff_preview, diff_truncated = self.prompt_builder.fit_diff(diff, remaining)
+                remaining -= estimate_tokens(diff_preview)
+            
             # Si hay contenido disponible, añadirlo
             content = change.get('content', '')
-            if content and self.analyze_content:
-                formatted += f"  Contenido:\n{content}\n"
+            if content and self.analyze_content and remaining > 0:
+                content_preview, content_truncated = self.prompt_builder.fit_file(content, remaining, diff=diff)
+                formatted += f"  Contenido{' (parcial)' if content_truncated else ''}:\n{content_preview}\n"
                 
             # Si hay diff disponible, añadirlo
-            diff = change.get('diff', '')
             if diff:
-                formatted += f"  Diff:\n{diff}\n"
+                formatted += f"  Diff{' (parcial)' if diff_truncated else ''}:\n{diff_preview}\n"
                 
             formatted += "\n"
             
@@ -1,16 +1,72 @@
 import os
 import re
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.core.base_module import BaseModule
 from src.core.module_registry import ModuleRegistry
 from src.utils.ai_provider import AIProvider
+from src.utils.model_router import ModelRouter
+from src.utils.prompt_builder import PromptBuilder, estimate_tokens
+from src.utils.rate_limiter import current_priority, request_priority
+from src.utils.llm_metrics import current_module, llm_module
+from src.utils.result_cache import get_result_cache
+from src.utils.source_index import get_source_index
+from src.utils.python_structure import parse_python
+from src.utils.js_structure import parse_javascript
+from src.utils.baseline_store import get_baseline_store, fingerprints
 
 logger = logging.getLogger(__name__)
 
+# Esquema de la respuesta de la IA: cada docstring se asocia al identificador de su elemento en el prompt
+DOCSTRINGS_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'required': ['id', 'docstring'],
+        'properties': {
+            'id': {'type': ['integer', 'string']},
+            'type': {'type': 'string'},
+            'name': {'type': 'string'},
+            'docstring': {'type': 'string'}
+        }
+    }
+}
+
+# Caché de docstrings generados (se puede cambiar con DOCSTRING_CACHE_PATH)
+DEFAULT_DOCSTRING_CACHE_PATH = os.path.join('.git_monitor_cache', 'docstring_cache.sqlite')
+
+# Elementos máximos por petición: limita el tamaño de la respuesta aunque quepan más en el prompt
+DEFAULT_MAX_BATCH_ITEMS = 20
+
+# Líneas de contexto que acompañan a cada elemento en el prompt
+CONTEXT_LINES = 5
+
+
+
+def missing_doc_fingerprints(file_path, missing_docs):
+    """
+    Calcula la huella de línea base de los elementos sin documentar de un archivo.
+    
+    Args:
+        file_path (str): Ruta del archivo relativa al repositorio.
+        missing_docs (list): Elementos sin docstring (resultado de `_find_missing_docstrings`).
+        
+    Returns:
+        list: Huella de cada elemento, basada en su tipo y nombre completo.
+    """
+    keys = [('missing-docstring', f"{item['type']}:{item.get('qualname') or item['name']}") for item in missing_docs]
+    return fingerprints(DocstringGenerator.__name__, file_path, keys)
+
+
 @ModuleRegistry.register
 class DocstringGenerator(BaseModule):
     """Genera y actualiza docstrings para código sin documentar."""
     
+    # Peticiones de lotes de docstrings en curso, compartido por todas las instancias
+    # (el limitador de concurrencia del proveedor decide cuántas se envían a la vez)
+    _batch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='docstring-batch')
+    
     def __init__(self, config=None):
         """
         Inicializa el generador de docstrings.
@@ -22,11 +78,20 @@ class DocstringGenerator(BaseModule):
         self.doc_format = self.config.get('format', 'google')
         self.target_langs = self.config.get('languages', ['python', 'javascript'])
         self.use_ai = self.config.get('use_ai', False)
+        self.use_baseline = self.config.get('baseline', True)
+        self.prompt_builder = PromptBuilder(self.config.get('openai_model'), self.config.get('max_prompt_tokens'))
+        self.max_batch_items = self.config.get('max_batch_items', DEFAULT_MAX_BATCH_ITEMS)
+        
+        # Docstrings generados con IA por huella normalizada de la firma y el cuerpo
+        self.docstring_cache = None
+        if self.config.get('docstring_cache', True):
+            self.docstring_cache = get_result_cache(os.getenv('DOCSTRING_CACHE_PATH', DEFAULT_DOCSTRING_CACHE_PATH))
         
         # Inicializar LLM si se va a usar IA
         if self.use_ai and self.is_enabled():
             try:
                 self.llm = AIProvider.get_llm(self.config)
+                self.router = ModelRouter(self.config, self.llm)
                 logger.info(f"LLM inicializado para {self.__class__.__name__}")
             except Exception as e:
                 logger.error(f"Error al inicializar LLM: {e}")
@@ -46,30 +111,14 @@ class DocstringGenerator(BaseModule):
             logger.debug(f"Módulo {self.name} deshabilitado, ignorando evento")
             return None
             
-        if event_data['type'] != 'file_change':
-            logger.debug(f"Evento ignorado por {self.name}: no es un cambio de archivo")
-            return None
-            
-        file_path = event_data.get('path')
-        if not file_path:
-            logger.warning(f"Evento sin ruta de archivo, ignorando")
-            return None
-            
-        # Verificar si el archivo es de un lenguaje soportado
-        file_ext = os.path.splitext(file_path)[1].lower()
-        lang = self._get_language_from_extension(file_ext)
-        if not lang or lang not in self.target_langs:
-            logger.debug(f"Archivo {file_path} no es de un lenguaje soportado ({lang})")
-            return None
-            
-        # Obtener el contenido del archivo
-        content = event_data.get('content', '')
-        if not content:
-            logger.warning(f"No hay contenido para analizar en {file_path}")
+        target = self._event_target(event_data)
+        if target is None:
             return None
+        file_path, lang, content = target
             
         # Analizar el archivo para encontrar funciones/clases sin docstrings
-        missing_docs = self._find_missing_docstrings(content, lang)
+        missing_docs = self._new_missing_docstrings(file_path, content, lang)
+            
         if not missing_docs:
             logger.info(f"No se encontraron funciones/clases sin documentar en {file_path}")
             return {
@@ -81,7 +130,7 @@ class DocstringGenerator(BaseModule):
             }
             
         # Generar docstrings para las funciones/clases sin documentar
-        generated_docs = self._generate_docstrings(missing_docs, content, lang)
+        generated_docs = self._generate_docstrings(missing_docs, content, lang, file_path)
         
         return {
             'module': self.name,
@@ -92,6 +141,105 @@ class DocstringGenerator(BaseModule):
             'docstrings': generated_docs
         }
     
+    def prepare(self, events):
+        """
+        Genera con IA, agrupados en pocas peticiones, los docstrings de todos los eventos de un sondeo.
+        
+        Los elementos sin documentar de todos los archivos se reúnen, se descartan los que
+        ya están en la caché (su firma y su cuerpo no han cambiado) y el resto se reparte
+        en lotes que caben en el presupuesto del prompt. Los resultados quedan en la caché,
+        de modo que al procesar después cada evento no se hace ninguna petición. Sin
+        caché (``docstring_cache: false``) no hay dónde guardarlos, así que cada evento
+        genera los suyos al procesarse.
+        
+        Args:
+            events (list): Eventos del sondeo.
+        """
+        if not self.use_ai or not getattr(self, 'llm', None) or self.docstring_cache is None:
+            return
+        
+        entries = {}
+        for event_data in events:
+            target = self._event_target(event_data)
+            if target is None:
+                continue
+            file_path, lang, content = target
+            index = get_source_index(content)
+            for item in self._new_missing_docstrings(file_path, content, lang):
+                key = self._docstring_key(item, index, lang)
+                if key not in entries:
+                    entries[key] = {'key': key, 'item': item, 'file': file_path, 'lang': lang, 'index': index}
+        
+        pending = [entry for entry in entries.values() if self._cached_docstring(entry['key']) is None]
+        if pending:
+            logger.info(f"Generando {len(pending)} docstrings de {len(events)} eventos "
+                        f"({len(entries) - len(pending)} ya en caché)")
+            self._generate_batches_with_ai(pending)
+    
+    def _event_target(self, event_data):
+        """
+        Obtiene el archivo que hay que analizar en un evento.
+        
+        En los cambios locales detectados por el sondeo, el evento solo incluye el inicio
+        del contenido, por lo que el archivo se lee completo del repositorio.
+        
+        Args:
+            event_data (dict): Datos del evento.
+            
+        Returns:
+            tuple: (ruta, lenguaje, contenido), o None si el evento no se procesa.
+        """
+        if event_data.get('type') not in ('file_change', 'local_change'):
+            logger.debug(f"Evento ignorado por {self.name}: no es un cambio de archivo")
+            return None
+            
+        file_path = event_data.get('path')
+        if not file_path:
+            logger.warning(f"Evento sin ruta de archivo, ignorando")
+            return None
+            
+        # Verificar si el archivo es de un lenguaje soportado
+        file_ext = os.path.splitext(file_path)[1].lower()
+        lang = self._get_language_from_extension(file_ext)
+        if not lang or lang not in self.target_langs:
+            logger.debug(f"Archivo {file_path} no es de un lenguaje soportado ({lang})")
+            return None
+            
+        # Obtener el contenido del archivo
+        content = event_data.get('content', '')
+        if event_data['type'] == 'local_change' and event_data.get('repo_path'):
+            try:
+                with open(os.path.join(event_data['repo_path'], file_path), 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.debug(f"No se pudo leer {file_path}, se usa el contenido del evento: {e}")
+        if not content:
+            logger.warning(f"No hay contenido para analizar en {file_path}")
+            return None
+        return file_path, lang, content
+    
+    def _new_missing_docstrings(self, file_path, content, lang):
+        """
+        Encuentra los elementos sin documentar de un archivo que no están en la línea base.
+        
+        Args:
+            file_path (str): Ruta del archivo relativa al repositorio.
+            content (str): Contenido del archivo.
+            lang (str): Lenguaje de programación.
+            
+        Returns:
+            list: Elementos sin docstring (ver `_find_missing_docstrings`).
+        """
+        missing_docs = self._find_missing_docstrings(content, lang)
+        
+        # Los elementos que ya estaban sin documentar en la línea base no se notifican de nuevo
+        store = get_baseline_store() if self.use_baseline else None
+        if store is not None and missing_docs:
+            hashes = missing_doc_fingerprints(file_path, missing_docs)
+            known = store.known(hashes)
+            missing_docs = [item for item, item_hash in zip(missing_docs, hashes) if item_hash not in known]
+        return missing_docs
+    
     def _get_language_from_extension(self, ext):
         """
         Determina el lenguaje de programación basado en la extensión del archivo.
@@ -107,6 +255,8 @@ class DocstringGenerator(BaseModule):
             '.js': 'javascript',
             '.ts': 'typescript',
             '.jsx': 'javascript',
+            '.mjs': 'javascript',
+            '.cjs': 'javascript',
             '.tsx': 'typescript',
             '.java': 'java',
             '.cs': 'csharp',
@@ -128,8 +278,37 @@ class DocstringGenerator(BaseModule):
             list: Lista de diccionarios con información sobre las funciones/clases sin docstrings.
         """
         missing_docs = []
-        
+        index = get_source_index(content)
+        structure = None
         if lang == 'python':
+            structure = parse_python(content)
+        elif lang in ('javascript', 'typescript'):
+            # En JavaScript/TypeScript la documentación es el comentario JSDoc que precede a la definición
+            structure = parse_javascript(content)
+        
+        if structure is not None:
+            for definition in structure.definitions:
+                if definition.has_docstring:
+                    continue
+                item = {
+                    'type': definition.kind,
+                    'name': definition.name,
+                    'qualname': definition.qualname,
+                    'position': index.line_starts[definition.line - 1],
+                    'start_line': definition.start_line
+                }
+                if definition.kind == 'function':
+                    item.update({
+                        'params': definition.params,
+                        'end_line': definition.end_line,
+                        'body': self._function_body(index, definition)
+                    })
+                else:
+                    item.update({'inheritance': definition.bases, 'end_line': definition.line})
+                missing_docs.append(item)
+        
+        elif lang == 'python':
+            # Código que no se puede analizar (por ejemplo, a medio editar): búsqueda por patrones
             # Buscar funciones y clases en Python
             function_pattern = r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\((.*?)\):'
             class_pattern = r'class\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*(?:\((.*?)\))?:'
@@ -145,12 +324,15 @@ class DocstringGenerator(BaseModule):
                 if not re.search(r'^\s*"""', next_lines.lstrip(), re.MULTILINE):
                     # Extraer el cuerpo de la función para análisis
                     function_body = self._extract_function_body(content, match.end())
+                    start_line = index.line_of(start_pos)
                     
                     missing_docs.append({
                         'type': 'function',
                         'name': name,
                         'params': params,
                         'position': start_pos,
+                        'start_line': start_line,
+                        'end_line': index.line_of(match.end()) + function_body.count('\n') + 1,
                         'body': function_body
                     })
             
@@ -163,23 +345,37 @@ class DocstringGenerator(BaseModule):
                 # Verificar si ya tiene docstring
                 next_lines = content[match.end():match.end() + 200]
                 if not re.search(r'^\s*"""', next_lines.lstrip(), re.MULTILINE):
+                    start_line = index.line_of(start_pos)
                     missing_docs.append({
                         'type': 'class',
                         'name': name,
                         'inheritance': inheritance,
-                        'position': start_pos
+                        'position': start_pos,
+                        'start_line': start_line,
+                        'end_line': start_line
                     })
         
-        elif lang in ['javascript', 'typescript']:
-            # Implementar para JavaScript/TypeScript
-            # (Simplificado para este ejemplo)
-            function_pattern = r'(?:function|const|let|var)\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*=?\s*(?:function)?\s*\((.*?)\)'
-            class_pattern = r'class\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*(?:extends\s+([a-zA-Z_][a-zA-Z0-9_]*))?'
-            
-            # Lógica similar a Python...
-        
         return missing_docs
     
+    def _function_body(self, index, definition):
+        """
+        Obtiene las primeras líneas del cuerpo de una función para análisis.
+        
+        Args:
+            index (SourceIndex): Índice de líneas del contenido.
+            definition (Definition): Función analizada.
+            
+        Returns:
+            str: Hasta 10 líneas no vacías del cuerpo de la función.
+        """
+        body_lines = []
+        for _, line in index.lines(definition.body_line, definition.end_line):
+            if line.strip():
+                body_lines.append(line)
+                if len(body_lines) >= 10:
+                    break
+        return '\n'.join(body_lines)
+    
     def _extract_function_body(self, content, start_pos):
         """
         Extrae el cuerpo de una función para análisis.
@@ -221,7 +417,7 @@ class DocstringGenerator(BaseModule):
                 
         return '\n'.join(body_lines)
     
-    def _generate_docstrings(self, missing_docs, content, lang):
+    def _generate_docstrings(self, missing_docs, content, lang, file_path=''):
         """
         Genera docstrings para los elementos que carecen de documentación.
         
@@ -229,16 +425,28 @@ class DocstringGenerator(BaseModule):
             missing_docs (list): Lista de elementos sin documentación.
             content (str): Contenido del archivo.
             lang (str): Lenguaje de programación.
+            file_path (str, opcional): Ruta del archivo (se indica a la IA junto a cada elemento).
             
         Returns:
             list: Lista de docstrings generados.
         """
         # Si está habilitada la IA, usarla para generar docstrings
         if self.use_ai and hasattr(self, 'llm') and self.llm:
-            return self._generate_docstrings_with_ai(missing_docs, content, lang)
+            return self._generate_docstrings_with_ai(missing_docs, content, lang, file_path)
+            
+        return self._generate_template_docstrings(missing_docs, lang)
+        
+    def _generate_template_docstrings(self, missing_docs, lang):
+        """
+        Genera docstrings a partir de plantillas, sin usar IA.
+        
+        Args:
+            missing_docs (list): Lista de elementos sin documentación.
+            lang (str): Lenguaje de programación.
             
-        # En una implementación real, aquí se usaría el LLM para generar los docstrings
-        # Por ahora, generamos docstrings de ejemplo
+        Returns:
+            list: Lista de docstrings generados.
+        """
         generated = []
         
         for item in missing_docs:
@@ -259,35 +467,142 @@ class DocstringGenerator(BaseModule):
                 
         return generated
         
-    def _generate_docstrings_with_ai(self, missing_docs, content, lang):
+    def _generate_docstrings_with_ai(self, missing_docs, content, lang, file_path=''):
         """
         Genera docstrings utilizando IA para los elementos que carecen de documentación.
         
+        Solo se piden a la IA los elementos que no están en la caché (porque son nuevos o
+        cambió su firma o su cuerpo). Los que la IA no devuelve, o todos si la petición
+        falla, se generan con plantillas.
+        
         Args:
             missing_docs (list): Lista de elementos sin documentación.
             content (str): Contenido del archivo.
             lang (str): Lenguaje de programación.
+            file_path (str, opcional): Ruta del archivo.
             
         Returns:
             list: Lista de docstrings generados con IA.
         """
-        try:
-            # Preparar el contexto para la IA
-            context = self._prepare_context_for_ai(missing_docs, content, lang)
+        index = get_source_index(content)
+        entries = [{'key': self._docstring_key(item, index, lang), 'item': item, 'file': file_path, 'lang': lang,
+                    'index': index} for item in missing_docs]
+        
+        docstrings = {}
+        pending = []
+        for entry in entries:
+            cached = self._cached_docstring(entry['key'])
+            if cached is None:
+                pending.append(entry)
+            else:
+                docstrings[entry['key']] = cached
+        if pending:
+            docstrings.update(self._generate_batches_with_ai(pending))
+        
+        generated = []
+        for entry in entries:
+            item = entry['item']
+            if entry['key'] in docstrings:
+                generated.append({'type': item['type'], 'name': item['name'], 'docstring': docstrings[entry['key']]})
+            else:
+                # Fallback a las plantillas
+                generated.extend(self._generate_template_docstrings([item], lang))
+        return generated
+    
+    def _generate_batches_with_ai(self, entries):
+        """
+        Genera con IA los docstrings de varios elementos, agrupados en lotes que se piden en paralelo.
+        
+        Args:
+            entries (list): Elementos a documentar ('key', 'item', 'file', 'lang' e 'index').
             
-            # Crear el prompt para la IA
-            prompt = f"""
-            Genera docstrings para el siguiente código en {lang}:
+        Returns:
+            dict: Docstring generado por clave de caché; no incluye los elementos de los
+                lotes que fallaron ni los que la IA no devolvió.
+        """
+        batches = self._pack_entries(entries)
+        priority, module = current_priority(), current_module()
+        futures = [self._batch_executor.submit(self._generate_batch, batch, priority, module) for batch in batches]
+        
+        docstrings = {}
+        for future in as_completed(futures):
+            try:
+                docstrings.update(future.result())
+            except Exception as e:
+                logger.error(f"Error al generar docstrings con IA: {e}")
+        return docstrings
+    
+    def _pack_entries(self, entries):
+        """
+        Agrupa elementos en lotes cuyo contexto total no supera el presupuesto de tokens.
+        
+        Los elementos que ocupan más de la mitad del presupuesto se piden por separado.
+        
+        Args:
+            entries (list): Elementos a documentar.
+            
+        Returns:
+            list: Lotes de elementos, cada uno con su contexto en 'context'.
+        """
+        budget = self.prompt_builder.budget
+        batches = []
+        current, used = [], 0
+        
+        for entry in entries:
+            entry['context'] = self._prepare_context_for_ai(entry)
+            cost = estimate_tokens(entry['context'])
+            if cost > budget // 2:
+                batches.append([entry])
+                continue
+            if current and (used + cost > budget or len(current) >= self.max_batch_items):
+                batches.append(current)
+                current, used = [], 0
+            current.append(entry)
+            used += cost
+            
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _generate_batch(self, batch, priority, module):
+        """
+        Genera con una sola petición a la IA los docstrings de un lote y los guarda en la caché.
+        
+        Args:
+            batch (list): Elementos del lote, con su contexto.
+            priority (int): Prioridad de la petición original.
+            module (str): Módulo al que se atribuye la petición en las métricas.
             
-            {context}
+        Returns:
+            dict: Docstring generado por clave de caché.
+        """
+        sections = []
+        for position, entry in enumerate(batch, 1):
+            item = entry['item']
+            sections.append(f"\n\n--- [{position}] {item['type'].upper()}: {item.get('qualname') or item['name']} "
+                            f"({entry['file'] or 'archivo'}, {entry['lang']}) ---\n{entry['context']}")
+        
+        langs = {entry['lang'] for entry in batch}
+        if langs <= {'javascript', 'typescript'}:
+            doc_format = 'JSDoc'
+        elif langs & {'javascript', 'typescript'}:
+            doc_format = f"{self.doc_format} (JSDoc en JavaScript/TypeScript)"
+        else:
+            doc_format = self.doc_format
+        
+        prompt = f"""
+            Genera docstrings para los siguientes elementos de código sin documentar:
+            {''.join(sections)}
             
-            Formato de docstring: {self.doc_format}
+            Formato de docstring: {doc_format}
             
-            Por favor, proporciona los docstrings en el siguiente formato JSON:
+            Por favor, proporciona los docstrings en el siguiente formato JSON, indicando en "id"
+            el número entre corchetes de cada elemento:
             
             ```json
             [
                 {{
+                    "id": número_del_elemento,
                     "type": "function|class",
                     "name": "nombre_del_elemento",
                     "docstring": "docstring generado"
@@ -297,83 +612,94 @@ class DocstringGenerator(BaseModule):
             
             Responde SOLO con el JSON, sin texto adicional.
             """
-            
-            # Obtener respuesta de la IA
-            response = self.llm.invoke(prompt)
-            
-            # Intentar parsear la respuesta como JSON
+        
+        # Los docstrings son de bajo riesgo, por lo que se usa el modelo económico si está activo
+        file_paths = sorted({entry['file'] for entry in batch if entry['file']})
+        with request_priority(priority), llm_module(module):
+            response = self.router.invoke_structured(prompt, DOCSTRINGS_SCHEMA, file_paths)
+        
+        docstrings = {}
+        for result in response:
             try:
-                import json
-                import re
-                
-                # Extraer JSON de la respuesta
-                json_match = re.search(r'```json\n(.*?)\n```', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    json_str = response
-                
-                # Limpiar la cadena JSON
-                json_str = re.sub(r'^```.*\n', '', json_str)
-                json_str = re.sub(r'\n```$', '', json_str)
-                
-                result = json.loads(json_str)
-                
-                # Verificar que el resultado sea una lista
-                if not isinstance(result, list):
-                    logger.error("La respuesta de la IA no es una lista")
-                    return self._generate_docstrings(missing_docs, content, lang)
-                    
-                # Verificar que cada elemento tenga los campos necesarios
-                for item in result:
-                    if 'type' not in item or 'name' not in item or 'docstring' not in item:
-                        logger.error(f"Elemento de la respuesta de la IA no tiene los campos necesarios: {item}")
-                        return self._generate_docstrings(missing_docs, content, lang)
-                
-                return result
-                
-            except Exception as e:
-                logger.error(f"Error al parsear la respuesta de la IA: {e}")
-                logger.debug(f"Respuesta recibida: {response}")
-                
-                # Fallback al método tradicional
-                return self._generate_docstrings(missing_docs, content, lang)
-                
-        except Exception as e:
-            logger.error(f"Error al generar docstrings con IA: {e}")
-            # Fallback al método tradicional
-            return self._generate_docstrings(missing_docs, content, lang)
+                position = int(result['id'])
+            except (TypeError, ValueError):
+                continue
+            if 1 <= position <= len(batch) and result['docstring'].strip():
+                key = batch[position - 1]['key']
+                docstrings[key] = result['docstring']
+                self._store_docstring(key, result['docstring'])
+        return docstrings
             
-    def _prepare_context_for_ai(self, missing_docs, content, lang):
+    def _prepare_context_for_ai(self, entry):
         """
-        Prepara el contexto para la IA, extrayendo las partes relevantes del código.
+        Prepara el contexto de un elemento para la IA: su código con unas líneas antes y después.
         
         Args:
-            missing_docs (list): Lista de elementos sin documentación.
-            content (str): Contenido del archivo.
-            lang (str): Lenguaje de programación.
+            entry (dict): Elemento a documentar ('item' e 'index').
             
         Returns:
-            str: Contexto formateado para la IA.
+            str: Fragmento de código del elemento.
         """
-        lines = content.split('\n')
-        context = ""
+        index = entry['index']
+        item = entry['item']
+        start_line = item.get('start_line', 1)
+        end_line = item.get('end_line', index.line_count)
         
-        for item in missing_docs:
-            start_line = item.get('start_line', 0)
-            end_line = item.get('end_line', len(lines) - 1)
-            
-            # Añadir algunas líneas de contexto antes y después
-            context_start = max(0, start_line - 5)
-            context_end = min(len(lines) - 1, end_line + 5)
-            
-            # Extraer el fragmento de código
-            code_snippet = "\n".join(lines[context_start:context_end+1])
+        # Añadir algunas líneas de contexto antes y después
+        context_start = max(1, start_line - CONTEXT_LINES)
+        context_end = min(index.line_count, end_line + CONTEXT_LINES)
+        return index.text_range(context_start, context_end)
+    
+    def _docstring_key(self, item, index, lang):
+        """
+        Calcula la clave de caché del docstring de un elemento.
+        
+        La clave depende del código del elemento (firma y cuerpo) normalizado: sin
+        indentación ni líneas vacías. Un elemento que solo se mueve de sitio, cambia de
+        nivel de indentación o está repetido en otro archivo reutiliza el docstring.
+        
+        Args:
+            item (dict): Elemento sin documentar.
+            index (SourceIndex): Índice de líneas del contenido.
+            lang (str): Lenguaje de programación.
             
-            context += f"\n\n--- {item['type'].upper()}: {item['name']} ---\n"
-            context += code_snippet
+        Returns:
+            str: Clave hexadecimal.
+        """
+        start_line = item.get('start_line', 1)
+        end_line = max(item.get('end_line') or start_line, start_line)
+        code = '\n'.join(line.strip() for _, line in index.lines(start_line, end_line) if line.strip())
+        payload = '\0'.join([lang, self.doc_format, item['type'], code])
+        return hashlib.sha256(payload.encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    def _cached_docstring(self, key):
+        """
+        Busca un docstring generado en la caché.
+        
+        Args:
+            key (str): Clave del docstring.
             
-        return context
+        Returns:
+            str: Docstring almacenado, o None si no existe.
+        """
+        if self.docstring_cache is None:
+            return None
+        return self.docstring_cache.get(key)
+    
+    def _store_docstring(self, key, docstring):
+        """
+        Guarda un docstring generado en la caché.
+        
+        Args:
+            key (str): Clave del docstring.
+            docstring (str): Docstring generado.
+        """
+        if self.docstring_cache is None:
+            return
+        try:
+            self.docstring_cache.set(key, docstring)
+        except Exception as e:
+            logger.error(f"Error al guardar el docstring en la caché: {e}")
     
     def _generate_function_docstring(self, func_info, lang):
         """
@@ -390,6 +716,9 @@ class DocstringGenerator(BaseModule):
         params = func_info['params'].split(',')
         param_docs = ""
         
+        if lang in ('javascript', 'typescript'):
+            return self._generate_function_jsdoc(func_info['name'], params)
+        
         for param in params:
             param = param.strip()
             if param:
@@ -408,6 +737,31 @@ class DocstringGenerator(BaseModule):
             
         return docstring
     
+    def _generate_function_jsdoc(self, name, params):
+        """
+        Genera un comentario JSDoc para una función de JavaScript/TypeScript.
+        
+        Args:
+            name (str): Nombre de la función.
+            params (list): Texto de cada parámetro (puede incluir tipos, valores por defecto y modificadores).
+            
+        Returns:
+            str: Comentario JSDoc generado.
+        """
+        param_names = []
+        for param in params:
+            # "private readonly svc: Service", "...args", "limit = 10"; se omiten los desestructurados
+            words = param.split('=')[0].split(':')[0].split()
+            param_name = words[-1].lstrip('.').rstrip('?') if words else ''
+            if re.fullmatch(r'[A-Za-z_$][\w$]*', param_name):
+                param_names.append(param_name)
+        
+        docstring = f'/**\n * Descripción de la función {name}.\n *\n'
+        for param_name in param_names:
+            docstring += f' * @param {param_name} Descripción del parámetro.\n'
+        docstring += ' * @returns Descripción del valor de retorno.\n */'
+        return docstring
+    
     def _generate_class_docstring(self, class_info, lang):
         """
         Genera un docstring para una clase.
@@ -420,7 +774,12 @@ class DocstringGenerator(BaseModule):
             str: Docstring generado.
         """
         # Implementación de ejemplo
-        if self.doc_format == 'google':
+        if lang in ('javascript', 'typescript'):
+            docstring = f'/**\n * Clase {class_info["name"]}.\n'
+            if class_info.get('inheritance'):
+                docstring += f" *\n * @extends {class_info['inheritance']}\n"
+            docstring += ' */'
+        elif self.doc_format == 'google':
             docstring = f'"""\n    Clase {class_info["name"]}.\n    \n'
             if class_info.get('inheritance'):
                 docstring += f"    Hereda de: {class_info['inheritance']}\n    \n"
@@ -457,9 +816,40 @@ class DocstringGenerator(BaseModule):
                 'default': False,
                 'description': 'Activar/desactivar el uso de IA para generar docstrings'
             },
+            'docstring_cache': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'Guardar los docstrings generados con IA por firma y cuerpo normalizados, para no volver a pedirlos (DOCSTRING_CACHE_PATH)'
+            },
+            'max_prompt_tokens': {
+                'type': 'integer',
+                'default': 6000,
+                'description': 'Máximo de tokens de código a incluir en cada prompt de IA'
+            },
+            'max_batch_items': {
+                'type': 'integer',
+                'default': DEFAULT_MAX_BATCH_ITEMS,
+                'description': 'Elementos máximos por petición al generar los docstrings de un sondeo en lotes'
+            },
             'enabled': {
                 'type': 'boolean',
                 'default': True,
                 'description': 'Activar/desactivar este módulo'
+            },
+            'baseline': {
+                'type': 'boolean',
+                'default': True,
+                'description': 'No notificar los elementos sin documentar que ya estaban en la línea base (main.py --baseline)'
+            },
+            'model_cascade': {
+                'type': 'boolean',
+                'default': False,
+                'description': 'Usar un modelo económico para los cambios de bajo riesgo y escalar al modelo principal solo cuando haga falta'
+            },
+            'cheap_model': {
+                'type': 'string',
+                'enum': ['gpt-4o-mini', 'gpt-3.5-turbo'],
+                'default': 'gpt-4o-mini',
+                'description': 'Modelo económico para los cambios de bajo riesgo'
             }
         }
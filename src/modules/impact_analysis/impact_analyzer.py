@@ -1,12 +1,37 @@
 import os
-import re
 import logging
 from src.core.base_module import BaseModule
 from src.core.module_registry import ModuleRegistry
 from src.utils.ai_provider import AIProvider
+from src.utils.prompt_builder import PromptBuilder, estimate_tokens
+from src.utils.model_router import ModelRouter, evaluate_file_criticality
 
 logger = logging.getLogger(__name__)
 
+# Esquema de la respuesta de la IA
+IMPACT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'risk_level': {'type': 'string', 'enum': ['high', 'medium', 'low'], 'default': 'medium'},
+        'summary': {'type': 'string', 'default': "Análisis de impacto generado por IA"},
+        'affected_areas': {
+            'type': 'array',
+            'default': [],
+            'items': {
+                'type': 'object',
+                'required': ['name'],
+                'properties': {
+                    'name': {'type': 'string'},
+                    'impact': {'type': 'string', 'default': ''},
+                    'risk_score': {'type': ['number', 'string'], 'default': 0}
+                }
+            }
+        },
+        'suggested_tests': {'type': 'array', 'items': {'type': 'string'}, 'default': []},
+        'confidence': {'type': 'number'}
+    }
+}
+
 @ModuleRegistry.register
 class ImpactAnalyzer(BaseModule):
     """Analiza el impacto potencial de los cambios en el código."""
@@ -23,11 +48,15 @@ class ImpactAnalyzer(BaseModule):
         self.analyze_dependencies = self.config.get('analyze_dependencies', True)
         self.analyze_test_coverage = self.config.get('analyze_test_coverage', True)
         self.use_ai = self.config.get('use_ai', False)
+        # Reutilizar resultados de eventos casi idénticos solo cuando evitan llamadas a la IA
+        self.reuse_similar_results = self.use_ai
+        self.prompt_builder = PromptBuilder(self.config.get('openai_model'), self.config.get('max_prompt_tokens'))
         
         # Inicializar LLM si se va a usar IA
         if self.use_ai and self.is_enabled():
             try:
                 self.llm = AIProvider.get_llm(self.config)
+                self.router = ModelRouter(self.config, self.llm)
                 logger.info(f"LLM inicializado para {self.__class__.__name__}")
             except Exception as e:
                 logger.error(f"Error al inicializar LLM: {e}")
@@ -172,31 +201,7 @@ class ImpactAnalyzer(BaseModule):
         Returns:
             str: Nivel de criticidad ('high', 'medium', 'low').
         """
-        # Patrones que indican alta criticidad
-        high_criticality_patterns = [
-            r'security', r'auth', r'password', r'credential', r'token',
-            r'payment', r'core', r'config', r'main', r'database', r'db',
-            r'api', r'server', r'router', r'controller'
-        ]
-        
-        # Patrones que indican criticidad media
-        medium_criticality_patterns = [
-            r'service', r'model', r'store', r'state', r'util', r'helper',
-            r'middleware', r'validator', r'parser', r'formatter'
-        ]
-        
-        # Verificar patrones de alta criticidad
-        for pattern in high_criticality_patterns:
-            if re.search(pattern, file_path, re.IGNORECASE):
-                return 'high'
-                
-        # Verificar patrones de criticidad media
-        for pattern in medium_criticality_patterns:
-            if re.search(pattern, file_path, re.IGNORECASE):
-                return 'medium'
-                
-        # Por defecto, criticidad baja
-        return 'low'
+        return evaluate_file_criticality(file_path)
     
     def _identify_affected_components(self, file_path, repo_path):
         """
@@ -355,7 +360,19 @@ class ImpactAnalyzer(BaseModule):
         if self.use_ai and hasattr(self, 'llm') and self.llm:
             return self._analyze_impact_with_ai(changes, repo_path)
             
-        # Análisis basado en reglas si no se usa IA
+        return self._analyze_impact_with_rules(changes, repo_path)
+        
+    def _analyze_impact_with_rules(self, changes, repo_path):
+        """
+        Analiza el impacto de los cambios con las reglas locales, sin usar IA.
+        
+        Args:
+            changes (list): Lista de cambios para analizar.
+            repo_path (str): Ruta al repositorio.
+            
+        Returns:
+            dict: Resultado del análisis de impacto.
+        """
         affected_areas = []
         risk_scores = []
         
@@ -430,62 +447,22 @@ class ImpactAnalyzer(BaseModule):
                 ],
                 "suggested_tests": [
                     "descripción_de_prueba_recomendada"
-                ]
+                ],
+                "confidence": confianza_en_el_análisis_entre_0_y_1
             }}
             ```
             
             Responde SOLO con el JSON, sin texto adicional.
             """
             
-            # Obtener respuesta de la IA
-            response = self.llm.invoke(prompt)
-            
-            # Intentar parsear la respuesta como JSON
-            try:
-                import json
-                import re
-                
-                # Extraer JSON de la respuesta
-                json_match = re.search(r'```json\n(.*?)\n```', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    json_str = response
-                
-                # Limpiar la cadena JSON
-                json_str = re.sub(r'^```.*\n', '', json_str)
-                json_str = re.sub(r'\n```$', '', json_str)
-                
-                result = json.loads(json_str)
-                
-                # Verificar que el resultado tenga los campos necesarios
-                if 'risk_level' not in result:
-                    result['risk_level'] = 'medium'
-                if 'summary' not in result:
-                    result['summary'] = "Análisis de impacto generado por IA"
-                if 'affected_areas' not in result:
-                    result['affected_areas'] = []
-                if 'suggested_tests' not in result:
-                    result['suggested_tests'] = []
-                    
-                return result
-                
-            except Exception as e:
-                logger.error(f"Error al parsear la respuesta de la IA: {e}")
-                logger.debug(f"Respuesta recibida: {response}")
-                
-                # Fallback: crear un resultado básico
-                return {
-                    'risk_level': 'medium',
-                    'summary': "Error al procesar el análisis con IA. Se recomienda revisar manualmente.",
-                    'affected_areas': [],
-                    'suggested_tests': []
-                }
+            # Obtener respuesta de la IA, validada contra el esquema
+            paths = [change.get('path', '') for change in changes]
+            return self.router.invoke_structured(prompt, IMPACT_SCHEMA, paths)
                 
         except Exception as e:
             logger.error(f"Error al analizar impacto con IA: {e}")
-            # Fallback al método tradicional
-            return self._analyze_impact(changes, repo_path)
+            # Fallback al análisis basado en reglas
+            return self._analyze_impact_with_rules(changes, repo_path)
             
     def _format_changes_for_ai(self, changes, repo_path):
         """
@@ -503,6 +480,9 @@ class ImpactAnalyzer(BaseModule):
         # Información del repositorio
         formatted += f"Repositorio: {os.path.basename(repo_path)}\n\n"
         
+        # Repartir el presupuesto de tokens entre los cambios
+        budget_per_change = max(1, self.prompt_builder.budget // max(1, len(changes)))
+        
         # Información de los cambios
         for i, change in enumerate(changes):
             path = change.get('path', '')
@@ -512,27 +492,22 @@ class ImpactAnalyzer(BaseModule):
             formatted += f"  Archivo: {path}\n"
             formatted += f"  Tipo de cambio: {event_type}\n"
             
+            # El diff tiene prioridad; el contenido usa el presupuesto restante
+            remaining = budget_per_change
+            diff = change.get('diff', '')
+            if diff:
+                diff_preview, diff_truncated = self.prompt_builder.fit_diff(diff, remaining)
+                remaining -= estimate_tokens(diff_preview)
+                
             # Si hay contenido disponible, añadirlo
             content = change.get('content', '')
-            if content:
-                # Limitar el contenido para no sobrecargar el prompt
-                max_content_length = 1000
-                if len(content) > max_content_length:
-                    content_preview = content[:max_content_length//2] + "\n...\n" + content[-max_content_length//2:]
-                    formatted += f"  Contenido (truncado):\n{content_preview}\n"
-                else:
-                    formatted += f"  Contenido:\n{content}\n"
+            if content and remaining > 0:
+                content_preview, content_truncated = self.prompt_builder.fit_file(content, remaining, diff=diff)
+                formatted += f"  Contenido{' (parcial)' if content_truncated else ''}:\n{content_preview}\n"
                     
             # Si hay diff disponible, añadirlo
-            diff = change.get('diff', '')
             if diff:
-                # Limitar el diff para no sobrecargar el prompt
-                max_diff_length = 1000
-                if len(diff) > max_diff_length:
-                    diff_preview = diff[:max_diff_length//2] + "\n...\n" + diff[-max_diff_length//2:]
-                    formatted += f"  Diff (truncado):\n{diff_preview}\n"
-                else:
-                    formatted += f"  Diff:\n{diff}\n"
+                formatted += f"  Diff{' (parcial)' if diff_truncated else ''}:\n{diff_preview}\n"
                     
             formatted += "\n"
             
@@ -615,5 +590,21 @@ class ImpactAnalyzer(BaseModule):
                 'type': 'boolean',
                 'default': False,
                 'description': 'Usar inteligencia artificial para el análisis'
+            },
+            'max_prompt_tokens': {
+                'type': 'integer',
+                'default': 6000,
+                'description': 'Máximo de tokens de código/diff a incluir en cada prompt de IA'
+            },
+            'model_cascade': {
+                'type': 'boolean',
+                'default': False,
+                'description': 'Usar un modelo económico para los cambios de bajo riesgo y escalar al modelo principal solo cuando haga falta'
+            },
+            'cheap_model': {
+                'type': 'string',
+                'enum': ['gpt-4o-mini', 'gpt-3.5-turbo'],
+                'default': 'gpt-4o-mini',
+                'description': 'Modelo económico para los cambios de bajo riesgo'
             }
         }
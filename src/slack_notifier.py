@@ -1,5 +1,6 @@
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,3 +51,84 @@ class SlackNotifier:
         except Exception as e:
             logger.error(f"Error inesperado al enviar mensaje a Slack: {str(e)}")
             return False
+
+    def post_message(self, message: str):
+        """
+        Publica un mensaje y devuelve su identificador (ts) para poder editarlo después.
+        Returns None if the message could not be posted.
+        """
+        try:
+            response = self.client.chat_postMessage(channel=self.channel, text=message)
+            if response["ok"]:
+                return response["ts"]
+            logger.error(f"Error al enviar mensaje a Slack: {response.get('error', 'Unknown error')}")
+        except SlackApiError as e:
+            logger.error(f"Error enviando mensaje a Slack: {e.response.get('error', 'Unknown error')}")
+        except Exception as e:
+            logger.error(f"Error inesperado al enviar mensaje a Slack: {str(e)}")
+        return None
+
+    def update_message(self, ts: str, message: str) -> bool:
+        """
+        Edita en el sitio un mensaje publicado previamente.
+        Returns True if successful, False otherwise
+        """
+        try:
+            response = self.client.chat_update(channel=self.channel, ts=ts, text=message)
+            return response["ok"]
+        except SlackApiError as e:
+            logger.error(f"Error actualizando mensaje de Slack: {e.response.get('error', 'Unknown error')}")
+        except Exception as e:
+            logger.error(f"Error inesperado al actualizar mensaje de Slack: {str(e)}")
+        return False
+
+    def start_stream(self, header: str, min_interval: float = 1.5) -> "SlackMessageStream":
+        """
+        Crea un mensaje de Slack que se irá editando con resultados parciales.
+        """
+        return SlackMessageStream(self, header, min_interval)
+
+
+class SlackMessageStream:
+    """
+    Mensaje de Slack que se actualiza progresivamente a un ritmo limitado.
+
+    El primer fragmento publica el mensaje; los siguientes lo editan como mucho una
+    vez cada `min_interval` segundos. `finish` publica siempre el texto final.
+    """
+
+    def __init__(self, notifier: SlackNotifier, header: str, min_interval: float = 1.5):
+        self.notifier = notifier
+        self.header = header
+        self.min_interval = min_interval
+        self.ts = None
+        self.last_update = 0.0
+        self.pending = None
+
+    def _render(self, body: str, in_progress: bool) -> str:
+        suffix = "\n⏳ _Análisis en curso..._" if in_progress else ""
+        return f"{self.header}\n```\n{body}\n```{suffix}"
+
+    def update(self, body: str) -> None:
+        """
+        Actualiza el contenido parcial; la edición en Slack se limita en frecuencia.
+        """
+        self.pending = body
+        now = time.monotonic()
+        if self.ts is not None and now - self.last_update < self.min_interval:
+            return
+        self._push(self._render(body, in_progress=True))
+        self.last_update = now
+
+    def finish(self, body: str) -> bool:
+        """
+        Publica el contenido final del mensaje.
+        Returns True if successful, False otherwise
+        """
+        return self._push(self._render(body, in_progress=False))
+
+    def _push(self, message: str) -> bool:
+        if self.ts is None:
+            self.ts = self.notifier.post_message(message)
+            return self.ts is not None
+        return self.notifier.update_message(self.ts, message)
@@ -1,37 +1,217 @@
 """
-Utilidad para manejar los proveedores de IA (OpenAI, Claude, etc.)
+Utilidad para manejar los proveedores de IA (OpenAI, Claude, simulado, etc.)
 """
 
 import os
 import logging
+import threading
 from langchain_openai import ChatOpenAI
 from src.utils.claude_client import ClaudeClient
+from src.utils.fake_llm import FakeLLM
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.llm_client import LLMClient
+from src.utils.llm_metrics import get_metrics
+from src.utils.singleflight import SingleFlight
+from src.utils.rate_limiter import ProviderRateLimiter
+from src.utils.provider_group import ProviderGroup
 
 logger = logging.getLogger(__name__)
 
 class AIProvider:
     """
     Clase para manejar los proveedores de IA y proporcionar instancias de LLM.
+    
+    Las instancias se reutilizan entre módulos (y entre recargas de configuración)
+    cuando coinciden el proveedor, el modelo y la temperatura. Todas comparten una
+    caché persistente de respuestas para las llamadas deterministas, un deduplicador
+    de peticiones concurrentes idénticas y un limitador de velocidad por proveedor.
+    
+    Si AI_PROVIDERS indica varios proveedores (por ejemplo, "openai,claude"), se
+    devuelve un grupo con cobertura y conmutación por error entre ellos.
     """
     
-    @staticmethod
-    def get_llm(config=None):
+    _clients = {}
+    _groups = {}
+    _cache = None
+    _singleflight = SingleFlight()
+    _rate_limiters = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_cache(cls):
         """
-        Obtiene una instancia de LLM según la configuración y variables de entorno.
+        Obtiene la caché de respuestas compartida, creándola si es necesario.
+        
+        Se configura con las variables de entorno LLM_CACHE_ENABLED, LLM_CACHE_PATH,
+        LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES y LLM_CACHE_MAX_BYTES.
+        
+        Returns:
+            LLMResponseCache: Caché de respuestas, o None si está deshabilitada.
+        """
+        if cls._cache is None and os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'):
+            try:
+                cls._cache = LLMResponseCache(
+                    os.getenv('LLM_CACHE_PATH', os.path.join('.git_monitor_cache', 'llm_cache.sqlite')),
+                    ttl=int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600)),
+                    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 5000)),
+                    max_bytes=int(os.getenv('LLM_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+                )
+            except Exception as e:
+                logger.error(f"Error al inicializar la caché de respuestas LLM: {e}")
+        return cls._cache
+    
+    @classmethod
+    def get_cache_stats(cls):
+        """
+        Devuelve las estadísticas de la caché de respuestas.
+        
+        Returns:
+            dict: Estadísticas de la caché o diccionario vacío si está deshabilitada.
+        """
+        return cls._cache.get_stats() if cls._cache else {}
+    
+    @classmethod
+    def get_rate_limiter(cls, provider):
+        """
+        Obtiene el limitador de velocidad compartido de un proveedor.
+        
+        Args:
+            provider (str): Nombre del proveedor.
+        
+        Returns:
+            ProviderRateLimiter: Limitador del proveedor.
+        """
+        if provider not in cls._rate_limiters:
+            cls._rate_limiters[provider] = ProviderRateLimiter.for_provider(provider)
+        return cls._rate_limiters[provider]
+    
+    @classmethod
+    def get_rate_limit_stats(cls):
+        """
+        Devuelve el estado de los limitadores de velocidad.
+        
+        Returns:
+            dict: Estado por proveedor.
+        """
+        return {provider: limiter.get_stats() for provider, limiter in cls._rate_limiters.items()}
+    
+    @classmethod
+    def get_singleflight_stats(cls):
+        """
+        Devuelve los contadores de peticiones concurrentes agrupadas.
+        
+        Returns:
+            dict: Estadísticas del deduplicador.
+        """
+        return cls._singleflight.get_stats()
+    
+    @classmethod
+    def get_usage_stats(cls):
+        """
+        Devuelve las métricas de uso de los LLM por módulo y modelo.
+        
+        Returns:
+            dict: Totales y métricas por módulo (llamadas, tokens, latencia, caché, coste).
+        """
+        return get_metrics().get_stats()
+    
+    @classmethod
+    def get_provider_stats(cls):
+        """
+        Devuelve la salud de los proveedores de los grupos configurados con AI_PROVIDERS.
+        
+        Returns:
+            dict: Estado de cada grupo.
+        """
+        return {','.join(key[0]): group.get_stats() for key, group in cls._groups.items()}
+    
+    @classmethod
+    def get_llm(cls, config=None):
+        """
+        Obtiene una instancia de LLM compartida según la configuración y variables de entorno.
         
         Args:
             config (dict, opcional): Configuración específica para el LLM.
                 Puede incluir 'openai_model', 'temperature', etc.
         
         Returns:
-            object: Instancia de LLM (OpenAI o Claude).
+            LLMClient: Cliente que envuelve la instancia de LLM (OpenAI, Claude o simulado),
+                o ProviderGroup si AI_PROVIDERS indica varios proveedores.
         
         Raises:
             ValueError: Si no se encuentra la clave de API necesaria.
         """
         config = config or {}
-        ai_provider = os.getenv('AI_PROVIDER', 'openai').lower()
+        providers = [p.strip().lower() for p in os.getenv('AI_PROVIDERS', '').split(',') if p.strip()]
+        if len(providers) < 2:
+            return cls._get_client(providers[0] if providers else os.getenv('AI_PROVIDER', 'openai').lower(), config)
+        
+        key = (tuple(providers), config.get('openai_model', "gpt-3.5-turbo"), config.get('temperature', 0))
+        with cls._lock:
+            group = cls._groups.get(key)
+        if group is None:
+            members = []
+            for provider in providers:
+                try:
+                    members.append((provider, cls._get_client(provider, config)))
+                except Exception as e:
+                    logger.error(f"No se pudo inicializar el proveedor {provider} del grupo: {e}")
+            if not members:
+                raise ValueError(f"Ningún proveedor de AI_PROVIDERS está disponible: {providers}")
+            group = ProviderGroup(
+                members,
+                hedge_delay=float(os.getenv('LLM_HEDGE_DELAY', 8)),
+                failure_threshold=int(os.getenv('LLM_CIRCUIT_FAILURES', 5)),
+                reset_timeout=float(os.getenv('LLM_CIRCUIT_RESET', 30))
+            )
+            with cls._lock:
+                group = cls._groups.setdefault(key, group)
+        return group
+    
+    @classmethod
+    def _get_client(cls, ai_provider, config):
+        """
+        Obtiene el cliente compartido de un proveedor, creándolo si es necesario.
+        
+        Args:
+            ai_provider (str): Nombre del proveedor.
+            config (dict): Configuración específica para el LLM.
         
+        Returns:
+            LLMClient: Cliente del proveedor.
+        """
+        if ai_provider == 'claude':
+            model = ClaudeClient.MODEL_NAME
+        elif ai_provider == 'fake':
+            model = 'fake'
+        else:
+            model = config.get('openai_model', "gpt-3.5-turbo")
+        params = {'temperature': config.get('temperature', 0)}
+        key = (ai_provider, model, params['temperature'])
+        
+        with cls._lock:
+            if key not in cls._clients:
+                llm = cls._create_llm(ai_provider, config)
+                cls._clients[key] = LLMClient(llm, ai_provider, model, params,
+                                               cache=cls.get_cache(), singleflight=cls._singleflight,
+                                               rate_limiter=cls.get_rate_limiter(ai_provider))
+            return cls._clients[key]
+    
+    @staticmethod
+    def _create_llm(ai_provider, config):
+        """
+        Crea una nueva instancia de LLM para el proveedor indicado.
+        
+        Args:
+            ai_provider (str): Nombre del proveedor ('openai', 'claude' o 'fake').
+            config (dict): Configuración específica para el LLM.
+        
+        Returns:
+            object: Instancia de LLM (OpenAI o Claude).
+        
+        Raises:
+            ValueError: Si no se encuentra la clave de API necesaria.
+        """
         if ai_provider == 'openai':
             api_key = os.getenv('OPENAI_API_KEY')
             if not api_key:
@@ -48,6 +228,9 @@ class AIProvider:
             logger.info("Inicializando LLM con Claude")
             claude_client = ClaudeClient()
             return claude_client.llm
+        elif ai_provider == 'fake':
+            logger.info("Inicializando LLM simulado (sin llamadas a la red)")
+            return FakeLLM()
         else:
             logger.warning(f"Proveedor de IA no reconocido: {ai_provider}, usando OpenAI por defecto")
             api_key = os.getenv('OPENAI_API_KEY')
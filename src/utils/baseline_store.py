@@ -0,0 +1,245 @@
+"""
+Hallazgos de referencia (baseline) del repositorio: problemas ya existentes que los eventos no vuelven a notificar.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Archivo de la línea base (se puede cambiar con BASELINE_PATH)
+DEFAULT_BASELINE_PATH = os.path.join('.git_monitor_cache', 'baseline.sqlite')
+
+# Huellas por consulta (límite de parámetros de SQLite)
+QUERY_BATCH = 500
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def fingerprint(module, file_path, rule, anchor, occurrence=0):
+    """
+    Calcula la huella de un hallazgo.
+
+    La huella no incluye el número de línea, de modo que un problema que se desplaza
+    porque se añaden o quitan líneas por encima sigue siendo el mismo hallazgo.
+
+    Args:
+        module (str): Módulo que genera el hallazgo.
+        file_path (str): Ruta del archivo relativa al repositorio.
+        rule (str): Regla o tipo del hallazgo.
+        anchor (str): Texto que identifica el hallazgo dentro del archivo (mensaje, línea normalizada...).
+        occurrence (int, opcional): Número de hallazgos anteriores con la misma regla y ancla.
+
+    Returns:
+        str: Huella hexadecimal.
+    """
+    payload = '\0'.join([module, file_path.replace('\\', '/'), rule or '', anchor or '', str(occurrence)])
+    return hashlib.sha1(payload.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def fingerprints(module, file_path, keys):
+    """
+    Calcula las huellas de los hallazgos de un archivo, distinguiendo los repetidos por su orden.
+
+    Args:
+        module (str): Módulo que genera los hallazgos.
+        file_path (str): Ruta del archivo relativa al repositorio.
+        keys (list): Tuplas (regla, ancla) de cada hallazgo, en orden de aparición.
+
+    Returns:
+        list: Huella de cada hallazgo.
+    """
+    seen = {}
+    result = []
+    for key in keys:
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        result.append(fingerprint(module, file_path, key[0], key[1], occurrence))
+    return result
+
+
+class BaselineStore:
+    """
+    Hallazgos de referencia en SQLite, indexados por huella.
+
+    Además de los hallazgos guarda el blob analizado de cada archivo, lo que permite
+    reanudar un análisis interrumpido y volver a analizar solo los archivos que cambiaron.
+    """
+
+    def __init__(self, path):
+        """
+        Inicializa el almacén.
+
+        Args:
+            path (str): Ruta al archivo SQLite.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS findings ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " module TEXT NOT NULL,"
+            " file TEXT NOT NULL,"
+            " rule TEXT,"
+            " line INTEGER,"
+            " severity TEXT,"
+            " message TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_file ON findings(file)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " blob TEXT NOT NULL,"
+            " scanned_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def get_meta(self, key):
+        """
+        Obtiene un valor de los metadatos del análisis.
+
+        Args:
+            key (str): Clave.
+
+        Returns:
+            str: Valor, o None si no existe.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        """
+        Guarda un valor en los metadatos del análisis.
+
+        Args:
+            key (str): Clave.
+            value (str): Valor.
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def scanned_files(self):
+        """
+        Devuelve el blob analizado de cada archivo.
+
+        Returns:
+            dict: Blob de cada ruta.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT path, blob FROM files"))
+
+    def replace_files(self, results):
+        """
+        Sustituye los hallazgos de varios archivos por los de un nuevo análisis.
+
+        Args:
+            results (list): Tuplas (ruta, blob, hallazgos); cada hallazgo es un diccionario con
+                'fingerprint', 'module', 'rule', 'line', 'severity' y 'message'.
+        """
+        now = time.time()
+        with self._lock:
+            for path, blob, findings in results:
+                self._conn.execute("DELETE FROM findings WHERE file = ?", (path,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO findings (fingerprint, module, file, rule, line, severity, message)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(finding['fingerprint'], finding['module'], path, finding.get('rule'), finding.get('line'),
+                      finding.get('severity'), finding.get('message')) for finding in findings]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files (path, blob, scanned_at) VALUES (?, ?, ?)", (path, blob, now)
+                )
+            self._conn.commit()
+
+    def remove_files(self, paths):
+        """
+        Elimina los archivos que ya no están en el repositorio y sus hallazgos.
+
+        Args:
+            paths (iterable): Rutas a eliminar.
+        """
+        paths = list(paths)
+        with self._lock:
+            for start in range(0, len(paths), QUERY_BATCH):
+                batch = paths[start:start + QUERY_BATCH]
+                marks = ','.join('?' * len(batch))
+                self._conn.execute(f"DELETE FROM findings WHERE file IN ({marks})", batch)
+                self._conn.execute(f"DELETE FROM files WHERE path IN ({marks})", batch)
+            self._conn.commit()
+
+    def clear(self):
+        """Elimina todos los hallazgos y archivos analizados."""
+        with self._lock:
+            self._conn.execute("DELETE FROM findings")
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.commit()
+
+    def known(self, hashes):
+        """
+        Indica qué huellas pertenecen a la línea base.
+
+        Args:
+            hashes (iterable): Huellas a consultar.
+
+        Returns:
+            set: Huellas presentes en la línea base.
+        """
+        hashes = list(hashes)
+        found = set()
+        with self._lock:
+            for start in range(0, len(hashes), QUERY_BATCH):
+                batch = hashes[start:start + QUERY_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT fingerprint FROM findings WHERE fingerprint IN ({','.join('?' * len(batch))})", batch
+                )
+                found.update(row[0] for row in rows)
+        return found
+
+    def get_stats(self):
+        """
+        Devuelve el tamaño de la línea base.
+
+        Returns:
+            dict: Archivos analizados y hallazgos por módulo.
+        """
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            modules = dict(self._conn.execute("SELECT module, COUNT(*) FROM findings GROUP BY module"))
+        return {'files': files, 'findings': sum(modules.values()), 'by_module': modules}
+
+
+def get_baseline_store(path=None, create=False):
+    """
+    Obtiene el almacén de la línea base, compartido por todo el proceso.
+
+    Args:
+        path (str, opcional): Ruta al archivo SQLite (por defecto BASELINE_PATH o DEFAULT_BASELINE_PATH).
+        create (bool, opcional): Crear el archivo si no existe. Si es False y no existe,
+            no hay línea base y se devuelve None.
+
+    Returns:
+        BaselineStore: Almacén de la línea base, o None si no existe o no se puede abrir.
+    """
+    path = path or os.getenv('BASELINE_PATH', DEFAULT_BASELINE_PATH)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None and (create or os.path.exists(path)):
+            try:
+                store = _stores[path] = BaselineStore(path)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Error al abrir la línea base {path}: {e}")
+        return store
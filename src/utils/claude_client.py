@@ -5,6 +5,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ClaudeClient:
+    MODEL_NAME = "claude-3-sonnet-20240229"
+    
     def __init__(self):
         api_key = os.getenv('CLAUDE_API_KEY')
         if not api_key:
@@ -13,7 +15,7 @@ class ClaudeClient:
             
         logger.info("Inicializando ClaudeClient")
         self.llm = ChatAnthropic(
-            model_name="claude-3-sonnet-20240229",
+            model_name=self.MODEL_NAME,
             temperature=0,
             anthropic_api_key=api_key
         )
@@ -0,0 +1,86 @@
+"""
+División de archivos grandes en fragmentos que caben en un prompt, cortando por límites sintácticos.
+"""
+
+import re
+import bisect
+from src.utils.prompt_builder import estimate_tokens
+from src.utils.python_structure import parse_python
+from src.utils.js_structure import parse_javascript, JS_EXTENSIONS
+from src.utils.source_index import get_source_index
+
+# Tokens adicionales de cada línea por su número de línea al mostrarla en el prompt
+LINE_NUMBER_TOKENS = 4
+
+# En otros lenguajes, una línea sin indentar tras una línea vacía o tras el cierre de un
+# bloque suele empezar una declaración de primer nivel
+_TOP_LEVEL_START = re.compile(r'^[^\s}\])]')
+_BLOCK_END = re.compile(r'^(?:\s*$|[}\])].*|.*;\s*$)')
+
+
+def _boundaries(content, file_ext, index):
+    """
+    Calcula las líneas por las que se puede cortar un archivo sin partir una definición.
+
+    Args:
+        content (str): Contenido del archivo.
+        file_ext (str): Extensión del archivo (con el punto).
+        index (SourceIndex): Índice de líneas del contenido.
+
+    Returns:
+        list: Líneas (base 1) en las que puede empezar un fragmento, ordenadas.
+    """
+    structure = None
+    if file_ext == '.py':
+        structure = parse_python(content)
+    elif file_ext in JS_EXTENSIONS:
+        structure = parse_javascript(content)
+    if structure is not None:
+        lines = set()
+        for definition in structure.definitions:
+            lines.add(definition.start_line)
+            lines.add(definition.end_line + 1)
+        return sorted(line for line in lines if 1 < line <= index.line_count)
+
+    lines = []
+    previous = ''
+    for line_num, line in index.lines():
+        if line_num > 1 and _TOP_LEVEL_START.match(line) and _BLOCK_END.match(previous):
+            lines.append(line_num)
+        previous = line
+    return lines
+
+
+def split_code(content, file_ext, budget):
+    """
+    Divide un archivo en fragmentos consecutivos de como mucho `budget` tokens.
+
+    Cada fragmento se corta en la última frontera sintáctica que cabe en el presupuesto:
+    el inicio o el final de una función o clase en Python y JavaScript/TypeScript (según
+    su estructura), o una declaración de primer nivel en otros lenguajes. Solo una definición que por sí
+    sola no cabe se corta por líneas.
+
+    Args:
+        content (str): Contenido del archivo.
+        file_ext (str): Extensión del archivo (con el punto).
+        budget (int): Tokens máximos de cada fragmento (contando el número de línea).
+
+    Returns:
+        list: Rangos (primera, última línea) de cada fragmento, que cubren todo el archivo.
+    """
+    index = get_source_index(content)
+    boundaries = _boundaries(content, file_ext, index)
+    chunks = []
+    start, used = 1, 0
+    for line_num, line in index.lines():
+        cost = estimate_tokens(line) + LINE_NUMBER_TOKENS
+        if used + cost > budget and line_num > start:
+            # Última frontera dentro del fragmento actual; si no hay, se corta en esta línea
+            position = bisect.bisect_right(boundaries, line_num) - 1
+            cut = boundaries[position] if position >= 0 and boundaries[position] > start else line_num
+            chunks.append((start, cut - 1))
+            start = cut
+            used = sum(estimate_tokens(text) + LINE_NUMBER_TOKENS for _, text in index.lines(cut, line_num - 1))
+        used += cost
+    chunks.append((start, index.line_count))
+    return chunks
@@ -0,0 +1,214 @@
+"""
+Ámbito de una revisión limitada a un diff: líneas modificadas (lado nuevo) ampliadas al bloque que las contiene.
+"""
+
+import re
+import bisect
+from src.utils.python_structure import parse_python
+from src.utils.js_structure import parse_javascript, JS_EXTENSIONS
+
+# Líneas de contexto alrededor de cada cambio cuando no hay un bloque sintáctico que lo contenga
+DEFAULT_CONTEXT_LINES = 3
+
+# Bloques más largos no se incluyen completos: solo su cabecera y el contexto del cambio
+MAX_BLOCK_LINES = 200
+
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+
+
+def changed_lines(diff):
+    """
+    Obtiene las líneas del lado nuevo afectadas por un diff unificado.
+
+    Además de las líneas añadidas o modificadas, cada eliminación marca la línea
+    nueva en la que se produjo, para que el bloque que la contenía se revise.
+
+    Args:
+        diff (str): Diff en formato unificado de un archivo.
+
+    Returns:
+        list: Números de línea (base 1), ordenados y sin repetir.
+    """
+    changed = set()
+    new_line = None
+    for line in (diff or '').split('\n'):
+        header = _HUNK_HEADER.match(line)
+        if header:
+            new_line = int(header.group(1))
+            continue
+        if new_line is None:
+            continue
+        if line.startswith('diff --git'):
+            new_line = None
+        elif line.startswith('+'):
+            changed.add(new_line)
+            new_line += 1
+        elif line.startswith('-'):
+            changed.add(max(new_line, 1))
+        elif not line.startswith('\\'):
+            new_line += 1
+    return sorted(changed)
+
+
+class DiffScope:
+    """
+    Rangos de líneas del lado nuevo que cubre un cambio.
+
+    Cada línea modificada se amplía a la función o clase más interna que la contiene
+    (en Python y JavaScript/TypeScript) o a unas líneas de contexto, y los rangos
+    solapados se fusionan. Las comprobaciones que reciben un ámbito solo recorren estos
+    rangos, de modo que el trabajo depende del tamaño del cambio y no del tamaño del archivo.
+    """
+
+    def __init__(self, lines, ranges):
+        """
+        Inicializa el ámbito.
+
+        Args:
+            lines (list): Líneas modificadas (base 1), ordenadas.
+            ranges (list): Rangos (primera, última línea) a revisar.
+        """
+        self.changed_lines = list(lines)
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self.ranges = merged
+        self._starts = [start for start, _ in merged]
+
+    @classmethod
+    def from_diff(cls, diff, content, file_ext, context=DEFAULT_CONTEXT_LINES):
+        """
+        Calcula el ámbito de un archivo a partir de su diff.
+
+        Args:
+            diff (str): Diff unificado del archivo.
+            content (str): Contenido del archivo en el lado nuevo.
+            file_ext (str): Extensión del archivo (con el punto).
+            context (int, opcional): Líneas de contexto alrededor de los cambios sin bloque.
+
+        Returns:
+            DiffScope: Ámbito del cambio.
+        """
+        line_count = content.count('\n') + 1
+        lines = [line for line in changed_lines(diff) if line <= line_count]
+
+        structure = None
+        if lines and file_ext == '.py':
+            structure = parse_python(content)
+        elif lines and file_ext in JS_EXTENSIONS:
+            structure = parse_javascript(content)
+        definitions = structure.definitions if structure is not None else []
+        def_lines = [definition.line for definition in definitions]
+
+        ranges = []
+        for line in lines:
+            around = (max(1, line - context), min(line_count, line + context))
+            block = cls._enclosing_block(definitions, def_lines, line)
+            if block is None:
+                ranges.append(around)
+            elif block.end_line - block.start_line < MAX_BLOCK_LINES:
+                ranges.append((block.start_line, block.end_line))
+            else:
+                ranges.append((block.start_line, block.body_line - 1))
+                ranges.append(around)
+        return cls(lines, ranges)
+
+    @staticmethod
+    def _enclosing_block(definitions, def_lines, line):
+        """
+        Busca la definición más interna que contiene una línea.
+
+        Args:
+            definitions (list): Definiciones (Definition) ordenadas por línea.
+            def_lines (list): Línea de 'def'/'class' de cada definición.
+            line (int): Línea buscada.
+
+        Returns:
+            Definition: Definición más interna, o None si la línea está fuera de todas.
+        """
+        position = bisect.bisect_right(def_lines, line)
+        # Decoradores: la línea está antes de 'def' pero dentro de la siguiente definición
+        if position < len(definitions) and definitions[position].start_line <= line:
+            return definitions[position]
+        # Las definiciones anidadas empiezan después de la que las contiene: la primera
+        # que contiene la línea recorriendo hacia atrás es la más interna
+        for definition in reversed(definitions[:position]):
+            if definition.start_line <= line <= definition.end_line:
+                return definition
+        return None
+
+    @property
+    def is_empty(self):
+        """True si el cambio no afecta a ninguna línea del lado nuevo."""
+        return not self.ranges
+
+    @property
+    def line_count(self):
+        """Número de líneas dentro del ámbito."""
+        return sum(end - start + 1 for start, end in self.ranges)
+
+    def contains(self, line_num):
+        """
+        Indica si una línea está dentro del ámbito.
+
+        Args:
+            line_num (int): Número de línea (base 1).
+
+        Returns:
+            bool: True si la línea pertenece a algún rango.
+        """
+        position = bisect.bisect_right(self._starts, line_num) - 1
+        return position >= 0 and line_num <= self.ranges[position][1]
+
+    def touches(self, start_line, end_line):
+        """
+        Indica si alguna línea modificada está dentro de un rango.
+
+        Args:
+            start_line (int): Primera línea del rango.
+            end_line (int): Última línea del rango.
+
+        Returns:
+            bool: True si el cambio modifica alguna línea del rango.
+        """
+        position = bisect.bisect_left(self.changed_lines, start_line)
+        return position < len(self.changed_lines) and self.changed_lines[position] <= end_line
+
+    def segments(self, index):
+        """
+        Recorre el texto de cada rango.
+
+        Args:
+            index (SourceIndex): Índice de líneas del contenido.
+
+        Yields:
+            tuple: (posición del rango en el contenido, texto del rango).
+        """
+        for start, end in self.ranges:
+            if start <= index.line_count:
+                yield index.line_starts[start - 1], index.text_range(start, end)
+
+    def render(self, index):
+        """
+        Genera el texto del ámbito con los números de línea del lado nuevo.
+
+        Args:
+            index (SourceIndex): Índice de líneas del contenido.
+
+        Returns:
+            str: Líneas del ámbito con su número, marcando los huecos omitidos.
+        """
+        output = []
+        previous = 0
+        for start, end in self.ranges:
+            if start > previous + 1:
+                output.append(f"      ... ({start - previous - 1} líneas omitidas) ...")
+            for line_num, line in index.lines(start, end):
+                output.append(f"{line_num:>5}| {line}")
+            previous = end
+        if previous < index.line_count:
+            output.append(f"      ... ({index.line_count - previous} líneas omitidas) ...")
+        return '\n'.join(output)
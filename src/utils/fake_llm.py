@@ -0,0 +1,231 @@
+"""
+Proveedor de LLM simulado (sin red ni claves de API) para pruebas de carga.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+from src.utils.prompt_builder import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class FakeRateLimitError(Exception):
+    """Error 429 simulado, con cabecera Retry-After."""
+
+    status_code = 429
+
+    def __init__(self, retry_after=1):
+        super().__init__("Rate limit exceeded (simulado)")
+        self.response = type('FakeResponse', (), {
+            'status_code': 429,
+            'headers': {'retry-after': str(retry_after)}
+        })()
+
+
+class FakeTimeoutError(TimeoutError):
+    """Timeout simulado del proveedor."""
+
+
+class FakeMessage:
+    """Mensaje de respuesta con la misma interfaz básica que los de LangChain."""
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """
+    LLM simulado que devuelve JSON válido para los esquemas que esperan los módulos.
+
+    Se configura con variables de entorno:
+        FAKE_LLM_LATENCY: distribución de latencia en milisegundos
+            ('fixed:200', 'uniform:100:800' o 'lognormal:300:0.5').
+        FAKE_LLM_RATE_LIMIT_RATE: probabilidad de devolver un 429.
+        FAKE_LLM_TIMEOUT_RATE: probabilidad de un timeout.
+        FAKE_LLM_MALFORMED_RATE: probabilidad de devolver JSON mal formado.
+        FAKE_LLM_SEED: semilla para resultados reproducibles.
+    """
+
+    def __init__(self, latency=None, rate_limit_rate=None, timeout_rate=None, malformed_rate=None, seed=None):
+        """
+        Inicializa el LLM simulado.
+
+        Args:
+            latency (str, opcional): Distribución de latencia.
+            rate_limit_rate (float, opcional): Probabilidad de error 429.
+            timeout_rate (float, opcional): Probabilidad de timeout.
+            malformed_rate (float, opcional): Probabilidad de JSON mal formado.
+            seed (int, opcional): Semilla del generador aleatorio.
+        """
+        self.latency = latency or os.getenv('FAKE_LLM_LATENCY', 'lognormal:300:0.5')
+        self.rate_limit_rate = float(rate_limit_rate if rate_limit_rate is not None
+                                     else os.getenv('FAKE_LLM_RATE_LIMIT_RATE', 0))
+        self.timeout_rate = float(timeout_rate if timeout_rate is not None
+                                  else os.getenv('FAKE_LLM_TIMEOUT_RATE', 0))
+        self.malformed_rate = float(malformed_rate if malformed_rate is not None
+                                    else os.getenv('FAKE_LLM_MALFORMED_RATE', 0))
+        seed = seed if seed is not None else os.getenv('FAKE_LLM_SEED')
+        self._random = random.Random(int(seed) if seed is not None else None)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _sample_latency(self):
+        """
+        Obtiene una latencia (en segundos) según la distribución configurada.
+
+        Returns:
+            float: Latencia en segundos.
+        """
+        kind, _, params = self.latency.partition(':')
+        values = [float(v) for v in params.split(':') if v]
+        with self._lock:
+            if kind == 'fixed':
+                millis = values[0] if values else 0
+            elif kind == 'uniform':
+                millis = self._random.uniform(values[0], values[1])
+            else:
+                mean = values[0] if values else 300
+                sigma = values[1] if len(values) > 1 else 0.5
+                millis = self._random.lognormvariate(0, sigma) * mean
+        return millis / 1000.0
+
+    def _roll(self, probability):
+        """Devuelve True con la probabilidad indicada."""
+        with self._lock:
+            return probability > 0 and self._random.random() < probability
+
+    def invoke(self, prompt, **kwargs):
+        """
+        Simula una llamada al LLM.
+
+        Args:
+            prompt (str): Prompt recibido.
+
+        Returns:
+            FakeMessage: Respuesta simulada.
+
+        Raises:
+            FakeRateLimitError: Si se inyecta un error 429.
+            FakeTimeoutError: Si se inyecta un timeout.
+        """
+        prompt = str(prompt)
+        time.sleep(self._sample_latency())
+
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += estimate_tokens(prompt)
+
+        if self._roll(self.rate_limit_rate):
+            with self._lock:
+                self.errors += 1
+            raise FakeRateLimitError()
+        if self._roll(self.timeout_rate):
+            with self._lock:
+                self.errors += 1
+            raise FakeTimeoutError("Request timed out (simulado)")
+
+        content = self._build_response(prompt)
+        if self._roll(self.malformed_rate):
+            content = content[:max(1, len(content) // 2)]
+
+        with self._lock:
+            self.completion_tokens += estimate_tokens(content)
+        return FakeMessage(content)
+
+    def stream(self, prompt, **kwargs):
+        """
+        Simula una respuesta en streaming dividiendo la respuesta en fragmentos.
+
+        Args:
+            prompt (str): Prompt recibido.
+
+        Yields:
+            FakeMessage: Fragmentos de la respuesta.
+        """
+        content = self.invoke(prompt).content
+        for start in range(0, len(content), 40):
+            yield FakeMessage(content[start:start + 40])
+
+    def _build_response(self, prompt):
+        """
+        Genera una respuesta coherente con el esquema que espera el módulo que hace la petición.
+
+        Args:
+            prompt (str): Prompt recibido.
+
+        Returns:
+            str: Respuesta simulada.
+        """
+        if '"files"' in prompt and '"issues"' in prompt:
+            paths = re.findall(r'^\s*### Archivo: (.+)$', prompt, re.MULTILINE)
+            payload = {'files': {path.strip(): self._review(path.strip()) for path in paths}}
+        elif '"issues"' in prompt:
+            match = re.search(r'Archivo: (.+)', prompt)
+            payload = self._review(match.group(1).strip() if match else 'archivo')
+        elif '"risk_level"' in prompt:
+            payload = {
+                'risk_level': self._random.choice(['low', 'medium', 'high']),
+                'summary': 'Análisis de impacto simulado',
+                'affected_areas': [{'name': 'core', 'impact': 'Cambio simulado', 'risk_score': 3}],
+                'suggested_tests': ['Ejecutar las pruebas unitarias del módulo modificado']
+            }
+        elif '"docstring":' in prompt:
+            items = re.findall(r'--- \[(\d+)\] (FUNCTION|CLASS): ([\w.$]+)', prompt)
+            payload = [{
+                'id': int(position),
+                'type': kind.lower(),
+                'name': name,
+                'docstring': f'"""{name}: docstring simulado."""'
+            } for position, kind, name in items]
+        elif '"title"' in prompt and '"footer"' in prompt:
+            payload = {
+                'title': 'chore: actualizar archivos',
+                'body': 'Mensaje de commit simulado.',
+                'footer': ''
+            }
+        else:
+            return "📋 *Resumen simulado*\n\n- Archivos modificados\n- Impacto bajo"
+
+        return f"```json\n{json.dumps(payload, ensure_ascii=False, indent=2)}\n```"
+
+    def _review(self, path):
+        """
+        Genera una revisión simulada para un archivo.
+
+        Args:
+            path (str): Ruta del archivo.
+
+        Returns:
+            dict: Revisión con problemas y resumen.
+        """
+        issues = [{
+            'line': self._random.randint(1, 50),
+            'severity': self._random.choice(['low', 'medium', 'high']),
+            'type': 'quality',
+            'message': 'Problema simulado',
+            'suggestion': 'Sugerencia simulada'
+        } for _ in range(self._random.randint(0, 2))]
+        return {'issues': issues, 'summary': f'Revisión simulada de {path}'}
+
+    def get_stats(self):
+        """
+        Devuelve la contabilidad de llamadas y tokens.
+
+        Returns:
+            dict: Llamadas, errores inyectados y tokens de prompt y respuesta.
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens
+            }
@@ -0,0 +1,123 @@
+"""
+Parser incremental de arrays JSON para respuestas de LLM recibidas en streaming.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalArrayParser:
+    """
+    Extrae los objetos de un array JSON a medida que se completan en el texto recibido.
+
+    Por ejemplo, para la clave "issues" devuelve cada elemento de
+    `{"issues": [{...}, {...}]}` en cuanto se cierra su llave, sin esperar al
+    final de la respuesta.
+    """
+
+    def __init__(self, key):
+        """
+        Inicializa el parser.
+
+        Args:
+            key (str): Clave del array a extraer (None para un array en la raíz).
+        """
+        self.key = key
+        self.buffer = ''
+        self.items = []
+        self._pos = 0
+        self._array_start = None
+        self._depth = 0
+        self._item_start = None
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    def feed(self, text):
+        """
+        Añade texto recibido y devuelve los objetos completados.
+
+        Args:
+            text (str): Fragmento de texto de la respuesta.
+
+        Returns:
+            list: Objetos nuevos completados en este fragmento.
+        """
+        self.buffer += text
+        if self._done:
+            return []
+
+        if self._array_start is None:
+            self._array_start = self._find_array_start()
+            if self._array_start is None:
+                return []
+            self._pos = self._array_start + 1
+
+        new_items = []
+        buffer = self.buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0 and char == ']':
+                    self._done = True
+                    self._pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    item = self._decode(buffer[self._item_start:self._pos + 1])
+                    if item is not None:
+                        self.items.append(item)
+                        new_items.append(item)
+                    self._item_start = None
+            self._pos += 1
+
+        return new_items
+
+    def _find_array_start(self):
+        """
+        Busca el corchete de apertura del array objetivo.
+
+        Returns:
+            int: Posición del corchete o None si aún no se ha recibido.
+        """
+        if self.key is None:
+            index = self.buffer.find('[')
+            return index if index >= 0 else None
+
+        marker = self.buffer.find(f'"{self.key}"')
+        if marker < 0:
+            return None
+        index = self.buffer.find('[', marker)
+        return index if index >= 0 else None
+
+    def _decode(self, text):
+        """
+        Decodifica un objeto JSON completo.
+
+        Args:
+            text (str): Texto del objeto.
+
+        Returns:
+            object: Objeto decodificado o None si no es válido.
+        """
+        try:
+            return json.loads(text)
+        except ValueError:
+            logger.debug(f"Elemento JSON incremental no válido: {text[:100]}")
+            return None
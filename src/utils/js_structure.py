@@ -0,0 +1,456 @@
+"""
+Estructura de un archivo JavaScript/TypeScript (funciones, clases y JSDoc) obtenida con un tokenizador de una sola pasada.
+
+No es un analizador completo: reconoce los literales (strings, comentarios, plantillas y
+expresiones regulares) para no confundir su contenido con código, y sigue las llaves y
+paréntesis para localizar declaraciones de funciones, clases, métodos y funciones flecha
+con nombre. Las definiciones usan el mismo `Definition` que la estructura de Python, de
+modo que los módulos tratan ambos lenguajes igual.
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from src.utils.source_index import get_source_index
+from src.utils.python_structure import Definition, Assignment
+
+# Extensiones que se analizan con este tokenizador
+JS_EXTENSIONS = ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx')
+
+# Estructuras recientes que se conservan, por hash del contenido
+MAX_CACHED_STRUCTURES = 32
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<template>`)
+  | (?P<name>[A-Za-z_$\u0080-￿][\w$\u0080-￿]*)
+  | (?P<number>\.?\d[\w.]*)
+  | (?P<slash>/)
+  | (?P<punct>=>|\?\.|\.\.\.|===|!==|==|!=|<=|>=|&&=?|\|\|=?|\?\?=?|\+\+|--|[-+*%&|^<>]=|\S)
+)''', re.VERBOSE | re.DOTALL)
+
+# Texto de una plantilla hasta su final o hasta la siguiente expresión ${...}
+_TEMPLATE_TEXT = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*(`|\$\{|\Z)', re.DOTALL)
+
+_REGEX_LITERAL = re.compile(r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+
+# Tras estas palabras clave, una barra empieza una expresión regular y no una división
+_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case',
+                   'do', 'else', 'yield', 'await'}
+
+_KEYWORDS = _REGEX_KEYWORDS | {'if', 'for', 'while', 'switch', 'catch', 'function', 'class', 'const', 'let',
+                               'var', 'import', 'export', 'default', 'extends', 'try', 'finally', 'with',
+                               'super', 'this'}
+
+# Modificadores que pueden preceder al nombre de un miembro de clase
+_MODIFIERS = {'static', 'public', 'private', 'protected', 'readonly', 'async', 'get', 'set', 'abstract',
+              'override', 'declare', 'accessor'}
+
+# Un salto de línea tras estos tokens, o antes de estos otros, no termina la sentencia
+_CONTINUES_AFTER = {'=', '=>', ',', '(', '[', '.', '?.', ':', '?', '+', '-', '*', '/', '%', '&&', '||', '??',
+                    '&', '|', '^', '!', '~', '<', '>', '==', '===', '!=', '!==', '<=', '>=', '+=', '-=', '*=',
+                    '%=', '&=', '|=', '^=', '&&=', '||=', '??=', '...', '@', 'extends', 'implements', 'new',
+                    'return', 'typeof', 'instanceof', 'in', 'of', 'async', 'export', 'default', 'const', 'let',
+                    'var', 'static', 'public', 'private', 'protected', 'readonly', 'abstract', 'declare'}
+_CONTINUES_BEFORE = {'=', '=>', ',', ')', ']', '.', '?.', ':', '?', '+', '*', '/', '%', '&&', '||', '??', '&',
+                     '|', '^', '<', '>', '==', '===', '!=', '!==', '<=', '>=', '+=', '-=', '*=', '%=', '&=',
+                     '|=', '^=', 'extends', 'implements', 'else', 'catch', 'finally', 'in', 'of', 'instanceof'}
+
+# Líneas que solo cierran un bloque y no cuentan en la longitud de una función
+_CLOSING_LINE = re.compile(r'^\s*[})\]]+[;,)]*\s*$')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ScriptStructure:
+    """Funciones, clases, variables y comentarios JSDoc de un archivo JavaScript/TypeScript."""
+
+    def __init__(self, definitions, assignments, jsdoc, masked):
+        """
+        Inicializa la estructura.
+
+        Args:
+            definitions (list): Funciones y clases (Definition), ordenadas por línea.
+            assignments (list): Variables declaradas con const, let o var (Assignment).
+            jsdoc (list): Rangos (primera, última línea) de los comentarios JSDoc.
+            masked (str): Contenido con strings, comentarios, plantillas y expresiones regulares
+                sustituidos por espacios (misma longitud y mismos saltos de línea).
+        """
+        self.definitions = definitions
+        self.assignments = assignments
+        self.jsdoc = jsdoc
+        self.masked = masked
+
+    @property
+    def functions(self):
+        """Funciones, métodos y funciones flecha con nombre."""
+        return [definition for definition in self.definitions if definition.kind == 'function']
+
+    @property
+    def classes(self):
+        """Clases (incluidas las anidadas)."""
+        return [definition for definition in self.definitions if definition.kind == 'class']
+
+
+class _Frame:
+    """Bloque entre llaves y estado de la sentencia en curso dentro de él."""
+
+    __slots__ = ('kind', 'definition', 'parens', 'new_statement', 'statement_start', 'doc', 'decl', 'decl_name',
+                 'member_name', 'name_pos', 'is_async', 'decorators_only', 'leading', 'defined', 'assigned',
+                 'angles', 'group', 'group_async', 'pending')
+
+    def __init__(self, kind, definition=None):
+        self.kind = kind
+        self.definition = definition
+        self.parens = []
+        self.new_statement = True
+        self.reset(0, False)
+
+    def reset(self, start, doc, keep_decl=False):
+        """Empieza una sentencia (o un miembro de clase) en la posición indicada."""
+        self.statement_start = start
+        self.doc = doc
+        if not keep_decl:
+            self.decl = False
+        self.decl_name = None
+        self.member_name = None
+        self.name_pos = start
+        self.is_async = False
+        self.decorators_only = False
+        self.leading = True
+        self.defined = False
+        self.assigned = False
+        self.angles = 0
+        self.group = None
+        self.group_async = False
+        self.pending = None
+
+
+class _Parser:
+    """Recorre los tokens una vez, generando el contenido enmascarado y las definiciones."""
+
+    def __init__(self, content):
+        self.content = content
+        self.index = get_source_index(content)
+        self.masked = []
+        self.masked_until = 0
+        self.definitions = []
+        self.assignments = []
+        self.jsdoc = []
+        self.frames = [_Frame('block')]
+
+    def mask(self, start, end):
+        """Sustituye por espacios un literal, conservando los saltos de línea."""
+        if end <= start:
+            return
+        self.masked.append(self.content[self.masked_until:start])
+        self.masked.append(re.sub(r'[^\n]', ' ', self.content[start:end]))
+        self.masked_until = end
+
+    def line(self, pos):
+        """Número de línea (base 1) de una posición."""
+        return self.index.line_of(pos)
+
+    def parse(self):
+        """Analiza el contenido y devuelve su estructura (ScriptStructure)."""
+        content = self.content
+        pos = 0
+        prev, prev_kind, prev_end = None, None, 0
+        doc = False
+        length = len(content)
+
+        while pos < length:
+            match = _TOKEN.match(content, pos)
+            if match is None:
+                break
+            kind = match.lastgroup
+            start, pos = match.start(kind), match.end()
+            value = match.group(kind)
+
+            if kind == 'comment':
+                self.mask(start, pos)
+                if value.startswith('/**') and value != '/**/':
+                    self.jsdoc.append((self.line(start), self.line(pos - 1)))
+                    doc = True
+                continue
+
+            frame = self.frames[-1]
+            if kind == 'slash':
+                regex_allowed = (prev is None or (prev_kind == 'punct' and prev not in (')', ']'))
+                                 or (prev_kind == 'name' and prev in _REGEX_KEYWORDS))
+                literal = _REGEX_LITERAL.match(content, start) if regex_allowed else None
+                if literal:
+                    pos = literal.end()
+                    self.mask(start + 1, pos)
+                    kind, value = 'regex', literal.group(0)
+                else:
+                    kind = 'punct'
+                    if content.startswith('/=', start):
+                        pos, value = start + 2, '/='
+
+            if not frame.parens:
+                self.statement_boundary(frame, kind, value, start, prev, prev_end, doc)
+            doc = False
+
+            if kind == 'string':
+                self.mask(start + 1, pos - 1 if len(value) > 1 and value[-1] == value[0] else pos)
+            elif kind == 'template':
+                pos = self.template(pos)
+            elif kind == 'name':
+                if not frame.parens:
+                    self.name(frame, value, start, prev)
+            elif kind == 'punct':
+                pos = self.punct(frame, value, start, pos, prev)
+
+            prev, prev_kind, prev_end = value, kind, pos
+
+        self.masked.append(content[self.masked_until:])
+        for frame in reversed(self.frames):
+            self.close_expression(frame, prev_end)
+            if frame.definition is not None:
+                self.finish(frame.definition, self.index.line_count)
+        return self.structure()
+
+    def statement_boundary(self, frame, kind, value, start, prev, prev_end, doc):
+        """Decide si el token empieza una sentencia nueva (o un miembro de clase)."""
+        if frame.new_statement:
+            new = True
+        elif frame.decorators_only or frame.pending is not None and value == '{':
+            new = False
+        else:
+            new = (self.content.find('\n', prev_end, start) != -1 and prev not in _CONTINUES_AFTER
+                   and value not in _CONTINUES_BEFORE)
+        if new:
+            self.close_expression(frame, prev_end)
+            frame.reset(start, doc, keep_decl=frame.new_statement == 'declarators')
+            frame.decorators_only = value == '@'
+        frame.new_statement = False
+
+    def name(self, frame, value, start, prev):
+        """Procesa un identificador o palabra clave fuera de paréntesis."""
+        pending = frame.pending
+        if value in ('function', 'class'):
+            frame.pending = {
+                'kind': value if value == 'class' else 'function', 'name': None, 'name_pos': start,
+                'keyword_pos': start, 'params': None if value == 'function' else '', 'bases': '',
+                'bases_start': None, 'is_async': prev == 'async', 'expect_name': True,
+                'decl_name': frame.decl_name or frame.member_name
+            }
+            return
+        if pending is not None and pending.get('expect_name') and value not in _KEYWORDS:
+            pending['name'], pending['name_pos'] = value, start
+            pending['expect_name'] = False
+            return
+        if pending is not None and pending['kind'] == 'class':
+            pending['expect_name'] = False
+            if value == 'extends':
+                pending['bases_start'] = start + len(value)
+            elif value == 'implements' and pending['bases_start'] is not None and not pending['bases']:
+                pending['bases'] = self.content[pending['bases_start']:start].strip()
+            return
+
+        if frame.decorators_only and prev not in ('@', '.'):
+            frame.decorators_only = False
+        if value in ('const', 'let', 'var'):
+            frame.decl = True
+        elif frame.decl and frame.decl_name is None and prev in ('const', 'let', 'var', ','):
+            frame.decl_name, frame.name_pos = value, start
+            self.assignments.append(Assignment(value, self.line(start)))
+        elif value == 'async':
+            frame.is_async = True
+        elif frame.kind == 'class' and frame.member_name is None and not frame.decorators_only \
+                and prev not in ('@', '.') and value not in _MODIFIERS:
+            frame.member_name, frame.name_pos = value, start
+
+    def punct(self, frame, value, start, pos, prev):
+        """Procesa un signo de puntuación y devuelve la posición desde la que seguir."""
+        if value in ('(', '['):
+            if not frame.parens and value == '(':
+                frame.group_async = prev == 'async'
+                # Método: primer paréntesis de un miembro sin inicializador (puede llevar genéricos <...>)
+                if frame.kind == 'class' and frame.pending is None and frame.member_name is not None \
+                        and frame.group is None and not frame.assigned:
+                    frame.pending = {'kind': 'function', 'name': frame.member_name, 'name_pos': frame.name_pos,
+                                     'keyword_pos': frame.name_pos, 'params': None, 'bases': '',
+                                     'is_async': frame.is_async, 'expect_name': False}
+            frame.parens.append(start)
+        elif value in (')', ']'):
+            if frame.parens:
+                open_pos = frame.parens.pop()
+                if not frame.parens and value == ')':
+                    frame.group = self.content[open_pos + 1:start]
+                    if frame.pending is not None and frame.pending['params'] is None:
+                        frame.pending['params'] = frame.group
+        elif value == '{':
+            self.open_block(frame, start, prev)
+        elif value == '}':
+            return self.close_block(start, pos)
+        elif frame.parens:
+            pass
+        elif value == '=>':
+            self.arrow(frame, start, prev)
+        elif value == ';':
+            self.close_expression(frame, start)
+            frame.pending = None
+            frame.new_statement = True
+        elif value == ',' and frame.kind != 'class':
+            self.close_expression(frame, start)
+            frame.pending = None
+            frame.new_statement = 'declarators' if frame.decl else True
+        elif value == ':' and prev is not None and frame.decl_name is None and frame.kind != 'class' \
+                and frame.member_name is None and re.match(r'[A-Za-z_$]', prev):
+            # Propiedad de un objeto literal: nombre: function () {...} o nombre: () => {...}
+            frame.member_name, frame.name_pos = prev, start - len(prev)
+        elif value == '@' and frame.leading:
+            frame.decorators_only = True
+        elif value == '<':
+            frame.angles += 1
+        elif value == '>':
+            frame.angles = max(frame.angles - 1, 0)
+        elif value == '=' and not frame.angles:
+            frame.assigned = True
+        if value != '@':
+            frame.leading = False
+        return pos
+
+    def arrow(self, frame, start, prev):
+        """Registra una función flecha con nombre (variable, campo de clase o propiedad)."""
+        name = frame.decl_name or frame.member_name
+        if name is None:
+            return
+        params = frame.group if prev == ')' or frame.group is not None else prev
+        frame.pending = {'kind': 'function', 'name': name, 'name_pos': frame.name_pos,
+                         'keyword_pos': frame.name_pos, 'params': params or '', 'bases': '',
+                         'is_async': frame.group_async or frame.is_async, 'expect_name': False,
+                         'arrow': start}
+
+    def open_block(self, frame, start, prev):
+        """Abre un bloque: cuerpo de una definición pendiente o bloque sin definición."""
+        pending = frame.pending if not frame.parens else None
+        if pending is not None and pending.get('arrow') is not None and prev != '=>':
+            # Objeto literal dentro del cuerpo sin llaves de una función flecha
+            self.frames.append(_Frame('block'))
+            return
+        if pending is not None and (pending['params'] is not None or pending['kind'] == 'class') \
+                and pending.get('name') is None and pending.get('decl_name'):
+            pending['name'], pending['name_pos'] = pending['decl_name'], frame.name_pos
+        if pending is not None and pending.get('name') and (pending['params'] is not None or pending['kind'] == 'class'):
+            if pending['kind'] == 'class' and pending.get('bases_start') is not None and not pending['bases']:
+                pending['bases'] = self.content[pending['bases_start']:start].strip()
+            definition = self.define(frame, pending, start)
+            frame.pending = None
+            self.frames.append(_Frame('class' if pending['kind'] == 'class' else 'function', definition))
+        else:
+            if pending is not None and pending.get('arrow') is None:
+                frame.pending = None
+            self.frames.append(_Frame('block'))
+
+    def close_block(self, start, pos):
+        """Cierra el bloque actual y devuelve la posición desde la que seguir."""
+        if len(self.frames) == 1:
+            return pos
+        frame = self.frames.pop()
+        self.close_expression(frame, start)
+        if frame.definition is not None:
+            self.finish(frame.definition, self.line(start))
+        if frame.kind == 'template':
+            return self.template(pos)
+        outer = self.frames[-1]
+        if not outer.parens and (outer.pending is None or outer.pending.get('arrow') is None):
+            outer.pending = None
+            outer.new_statement = True
+        return pos
+
+    def template(self, pos):
+        """Recorre el texto de una plantilla desde `pos` y devuelve la posición desde la que seguir."""
+        match = _TEMPLATE_TEXT.match(self.content, pos)
+        end = match.end()
+        if match.group(1) == '${':
+            self.mask(pos, end - 2)
+            self.frames.append(_Frame('template'))
+            self.frames[-1].new_statement = True
+            return end
+        self.mask(pos, end - 1 if match.group(1) == '`' else end)
+        return end
+
+    def define(self, frame, pending, brace):
+        """Crea la definición de un bloque que se abre en `brace`."""
+        # Solo la primera definición de la sentencia incluye los decoradores y el JSDoc que la preceden
+        leading = not frame.defined
+        frame.defined = True
+        start_pos = frame.statement_start if leading else pending['keyword_pos']
+        # El cuerpo empieza en la línea siguiente a la llave si no hay nada más tras ella
+        line_end = self.content.find('\n', brace)
+        brace_line = self.line(brace)
+        body_line = brace_line + 1 if line_end != -1 and not self.content[brace + 1:line_end].strip() else brace_line
+        scope = tuple(f.definition['name'] for f in self.frames if f.definition is not None)
+        definition = {
+            'kind': pending['kind'],
+            'name': pending['name'],
+            'qualname': '.'.join(scope + (pending['name'],)),
+            'is_async': bool(pending.get('is_async')),
+            'start_line': self.line(start_pos),
+            'line': self.line(pending['name_pos']),
+            'body_line': body_line,
+            'end_line': None,
+            'params': ' '.join((pending['params'] or '').split()),
+            'bases': pending['bases'],
+            'has_docstring': frame.doc and leading
+        }
+        self.definitions.append(definition)
+        return definition
+
+    def close_expression(self, frame, end):
+        """Termina la función flecha de cuerpo sin llaves pendiente en un bloque."""
+        pending = frame.pending
+        if pending is not None and pending.get('arrow') is not None:
+            definition = self.define(frame, pending, pending['arrow'])
+            definition['body_line'] = self.line(pending['arrow'])
+            self.finish(definition, self.line(max(end - 1, 0)))
+            frame.pending = None
+
+    def finish(self, definition, end_line):
+        """Completa la línea final de una definición."""
+        definition['end_line'] = max(end_line, definition['body_line'], definition['line'])
+
+    def structure(self):
+        """Genera la estructura a partir de las definiciones encontradas."""
+        definitions = []
+        for item in self.definitions:
+            if item['end_line'] is None:
+                item['end_line'] = self.index.line_count
+            body_line = min(item['body_line'], item['end_line'])
+            length = sum(1 for _, text in self.index.lines(body_line, item['end_line'])
+                         if text.strip() and not _CLOSING_LINE.match(text))
+            definitions.append(Definition(length=length, **dict(item, body_line=body_line)))
+        definitions.sort(key=lambda definition: definition.line)
+        return ScriptStructure(definitions, self.assignments, self.jsdoc, ''.join(self.masked))
+
+
+def parse_javascript(content):
+    """
+    Analiza un archivo JavaScript/TypeScript, reutilizando el resultado si el mismo contenido se analizó hace poco.
+
+    Args:
+        content (str): Código fuente.
+
+    Returns:
+        ScriptStructure: Estructura del archivo. El tokenizador tolera código incompleto o
+            con errores, por lo que siempre devuelve una estructura.
+    """
+    key = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    structure = _Parser(content).parse()
+
+    with _cache_lock:
+        _cache[key] = structure
+        while len(_cache) > MAX_CACHED_STRUCTURES:
+            _cache.popitem(last=False)
+    return structure
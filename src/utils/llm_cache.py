@@ -0,0 +1,191 @@
+"""
+Caché persistente de respuestas de LLM para llamadas deterministas (temperatura 0).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt):
+    """
+    Normaliza un prompt para que diferencias irrelevantes no generen claves distintas.
+
+    Unifica los saltos de línea y elimina los espacios finales de cada línea y los
+    espacios al inicio y final del prompt. La indentación se conserva porque es
+    significativa en el código incluido en los prompts.
+
+    Args:
+        prompt (str): Prompt original.
+
+    Returns:
+        str: Prompt normalizado.
+    """
+    text = str(prompt).replace('\r\n', '\n').replace('\r', '\n')
+    return '\n'.join(line.rstrip() for line in text.split('\n')).strip()
+
+
+class LLMResponseCache:
+    """
+    Caché en disco (SQLite) de respuestas de LLM con expiración (TTL) y límites LRU.
+
+    La clave combina proveedor, modelo, parámetros y el hash del prompt normalizado.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000, max_bytes=50 * 1024 * 1024):
+        """
+        Inicializa la caché.
+
+        Args:
+            path (str): Ruta al archivo SQLite de la caché.
+            ttl (int, opcional): Tiempo de vida de cada entrada en segundos.
+            max_entries (int, opcional): Número máximo de entradas.
+            max_bytes (int, opcional): Tamaño máximo total de las respuestas almacenadas.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " prompt_size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+        logger.info(f"Caché de respuestas LLM en: {path}")
+
+    @staticmethod
+    def make_key(provider, model, params, prompt):
+        """
+        Calcula la clave de caché para una llamada.
+
+        Args:
+            provider (str): Proveedor de IA.
+            model (str): Modelo utilizado.
+            params (dict): Parámetros de generación.
+            prompt (str): Prompt enviado.
+
+        Returns:
+            str: Clave hexadecimal.
+        """
+        prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+        payload = json.dumps({
+            'provider': provider,
+            'model': model,
+            'params': params or {},
+            'prompt': prompt_hash
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Obtiene una respuesta almacenada.
+
+        Args:
+            key (str): Clave de caché.
+
+        Returns:
+            str: Respuesta almacenada o None si no existe o ha expirado.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, prompt_size, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row and now - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if not row:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            self.bytes_saved += row[1] + row[2]
+            return row[0]
+
+    def set(self, key, response, prompt_size=0):
+        """
+        Almacena una respuesta y aplica los límites de tamaño.
+
+        Args:
+            key (str): Clave de caché.
+            response (str): Respuesta a almacenar.
+            prompt_size (int, opcional): Tamaño en bytes del prompt enviado.
+        """
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, prompt_size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, size, prompt_size, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """
+        Elimina entradas expiradas y las menos usadas recientemente si se superan los límites.
+
+        Args:
+            now (float): Marca de tiempo actual.
+        """
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def get_stats(self):
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos, bytes ahorrados y tamaño actual.
+        """
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'entries': count,
+            'size_bytes': total
+        }
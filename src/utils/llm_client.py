@@ -0,0 +1,316 @@
+"""
+Cliente envoltorio sobre los LLM de LangChain que usan los módulos.
+"""
+
+import time
+import logging
+from contextlib import nullcontext
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.llm_metrics import get_metrics
+from src.utils.prompt_builder import estimate_tokens
+from src.utils.rate_limiter import is_rate_limit_error, get_retry_after
+from src.utils.structured_output import parse_structured
+
+# Tokens de respuesta que se reservan en el límite de tokens/minuto
+EXPECTED_COMPLETION_TOKENS = 512
+
+logger = logging.getLogger(__name__)
+
+
+def response_to_text(response):
+    """
+    Convierte la respuesta de un LLM de LangChain en texto plano.
+
+    Args:
+        response: Mensaje de LangChain, lista de bloques de contenido o str.
+
+    Returns:
+        str: Texto de la respuesta.
+    """
+    content = getattr(response, 'content', response)
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, dict):
+                parts.append(block.get('text', ''))
+            else:
+                parts.append(str(block))
+        return ''.join(parts)
+    return content if isinstance(content, str) else str(content)
+
+
+def response_usage(response, prompt, text):
+    """
+    Obtiene los tokens de prompt y de respuesta de una llamada.
+
+    Se usan los datos de uso que devuelve el proveedor y, si no están disponibles,
+    una estimación a partir del texto.
+
+    Args:
+        response: Mensaje de LangChain devuelto por el LLM.
+        prompt (str): Prompt enviado.
+        text (str): Texto de la respuesta.
+
+    Returns:
+        tuple: (tokens de prompt, tokens de respuesta).
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    if isinstance(usage, dict) and 'input_tokens' in usage:
+        return usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    metadata = getattr(response, 'response_metadata', None) or {}
+    usage = metadata.get('token_usage') or metadata.get('usage')
+    if isinstance(usage, dict):
+        if 'prompt_tokens' in usage:
+            return usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+        if 'input_tokens' in usage:
+            return usage.get('input_tokens', 0), usage.get('output_tokens', 0)
+    return estimate_tokens(str(prompt)), estimate_tokens(text)
+
+
+class LLMClient:
+    """
+    Envoltorio del LLM devuelto por AIProvider.
+
+    `invoke` devuelve siempre texto plano y, para llamadas deterministas (temperatura 0),
+    consulta primero la caché de respuestas. Las peticiones idénticas que están en curso
+    al mismo tiempo se agrupan en una sola llamada al proveedor, y las llamadas reales
+    respetan los límites de velocidad del proveedor. Cada llamada se registra en las
+    métricas de uso (latencia, tokens, reintentos, caché y coste). `invoke_structured` devuelve JSON
+    validado contra un esquema, usando el modo JSON del proveedor cuando está
+    disponible. El LLM original sigue disponible en `llm` para integraciones que lo
+    necesiten (por ejemplo, CrewAI).
+    """
+
+    def __init__(self, llm, provider, model, params=None, cache=None, singleflight=None,
+                 rate_limiter=None, max_retries=3, metrics=None):
+        """
+        Inicializa el cliente.
+
+        Args:
+            llm (object): Instancia de LLM de LangChain.
+            provider (str): Nombre del proveedor de IA.
+            model (str): Modelo utilizado.
+            params (dict, opcional): Parámetros de generación (temperatura, etc.).
+            cache (LLMResponseCache, opcional): Caché de respuestas.
+            singleflight (SingleFlight, opcional): Deduplicador de peticiones concurrentes.
+            rate_limiter (ProviderRateLimiter, opcional): Limitador de velocidad del proveedor.
+            max_retries (int, opcional): Reintentos ante errores 429.
+            metrics (LLMMetrics, opcional): Registro de métricas (por defecto, el compartido).
+        """
+        self.llm = llm
+        self.provider = provider
+        self.model = model
+        self.params = params or {}
+        self.cache = cache
+        self.singleflight = singleflight
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.metrics = metrics or get_metrics()
+        self._json_llm = None
+
+    @property
+    def cacheable(self):
+        """Indica si las respuestas de este cliente se pueden cachear."""
+        return self.cache is not None and float(self.params.get('temperature', 0) or 0) == 0
+
+    def invoke(self, prompt, **kwargs):
+        """
+        Envía un prompt al LLM y devuelve el texto de la respuesta.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            **kwargs: Argumentos adicionales para el LLM.
+
+        Returns:
+            str: Texto de la respuesta.
+        """
+        if kwargs:
+            started = time.monotonic()
+            try:
+                response = self.llm.invoke(prompt, **kwargs)
+            except Exception:
+                self._record(started, error=True)
+                raise
+            text = response_to_text(response)
+            self._record(started, usage=response_usage(response, prompt, text))
+            return text
+        return self._invoke(prompt, self.llm, self.params)
+
+    def invoke_structured(self, prompt, schema):
+        """
+        Envía un prompt al LLM y devuelve su respuesta como JSON validado.
+
+        Con OpenAI y esquemas de tipo objeto se activa el modo JSON del proveedor;
+        en todos los casos los errores de sintaxis pequeños se reparan localmente,
+        sin volver a llamar al LLM.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            schema (dict): Esquema que debe cumplir la respuesta.
+
+        Returns:
+            object: Respuesta decodificada y validada.
+
+        Raises:
+            StructuredOutputError: Si la respuesta no se puede interpretar según el esquema.
+        """
+        llm, params = self.llm, self.params
+        if schema.get('type') == 'object' and self.provider == 'openai' and hasattr(self.llm, 'bind'):
+            if self._json_llm is None:
+                self._json_llm = self.llm.bind(response_format={'type': 'json_object'})
+            llm, params = self._json_llm, dict(self.params, response_format='json_object')
+        return parse_structured(self._invoke(prompt, llm, params), schema)
+
+    def _invoke(self, prompt, llm, params):
+        """
+        Resuelve una petición desde la caché, agrupándola con otras idénticas en curso o
+        llamando al proveedor.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            llm (object): LLM a invocar.
+            params (dict): Parámetros que identifican la petición en la caché.
+
+        Returns:
+            str: Texto de la respuesta.
+        """
+        started = time.monotonic()
+        key = LLMResponseCache.make_key(self.provider, self.model, params, prompt)
+        if self.cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"Respuesta LLM obtenida de caché ({self.provider}/{self.model})")
+                self._record(started, cache='hit')
+                return cached
+
+        if self.singleflight is None:
+            return self._call(prompt, key, llm)
+
+        executed = []
+
+        def call():
+            executed.append(True)
+            return self._call(prompt, key, llm)
+
+        try:
+            text = self.singleflight.do(key, call)
+        except Exception:
+            if not executed:
+                self._record(started, cache='coalesced', error=True)
+            raise
+        if not executed:
+            # Agrupada con una petición idéntica en curso: la llamada real la registra quien la hizo
+            self._record(started, cache='coalesced')
+        return text
+
+    def stream(self, prompt):
+        """
+        Envía un prompt al LLM y devuelve el texto de la respuesta a medida que se genera.
+
+        Si la respuesta está en caché, se devuelve completa en un único fragmento. La
+        respuesta completa se guarda en caché al terminar.
+
+        Args:
+            prompt (str): Prompt a enviar.
+
+        Yields:
+            str: Fragmentos de texto de la respuesta.
+        """
+        key = LLMResponseCache.make_key(self.provider, self.model, self.params, prompt)
+        if self.cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record(time.monotonic(), cache='hit')
+                yield cached
+                return
+
+        started = time.monotonic()
+        chunks = []
+        tokens = estimate_tokens(str(prompt)) + EXPECTED_COMPLETION_TOKENS
+        limits = self.rate_limiter.slot(tokens) if self.rate_limiter else nullcontext()
+        try:
+            with limits:
+                for chunk in self.llm.stream(prompt):
+                    text = response_to_text(chunk)
+                    if text:
+                        chunks.append(text)
+                        yield text
+        except Exception:
+            self._record(started, error=True)
+            raise
+        text = ''.join(chunks)
+        self._record(started, usage=(estimate_tokens(str(prompt)), estimate_tokens(text)))
+
+        if self.cacheable:
+            self.cache.set(key, text, prompt_size=len(str(prompt).encode('utf-8')))
+
+    def _call(self, prompt, key, llm):
+        """
+        Realiza la llamada real al proveedor y guarda la respuesta en caché si procede.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            key (str): Clave de la petición.
+            llm (object): LLM a invocar.
+
+        Returns:
+            str: Texto de la respuesta.
+        """
+        started = time.monotonic()
+        try:
+            response, retries = self._invoke_with_limits(prompt, llm)
+        except Exception as e:
+            self._record(started, retries=self.max_retries if is_rate_limit_error(e) else 0, error=True)
+            raise
+        text = response_to_text(response)
+        self._record(started, usage=response_usage(response, prompt, text), retries=retries)
+        if self.cacheable:
+            self.cache.set(key, text, prompt_size=len(str(prompt).encode('utf-8')))
+        return text
+
+    def _invoke_with_limits(self, prompt, llm):
+        """
+        Invoca el LLM respetando los límites de velocidad y reintentando ante errores 429.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            llm (object): LLM a invocar.
+
+        Returns:
+            tuple: (respuesta del LLM, número de reintentos).
+        """
+        if self.rate_limiter is None:
+            return llm.invoke(prompt), 0
+
+        tokens = estimate_tokens(str(prompt)) + EXPECTED_COMPLETION_TOKENS
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.rate_limiter.slot(tokens):
+                    return llm.invoke(prompt), attempt
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                logger.warning(f"Límite de velocidad de {self.provider} (intento {attempt + 1}), reintentando")
+                if get_retry_after(e) is None:
+                    # El limitador ya espera el Retry-After; sin él, usar backoff exponencial
+                    time.sleep(2 ** attempt)
+
+    def _record(self, started, usage=(0, 0), retries=0, cache='miss', error=False):
+        """
+        Registra una llamada en las métricas de uso.
+
+        Args:
+            started (float): Instante de inicio (time.monotonic).
+            usage (tuple, opcional): Tokens de prompt y de respuesta.
+            retries (int, opcional): Reintentos por límite de velocidad.
+            cache (str, opcional): 'hit', 'miss' o 'coalesced'.
+            error (bool, opcional): True si la llamada terminó con error.
+        """
+        self.metrics.record(self.provider, self.model, latency=time.monotonic() - started,
+                            prompt_tokens=usage[0], completion_tokens=usage[1],
+                            retries=retries, cache=cache, error=error)
+
+    def __getattr__(self, name):
+        if name == 'llm':
+            raise AttributeError(name)
+        return getattr(self.llm, name)
@@ -0,0 +1,353 @@
+"""
+Métricas de uso de los LLM por módulo: latencia, tokens, reintentos, caché y coste estimado.
+
+Uso como informe en línea de comandos:
+    python -m src.utils.llm_metrics                      # instantánea guardada por el monitor
+    python -m src.utils.llm_metrics --url http://localhost:5000
+"""
+
+import os
+import json
+import bisect
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Precio estimado (USD por millón de tokens de prompt y de respuesta) por prefijo de modelo
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+    'claude-3-haiku': (0.25, 1.25),
+    'claude-3-sonnet': (3.00, 15.00),
+    'claude-3-opus': (15.00, 75.00),
+    'fake': (0.0, 0.0)
+}
+
+# Límites superiores de los intervalos de los histogramas
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# Instantánea que lee el informe de línea de comandos
+DEFAULT_SNAPSHOT_PATH = os.path.join('.git_monitor_cache', 'llm_metrics.json')
+
+UNKNOWN_MODULE = 'sin_modulo'
+
+_local = threading.local()
+
+
+def current_module():
+    """
+    Devuelve el módulo al que se atribuyen las llamadas LLM del hilo actual.
+
+    Returns:
+        str: Nombre configurado con `llm_module` o UNKNOWN_MODULE.
+    """
+    return getattr(_local, 'module', UNKNOWN_MODULE)
+
+
+@contextmanager
+def llm_module(name):
+    """
+    Atribuye al módulo indicado las llamadas LLM realizadas dentro del bloque.
+
+    Args:
+        name (str): Nombre del módulo.
+    """
+    previous = getattr(_local, 'module', None)
+    _local.module = name
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _local.module
+        else:
+            _local.module = previous
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """
+    Estima el coste de una llamada según MODEL_PRICES.
+
+    Args:
+        model (str): Modelo utilizado.
+        prompt_tokens (int): Tokens del prompt.
+        completion_tokens (int): Tokens de la respuesta.
+
+    Returns:
+        float: Coste estimado en USD (0 si el modelo no tiene precio conocido).
+    """
+    # Prefijo más largo primero para que 'gpt-4o-mini' no se cobre como 'gpt-4o'
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if (model or '').startswith(prefix):
+            prompt_price, completion_price = MODEL_PRICES[prefix]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return 0.0
+
+
+class Histogram:
+    """Histograma de intervalos fijos con recuento, suma y percentiles aproximados."""
+
+    def __init__(self, buckets):
+        """
+        Inicializa el histograma.
+
+        Args:
+            buckets (tuple): Límites superiores de los intervalos, en orden creciente.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Registra un valor.
+
+        Args:
+            value (float): Valor observado.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """
+        Estima un percentil como el límite superior del intervalo que lo contiene.
+
+        Args:
+            fraction (float): Percentil (0-1).
+
+        Returns:
+            float: Valor estimado, o None si no hay observaciones.
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        """
+        Devuelve el histograma serializable.
+
+        Returns:
+            dict: Intervalos, recuentos, suma y percentiles p50/p95.
+        """
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'max': round(self.max, 3),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class _Series:
+    """Contadores e histogramas de una combinación de módulo, proveedor y modelo."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.tokens = Histogram(TOKEN_BUCKETS)
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'retries': self.retries,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost': round(self.cost, 6),
+            'latency': self.latency.to_dict(),
+            'tokens': self.tokens.to_dict()
+        }
+
+
+class LLMMetrics:
+    """
+    Registro en memoria de las llamadas LLM agrupadas por módulo, proveedor y modelo.
+
+    Cada llamada registra su resultado en la caché (acierto, fallo o agrupada con
+    una petición idéntica en curso), su latencia, los tokens de prompt y respuesta,
+    los reintentos por límite de velocidad y el coste estimado.
+    """
+
+    def __init__(self):
+        """Inicializa el registro vacío."""
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, latency=0.0, prompt_tokens=0, completion_tokens=0,
+               retries=0, cache='miss', error=False, module=None):
+        """
+        Registra una llamada LLM.
+
+        Args:
+            provider (str): Proveedor de IA.
+            model (str): Modelo utilizado.
+            latency (float, opcional): Latencia en segundos.
+            prompt_tokens (int, opcional): Tokens del prompt enviados al proveedor.
+            completion_tokens (int, opcional): Tokens de la respuesta.
+            retries (int, opcional): Reintentos por límite de velocidad.
+            cache (str, opcional): 'hit', 'miss' o 'coalesced'.
+            error (bool, opcional): True si la llamada terminó con error.
+            module (str, opcional): Módulo que hizo la llamada (por defecto, el del hilo actual).
+        """
+        key = (module or current_module(), provider, model)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.calls += 1
+            if cache == 'hit':
+                series.cache_hits += 1
+            elif cache == 'coalesced':
+                series.coalesced += 1
+            else:
+                series.cache_misses += 1
+            series.errors += int(error)
+            series.retries += retries
+            series.latency.observe(latency)
+            if cache == 'miss':
+                series.prompt_tokens += prompt_tokens
+                series.completion_tokens += completion_tokens
+                series.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+                series.tokens.observe(prompt_tokens + completion_tokens)
+
+    def get_stats(self):
+        """
+        Devuelve las métricas agregadas.
+
+        Returns:
+            dict: Totales y métricas por módulo y por modelo ('modules' -> módulo -> 'proveedor/modelo').
+        """
+        with self._lock:
+            modules = {}
+            totals = {'calls': 0, 'cache_hits': 0, 'errors': 0, 'retries': 0,
+                      'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0}
+            for (module, provider, model), series in self._series.items():
+                stats = series.to_dict()
+                modules.setdefault(module, {})[f"{provider}/{model}"] = stats
+                for name in totals:
+                    totals[name] += stats[name]
+        totals['cost'] = round(totals['cost'], 6)
+        return {'totals': totals, 'modules': modules}
+
+    def reset(self):
+        """Elimina todas las métricas registradas."""
+        with self._lock:
+            self._series.clear()
+
+    def save(self, path=None):
+        """
+        Guarda una instantánea de las métricas para el informe de línea de comandos.
+
+        Args:
+            path (str, opcional): Ruta del archivo (por defecto LLM_METRICS_PATH o DEFAULT_SNAPSHOT_PATH).
+        """
+        path = path or os.getenv('LLM_METRICS_PATH', DEFAULT_SNAPSHOT_PATH)
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.get_stats(), f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error al guardar las métricas LLM en {path}: {e}")
+
+
+_metrics = LLMMetrics()
+
+
+def get_metrics():
+    """
+    Devuelve el registro de métricas compartido del proceso.
+
+    Returns:
+        LLMMetrics: Registro de métricas.
+    """
+    return _metrics
+
+
+def format_report(stats):
+    """
+    Genera un informe de texto con las métricas, ordenado por coste y tiempo total.
+
+    Args:
+        stats (dict): Resultado de `LLMMetrics.get_stats`.
+
+    Returns:
+        str: Informe en forma de tabla.
+    """
+    rows = []
+    for module, models in stats.get('modules', {}).items():
+        for model, series in models.items():
+            rows.append((module, model, series))
+    rows.sort(key=lambda row: (row[2]['cost'], row[2]['latency']['sum']), reverse=True)
+
+    header = (f"{'Módulo':<24} {'Modelo':<34} {'Llamadas':>8} {'Caché':>6} {'Errores':>7} "
+              f"{'Reint.':>6} {'Tok. prompt':>11} {'Tok. resp.':>10} {'p50 s':>6} {'p95 s':>6} "
+              f"{'Tiempo s':>9} {'Coste $':>9}")
+    lines = [header, '-' * len(header)]
+    for module, model, series in rows:
+        latency = series['latency']
+        lines.append(
+            f"{module:<24} {model:<34} {series['calls']:>8} {series['cache_hits']:>6} "
+            f"{series['errors']:>7} {series['retries']:>6} {series['prompt_tokens']:>11} "
+            f"{series['completion_tokens']:>10} {latency['p50'] or 0:>6} {latency['p95'] or 0:>6} "
+            f"{latency['sum']:>9.1f} {series['cost']:>9.4f}"
+        )
+
+    totals = stats.get('totals', {})
+    lines.append('-' * len(header))
+    lines.append(f"Total: {totals.get('calls', 0)} llamadas, {totals.get('cache_hits', 0)} aciertos de caché, "
+                 f"{totals.get('errors', 0)} errores, {totals.get('retries', 0)} reintentos, "
+                 f"{totals.get('prompt_tokens', 0) + totals.get('completion_tokens', 0)} tokens, "
+                 f"{totals.get('cost', 0):.4f} USD")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Informe de uso de los LLM por módulo')
+    parser.add_argument('--path', help='Instantánea de métricas guardada por el monitor')
+    parser.add_argument('--url', help='URL de la interfaz web del monitor (por ejemplo, http://localhost:5000)')
+    args = parser.parse_args()
+
+    if args.url:
+        from urllib.request import urlopen
+        with urlopen(f"{args.url.rstrip('/')}/api/llm-stats") as response:
+            stats = json.load(response).get('metrics', {})
+    else:
+        path = args.path or os.getenv('LLM_METRICS_PATH', DEFAULT_SNAPSHOT_PATH)
+        with open(path, encoding='utf-8') as f:
+            stats = json.load(f)
+    print(format_report(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Enrutado de peticiones entre un modelo económico y uno más potente según el riesgo del cambio.
+"""
+
+import re
+import logging
+import threading
+from src.utils.ai_provider import AIProvider
+from src.utils.structured_output import StructuredOutputError, parse_structured
+
+logger = logging.getLogger(__name__)
+
+# Modelo económico por defecto para los cambios de bajo riesgo
+DEFAULT_CHEAP_MODEL = 'gpt-4o-mini'
+
+# Confianza mínima (0-1) de una respuesta del modelo económico para no escalar
+MIN_CONFIDENCE = 0.6
+
+_HIGH_CRITICALITY = re.compile(
+    r'security|auth|password|credential|token|payment|core|config|main|database|db'
+    r'|api|server|router|controller',
+    re.IGNORECASE
+)
+_MEDIUM_CRITICALITY = re.compile(
+    r'service|model|store|state|util|helper|middleware|validator|parser|formatter',
+    re.IGNORECASE
+)
+
+
+def evaluate_file_criticality(file_path):
+    """
+    Evalúa la criticidad de un archivo basado en su nombre y ubicación.
+
+    Args:
+        file_path (str): Ruta del archivo.
+
+    Returns:
+        str: Nivel de criticidad ('high', 'medium', 'low').
+    """
+    if _HIGH_CRITICALITY.search(file_path):
+        return 'high'
+    if _MEDIUM_CRITICALITY.search(file_path):
+        return 'medium'
+    return 'low'
+
+
+class ModelRouter:
+    """
+    Envía las peticiones de bajo riesgo a un modelo económico y escala al modelo
+    configurado (`openai_model`) solo cuando hace falta.
+
+    Se escala cuando algún archivo tiene criticidad alta, cuando las reglas locales
+    han encontrado un problema de seguridad, o cuando el modelo económico devuelve
+    una respuesta no válida o con una confianza inferior a MIN_CONFIDENCE.
+    """
+
+    def __init__(self, config, strong_llm):
+        """
+        Inicializa el enrutador.
+
+        Args:
+            config (dict): Configuración del módulo ('model_cascade', 'cheap_model', ...).
+            strong_llm (LLMClient): Cliente del modelo configurado.
+        """
+        self.strong = strong_llm
+        self.cheap = strong_llm
+        self.cheap_routed = 0
+        self.strong_routed = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+        if config.get('model_cascade', False) and strong_llm is not None:
+            cheap_config = dict(config, openai_model=config.get('cheap_model', DEFAULT_CHEAP_MODEL))
+            try:
+                self.cheap = AIProvider.get_llm(cheap_config)
+            except Exception as e:
+                logger.error(f"Error al inicializar el modelo económico, se usará solo {strong_llm.model}: {e}")
+
+    @property
+    def enabled(self):
+        """Indica si hay un modelo económico distinto del configurado."""
+        return self.cheap is not self.strong
+
+    def needs_strong(self, file_paths=(), security_issue=False):
+        """
+        Indica si una petición debe ir directamente al modelo potente.
+
+        Args:
+            file_paths (list, opcional): Archivos incluidos en la petición.
+            security_issue (bool, opcional): True si las reglas locales encontraron un problema de seguridad.
+
+        Returns:
+            bool: True si se debe usar el modelo potente.
+        """
+        return security_issue or any(evaluate_file_criticality(path) == 'high' for path in file_paths)
+
+    def select(self, file_paths=(), security_issue=False):
+        """
+        Elige el cliente para una petición según el riesgo de los archivos.
+
+        Args:
+            file_paths (list, opcional): Archivos incluidos en la petición.
+            security_issue (bool, opcional): True si las reglas locales encontraron un problema de seguridad.
+
+        Returns:
+            LLMClient: Cliente elegido.
+        """
+        if self.enabled and not self.needs_strong(file_paths, security_issue):
+            self._count('cheap_routed')
+            return self.cheap
+        self._count('strong_routed')
+        return self.strong
+
+    def invoke_structured(self, prompt, schema, file_paths=(), security_issue=False):
+        """
+        Envía un prompt al modelo adecuado y escala si la respuesta del modelo económico no es fiable.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            schema (dict): Esquema que debe cumplir la respuesta.
+            file_paths (list, opcional): Archivos incluidos en la petición.
+            security_issue (bool, opcional): True si las reglas locales encontraron un problema de seguridad.
+
+        Returns:
+            object: Respuesta decodificada y validada.
+
+        Raises:
+            StructuredOutputError: Si la respuesta del modelo potente no se puede interpretar.
+        """
+        return self._invoke_with_escalation(lambda llm: llm.invoke_structured(prompt, schema),
+                                            file_paths, security_issue)
+
+    def stream_structured(self, schema, stream, file_paths=(), security_issue=False):
+        """
+        Igual que `invoke_structured`, pero obtiene la respuesta en streaming.
+
+        Si la respuesta del modelo económico no es fiable, la petición se repite (también en
+        streaming) con el modelo potente.
+
+        Args:
+            schema (dict): Esquema que debe cumplir la respuesta.
+            stream (callable): Recibe el cliente elegido y devuelve el texto completo de su respuesta.
+            file_paths (list, opcional): Archivos incluidos en la petición.
+            security_issue (bool, opcional): True si las reglas locales encontraron un problema de seguridad.
+
+        Returns:
+            object: Respuesta decodificada y validada.
+
+        Raises:
+            StructuredOutputError: Si la respuesta del modelo potente no se puede interpretar.
+        """
+        return self._invoke_with_escalation(lambda llm: parse_structured(stream(llm), schema),
+                                            file_paths, security_issue)
+
+    def _invoke_with_escalation(self, invoke, file_paths, security_issue):
+        """
+        Realiza una petición con el modelo adecuado y la repite con el potente si la respuesta no es fiable.
+
+        Args:
+            invoke (callable): Recibe un cliente y devuelve su respuesta decodificada.
+            file_paths (list): Archivos incluidos en la petición.
+            security_issue (bool): True si las reglas locales encontraron un problema de seguridad.
+
+        Returns:
+            object: Respuesta decodificada.
+        """
+        llm = self.select(file_paths, security_issue)
+        if llm is self.strong:
+            return invoke(llm)
+
+        try:
+            result = invoke(llm)
+            confidence = result.get('confidence', 1) if isinstance(result, dict) else 1
+            if not isinstance(confidence, (int, float)) or confidence >= MIN_CONFIDENCE:
+                return result
+            reason = f"confianza {confidence}"
+        except StructuredOutputError as e:
+            reason = f"respuesta no válida ({e})"
+
+        logger.info(f"Escalando de {self.cheap.model} a {self.strong.model}: {reason}")
+        self._count('escalated')
+        return invoke(self.strong)
+
+    def _count(self, counter):
+        """Incrementa un contador de enrutado."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_stats(self):
+        """
+        Devuelve los contadores de enrutado.
+
+        Returns:
+            dict: Peticiones enviadas a cada modelo y escaladas.
+        """
+        with self._lock:
+            return {
+                'cheap_model': self.cheap.model if self.cheap else None,
+                'strong_model': self.strong.model if self.strong else None,
+                'cheap_routed': self.cheap_routed,
+                'strong_routed': self.strong_routed,
+                'escalated': self.escalated
+            }
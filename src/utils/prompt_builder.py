@@ -0,0 +1,314 @@
+"""
+Construcción de prompts con presupuesto de tokens y selección inteligente de contenido.
+"""
+
+import re
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ventana de contexto (en tokens) de los modelos conocidos
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-3.5-turbo': 16385,
+    'gpt-4': 8192,
+    'gpt-4-turbo': 128000,
+    'gpt-4o': 128000,
+    'gpt-4o-mini': 128000,
+    'claude-3-sonnet-20240229': 200000,
+    'claude-3-haiku-20240307': 200000
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Límite por defecto del contenido de un prompt, para mantener la latencia predecible
+DEFAULT_MAX_PROMPT_TOKENS = 6000
+
+# Tokens reservados para la respuesta y para el texto fijo de las instrucciones
+RESERVED_TOKENS = 1500
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+_SIGNATURE_PATTERN = re.compile(
+    r'^\s*(?:@\w|(?:async\s+)?def\s|class\s|(?:export\s+)?(?:default\s+)?(?:async\s+)?function\b'
+    r'|(?:export\s+)?(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:\(|function\b))'
+)
+
+
+def estimate_tokens(text):
+    """
+    Estima el número de tokens de un texto sin depender de un tokenizador externo.
+
+    Cada palabra cuenta como un token por cada 4 caracteres y cada signo de
+    puntuación como un token, lo que se aproxima a los tokenizadores BPE habituales.
+
+    Args:
+        text (str): Texto a medir.
+
+    Returns:
+        int: Número estimado de tokens.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        tokens += math.ceil(len(match.group(0)) / 4)
+    return tokens
+
+
+def get_prompt_budget(model=None, max_tokens=None):
+    """
+    Calcula el presupuesto de tokens disponible para el contenido de un prompt.
+
+    Args:
+        model (str, opcional): Nombre del modelo.
+        max_tokens (int, opcional): Límite explícito configurado.
+
+    Returns:
+        int: Presupuesto de tokens.
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    budget = window - RESERVED_TOKENS
+    limit = int(max_tokens) if max_tokens else DEFAULT_MAX_PROMPT_TOKENS
+    return max(256, min(budget, limit))
+
+
+def changed_lines_from_diff(diff):
+    """
+    Obtiene los números de línea (lado nuevo, base 1) añadidos o modificados en un diff unificado.
+
+    Args:
+        diff (str): Diff en formato unificado.
+
+    Returns:
+        list: Números de línea modificados.
+    """
+    changed = []
+    new_line = None
+    for line in (diff or '').split('\n'):
+        header = _HUNK_HEADER.match(line)
+        if header:
+            new_line = int(header.group(1))
+            continue
+        if new_line is None or line.startswith('+++') or line.startswith('---'):
+            continue
+        if line.startswith('+'):
+            changed.append(new_line)
+            new_line += 1
+        elif line.startswith('-'):
+            continue
+        elif line.startswith('\\'):
+            continue
+        else:
+            new_line += 1
+    return changed
+
+
+class PromptBuilder:
+    """
+    Ajusta el contenido de archivos y diffs a un presupuesto de tokens por modelo.
+
+    En lugar de recortar el inicio y el final, prioriza los fragmentos modificados,
+    después las firmas de las funciones/clases que los contienen y, por último, el
+    contexto alrededor de los cambios.
+    """
+
+    def __init__(self, model=None, max_tokens=None):
+        """
+        Inicializa el constructor de prompts.
+
+        Args:
+            model (str, opcional): Modelo para el que se construyen los prompts.
+            max_tokens (int, opcional): Límite de tokens configurado para el contenido.
+        """
+        self.model = model
+        self.budget = get_prompt_budget(model, max_tokens)
+
+    def fit_diff(self, diff, budget=None):
+        """
+        Ajusta un diff unificado al presupuesto conservando hunks completos.
+
+        Args:
+            diff (str): Diff en formato unificado.
+            budget (int, opcional): Presupuesto de tokens. Por defecto, el del constructor.
+
+        Returns:
+            tuple: (texto ajustado, True si se omitió contenido).
+        """
+        budget = budget or self.budget
+        if estimate_tokens(diff) <= budget:
+            return diff, False
+
+        # Separar cabecera y hunks
+        header, hunks, current = [], [], None
+        for line in diff.split('\n'):
+            if _HUNK_HEADER.match(line):
+                current = [line]
+                hunks.append(current)
+            elif current is None:
+                header.append(line)
+            else:
+                current.append(line)
+
+        parts = ['\n'.join(header)] if header else []
+        used = estimate_tokens(parts[0]) if parts else 0
+        omitted = 0
+        for hunk in hunks:
+            text = '\n'.join(hunk)
+            cost = estimate_tokens(text)
+            if used + cost <= budget:
+                parts.append(text)
+                used += cost
+            else:
+                omitted += 1
+
+        if not hunks or len(parts) == (1 if header else 0):
+            # Ningún hunk cabe completo: usar solo las líneas modificadas
+            lines = [line for line in diff.split('\n') if line.startswith(('+', '-', '@@'))]
+            return self._take_lines(lines, budget), True
+
+        parts.append(f"... ({omitted} fragmentos del diff omitidos por tamaño) ...")
+        return '\n'.join(parts), True
+
+    def fit_file(self, content, budget=None, changed_lines=None, diff=None):
+        """
+        Ajusta el contenido de un archivo al presupuesto seleccionando las líneas más relevantes.
+
+        Args:
+            content (str): Contenido del archivo.
+            budget (int, opcional): Presupuesto de tokens. Por defecto, el del constructor.
+            changed_lines (list, opcional): Líneas modificadas (base 1).
+            diff (str, opcional): Diff del que extraer las líneas modificadas.
+
+        Returns:
+            tuple: (texto ajustado, True si se omitió contenido). Si se omite contenido,
+                las líneas se prefijan con su número para mantener las referencias.
+        """
+        budget = budget or self.budget
+        if estimate_tokens(content) <= budget:
+            return content, False
+
+        lines = content.split('\n')
+        if changed_lines is None and diff:
+            changed_lines = changed_lines_from_diff(diff)
+        changed = sorted({n - 1 for n in (changed_lines or []) if 0 < n <= len(lines)})
+
+        selected = set()
+        used = 0
+
+        def take(index):
+            nonlocal used
+            if index in selected:
+                return True
+            cost = estimate_tokens(lines[index]) + 4
+            if used + cost > budget:
+                return False
+            selected.add(index)
+            used += cost
+            return True
+
+        # 1. Líneas modificadas
+        for index in changed:
+            take(index)
+
+        # 2. Firmas que contienen los cambios (o todas si no hay cambios conocidos)
+        if changed:
+            signatures = []
+            for index in changed:
+                signatures.extend(self._enclosing_signatures(lines, index))
+        else:
+            signatures = [i for i, line in enumerate(lines) if _SIGNATURE_PATTERN.match(line)]
+        for index in sorted(set(signatures)):
+            take(index)
+
+        # 3. Contexto alrededor de los cambios, creciendo hacia fuera
+        if changed:
+            radius = 1
+            while radius < len(lines):
+                added = False
+                for index in changed:
+                    for neighbour in (index - radius, index + radius):
+                        if 0 <= neighbour < len(lines) and neighbour not in selected:
+                            if not take(neighbour):
+                                return self._render(lines, selected), True
+                            added = True
+                if not added:
+                    break
+                radius += 1
+        else:
+            for index in range(len(lines)):
+                if not take(index):
+                    break
+
+        return self._render(lines, selected), True
+
+    def _enclosing_signatures(self, lines, index):
+        """
+        Busca las firmas de funciones/clases que contienen una línea, según la indentación.
+
+        Args:
+            lines (list): Líneas del archivo.
+            index (int): Índice de la línea (base 0).
+
+        Returns:
+            list: Índices de las líneas de firma, de la más interna a la más externa.
+        """
+        result = []
+        line = lines[index]
+        indent = len(line) - len(line.lstrip()) if line.strip() else None
+        for i in range(index - 1, -1, -1):
+            candidate = lines[i]
+            if not candidate.strip():
+                continue
+            candidate_indent = len(candidate) - len(candidate.lstrip())
+            if indent is not None and candidate_indent >= indent:
+                continue
+            if _SIGNATURE_PATTERN.match(candidate):
+                result.append(i)
+            indent = candidate_indent
+            if indent == 0:
+                break
+        return result
+
+    def _render(self, lines, selected):
+        """
+        Genera el texto de las líneas seleccionadas marcando los huecos omitidos.
+
+        Args:
+            lines (list): Líneas del archivo.
+            selected (set): Índices seleccionados.
+
+        Returns:
+            str: Texto con números de línea y marcas de omisión.
+        """
+        output = []
+        previous = -1
+        for index in sorted(selected):
+            if index > previous + 1:
+                output.append(f"      ... ({index - previous - 1} líneas omitidas) ...")
+            output.append(f"{index + 1:>5}| {lines[index]}")
+            previous = index
+        if previous < len(lines) - 1:
+            output.append(f"      ... ({len(lines) - previous - 1} líneas omitidas) ...")
+        return '\n'.join(output)
+
+    def _take_lines(self, lines, budget):
+        """
+        Toma líneas en orden hasta agotar el presupuesto.
+
+        Args:
+            lines (list): Líneas candidatas.
+            budget (int): Presupuesto de tokens.
+
+        Returns:
+            str: Texto resultante.
+        """
+        output, used = [], 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                output.append("... (resto omitido por tamaño) ...")
+                break
+            output.append(line)
+            used += cost
+        return '\n'.join(output)
@@ -0,0 +1,346 @@
+"""
+Grupo de proveedores de IA con peticiones de cobertura (hedging), seguimiento de
+salud y cortocircuito (circuit breaker).
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.utils.rate_limiter import current_priority, request_priority
+from src.utils.llm_metrics import current_module, llm_module
+from src.utils.structured_output import StructuredOutputError
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de lanzar la petición de cobertura mientras no hay suficientes muestras de latencia
+DEFAULT_HEDGE_DELAY = 8.0
+
+# Muestras de latencia necesarias para usar el p95 como espera de cobertura
+MIN_LATENCY_SAMPLES = 20
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """
+    Salud de un proveedor: latencias recientes y estado del cortocircuito.
+
+    Tras `failure_threshold` errores consecutivos el circuito se abre y el proveedor
+    deja de recibir peticiones durante `reset_timeout` segundos; después vuelve a
+    recibirlas a prueba (semiabierto): la primera respuesta correcta cierra el
+    circuito y el primer error lo vuelve a abrir.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, window=100):
+        """
+        Inicializa el seguimiento de salud.
+
+        Args:
+            name (str): Nombre del proveedor.
+            failure_threshold (int, opcional): Errores consecutivos que abren el circuito.
+            reset_timeout (float, opcional): Segundos que el circuito permanece abierto.
+            window (int, opcional): Número de latencias recientes que se conservan.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latencies = deque(maxlen=window)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.successes = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def available(self):
+        """
+        Indica si el proveedor puede recibir una petición.
+
+        Returns:
+            bool: True si el circuito está cerrado o semiabierto.
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            return self.state != OPEN
+
+    def record_success(self, latency):
+        """
+        Registra una respuesta correcta.
+
+        Args:
+            latency (float): Latencia en segundos.
+        """
+        with self._lock:
+            self.latencies.append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuito de {self.name} cerrado tras una petición de prueba correcta")
+            self.state = CLOSED
+
+    def record_failure(self):
+        """Registra un error y abre el circuito si es necesario."""
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuito de {self.name} abierto tras {self.consecutive_failures} errores consecutivos")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def p95(self):
+        """
+        Devuelve el percentil 95 de las latencias recientes.
+
+        Returns:
+            float: Latencia en segundos, o None si no hay suficientes muestras.
+        """
+        with self._lock:
+            if len(self.latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def get_stats(self):
+        """
+        Devuelve el estado del proveedor.
+
+        Returns:
+            dict: Estado del circuito, errores, éxitos y p95 de latencia.
+        """
+        p95 = self.p95()
+        with self._lock:
+            return {
+                'state': self.state,
+                'successes': self.successes,
+                'failures': self.failures,
+                'consecutive_failures': self.consecutive_failures,
+                'p95_latency': round(p95, 3) if p95 is not None else None
+            }
+
+
+class _Member:
+    """Proveedor del grupo con su cliente y su salud."""
+
+    def __init__(self, name, client, health):
+        self.name = name
+        self.client = client
+        self.health = health
+
+
+class ProviderGroup:
+    """
+    Grupo ordenado de clientes LLM (el primero es el principal) con la misma interfaz que LLMClient.
+
+    Si el proveedor principal no responde antes de su latencia p95, se envía la misma
+    petición al siguiente proveedor disponible y se usa la primera respuesta correcta.
+    Si un proveedor falla, se pasa inmediatamente al siguiente. Los proveedores con
+    errores continuados quedan fuera del grupo mediante su cortocircuito.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='llm-hedge')
+
+    def __init__(self, members, hedge_delay=DEFAULT_HEDGE_DELAY, failure_threshold=5, reset_timeout=30.0):
+        """
+        Inicializa el grupo.
+
+        Args:
+            members (list): Lista de tuplas (nombre del proveedor, LLMClient), la principal primero.
+            hedge_delay (float, opcional): Espera de cobertura mientras no se conoce el p95.
+            failure_threshold (int, opcional): Errores consecutivos que abren el circuito.
+            reset_timeout (float, opcional): Segundos que un circuito permanece abierto.
+        """
+        self.members = [_Member(name, client, ProviderHealth(name, failure_threshold, reset_timeout))
+                        for name, client in members]
+        self.hedge_delay = hedge_delay
+        self.hedged = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """Cliente del proveedor principal."""
+        return self.members[0].client
+
+    @property
+    def llm(self):
+        """LLM de LangChain del proveedor principal (para integraciones como CrewAI)."""
+        return self.primary.llm
+
+    def invoke(self, prompt, **kwargs):
+        """
+        Envía un prompt al grupo y devuelve el texto de la primera respuesta correcta.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            **kwargs: Argumentos adicionales para el LLM.
+
+        Returns:
+            str: Texto de la respuesta.
+        """
+        return self._hedged(lambda client: client.invoke(prompt, **kwargs))
+
+    def invoke_structured(self, prompt, schema):
+        """
+        Envía un prompt al grupo y devuelve la primera respuesta válida para el esquema.
+
+        Args:
+            prompt (str): Prompt a enviar.
+            schema (dict): Esquema que debe cumplir la respuesta.
+
+        Returns:
+            object: Respuesta decodificada y validada.
+        """
+        return self._hedged(lambda client: client.invoke_structured(prompt, schema))
+
+    def stream(self, prompt):
+        """
+        Envía un prompt en streaming al primer proveedor disponible.
+
+        No se hace cobertura, pero si un proveedor falla antes de enviar el primer
+        fragmento se pasa al siguiente.
+
+        Args:
+            prompt (str): Prompt a enviar.
+
+        Yields:
+            str: Fragmentos de texto de la respuesta.
+        """
+        error = None
+        for member in self._available():
+            started = time.monotonic()
+            received = False
+            try:
+                for chunk in member.client.stream(prompt):
+                    received = True
+                    yield chunk
+                member.health.record_success(time.monotonic() - started)
+                return
+            except Exception as e:
+                member.health.record_failure()
+                if received:
+                    raise
+                logger.warning(f"Proveedor {member.name} falló en streaming, probando el siguiente: {e}")
+                error = e
+        raise error
+
+    def _available(self):
+        """
+        Devuelve los proveedores disponibles en orden de preferencia.
+
+        Si todos tienen el circuito abierto, se devuelven todos para no bloquear el análisis.
+
+        Returns:
+            list: Proveedores disponibles.
+        """
+        available = [member for member in self.members if member.health.available()]
+        return available or list(self.members)
+
+    def _run(self, member, call, priority, module):
+        """
+        Ejecuta una llamada en un proveedor registrando su latencia y su resultado.
+
+        Args:
+            member (_Member): Proveedor.
+            call (callable): Función que recibe el cliente y realiza la petición.
+            priority (int): Prioridad de la petición original.
+            module (str): Módulo al que se atribuye la petición en las métricas.
+
+        Returns:
+            object: Resultado de la llamada.
+        """
+        started = time.monotonic()
+        try:
+            with request_priority(priority), llm_module(module):
+                result = call(member.client)
+        except StructuredOutputError:
+            # El proveedor respondió: no es un problema de salud
+            member.health.record_success(time.monotonic() - started)
+            raise
+        except Exception:
+            member.health.record_failure()
+            raise
+        member.health.record_success(time.monotonic() - started)
+        return result
+
+    def _hedged(self, call):
+        """
+        Ejecuta una llamada con cobertura y conmutación por error entre proveedores.
+
+        Args:
+            call (callable): Función que recibe un cliente y realiza la petición.
+
+        Returns:
+            object: Primer resultado correcto.
+
+        Raises:
+            Exception: El último error si ningún proveedor responde correctamente.
+        """
+        queue = self._available()
+        priority = current_priority()
+        module = current_module()
+        pending = {}
+        error = None
+
+        def launch():
+            member = queue.pop(0)
+            pending[self._executor.submit(self._run, member, call, priority, module)] = member
+            return member
+
+        primary = launch()
+        delay = primary.health.p95() or self.hedge_delay
+        hedge_pending = bool(queue)
+
+        while pending:
+            done, _ = wait(pending, timeout=delay if hedge_pending else None, return_when=FIRST_COMPLETED)
+            if not done:
+                hedge_pending = False
+                secondary = launch()
+                self._count('hedged')
+                logger.info(f"{primary.name} no respondió en {delay:.1f}s; petición de cobertura a {secondary.name}")
+                continue
+
+            for future in done:
+                member = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    logger.warning(f"Error del proveedor {member.name}: {e}")
+                    error = e
+
+            if queue and not pending:
+                hedge_pending = False
+                secondary = launch()
+                self._count('failovers')
+                logger.info(f"Conmutando al proveedor {secondary.name}")
+
+        raise error
+
+    def _count(self, counter):
+        """Incrementa un contador del grupo."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_stats(self):
+        """
+        Devuelve el estado del grupo.
+
+        Returns:
+            dict: Salud de cada proveedor y contadores de cobertura y conmutación.
+        """
+        return {
+            'providers': {member.name: member.health.get_stats() for member in self.members},
+            'hedged': self.hedged,
+            'failovers': self.failovers
+        }
+
+    def __getattr__(self, name):
+        if name in ('members', 'primary'):
+            raise AttributeError(name)
+        return getattr(self.primary, name)
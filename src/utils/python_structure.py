@@ -0,0 +1,158 @@
+"""
+Estructura de un archivo Python (funciones, clases y asignaciones) obtenida con un único `ast.parse`.
+"""
+
+import ast
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from src.utils.source_index import get_source_index
+
+logger = logging.getLogger(__name__)
+
+# Estructuras recientes que se conservan, por hash del contenido
+MAX_CACHED_STRUCTURES = 32
+
+# Definición de una función o clase. Las líneas se numeran desde 1:
+#   start_line: primera línea (incluidos los decoradores); line: línea de 'def'/'class';
+#   body_line: primera línea del cuerpo; end_line: última línea de la definición.
+Definition = namedtuple('Definition', [
+    'kind', 'name', 'qualname', 'is_async', 'start_line', 'line', 'body_line', 'end_line',
+    'params', 'bases', 'has_docstring', 'length'
+])
+
+# Variable asignada: nombre y línea
+Assignment = namedtuple('Assignment', ['name', 'line'])
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class PythonStructure:
+    """Funciones, clases y asignaciones de un archivo Python, en orden de aparición."""
+
+    def __init__(self, definitions, assignments):
+        """
+        Inicializa la estructura.
+
+        Args:
+            definitions (list): Funciones y clases (Definition).
+            assignments (list): Variables asignadas (Assignment).
+        """
+        self.definitions = definitions
+        self.assignments = assignments
+
+    @property
+    def functions(self):
+        """Funciones y métodos (incluidos los anidados y los async)."""
+        return [definition for definition in self.definitions if definition.kind == 'function']
+
+    @property
+    def classes(self):
+        """Clases (incluidas las anidadas)."""
+        return [definition for definition in self.definitions if definition.kind == 'class']
+
+
+# Nodos con cuerpo de sentencias que no son definiciones (bloques de if, for, try, match...)
+_BLOCK_NODES = (ast.stmt, ast.excepthandler, getattr(ast, 'match_case', ast.excepthandler))
+
+
+class _Collector:
+    """
+    Recorre las sentencias del árbol acumulando definiciones y asignaciones.
+
+    Solo se desciende por los cuerpos de sentencias, no por las expresiones, que
+    son la mayor parte del árbol y no contienen definiciones ni asignaciones.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.definitions = []
+        self.assignments = []
+
+    def visit_body(self, statements, scope=()):
+        for node in statements:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._definition(node, 'function', scope)
+            elif isinstance(node, ast.ClassDef):
+                self._definition(node, 'class', scope)
+            elif isinstance(node, ast.Assign):
+                self._targets(node.targets, node.lineno)
+            elif isinstance(node, ast.AnnAssign):
+                self._targets([node.target], node.lineno)
+            else:
+                for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+                    block = getattr(node, field, None)
+                    if block and isinstance(block[0], _BLOCK_NODES):
+                        self.visit_body(block, scope)
+
+    def _definition(self, node, kind, scope):
+        qualname = '.'.join(scope + (node.name,))
+        decorators = [decorator.lineno for decorator in node.decorator_list]
+        body_line = node.body[0].lineno
+        length = sum(1 for _, line in self.index.lines(body_line, node.end_lineno) if line.strip())
+        if kind == 'function':
+            params, bases = ast.unparse(node.args), ''
+        else:
+            params, bases = '', ', '.join(ast.unparse(base) for base in node.bases)
+        self.definitions.append(Definition(
+            kind=kind,
+            name=node.name,
+            qualname=qualname,
+            is_async=isinstance(node, ast.AsyncFunctionDef),
+            start_line=min(decorators + [node.lineno]),
+            line=node.lineno,
+            body_line=body_line,
+            end_line=node.end_lineno,
+            params=params,
+            bases=bases,
+            has_docstring=ast.get_docstring(node, clean=False) is not None,
+            length=length
+        ))
+        self.visit_body(node.body, scope + (node.name,))
+
+    def _targets(self, targets, line):
+        for target in targets:
+            if isinstance(target, ast.Name):
+                self.assignments.append(Assignment(target.id, line))
+            elif isinstance(target, (ast.Tuple, ast.List)):
+                self._targets(target.elts, line)
+            elif isinstance(target, ast.Starred):
+                self._targets([target.value], line)
+
+
+def parse_python(content):
+    """
+    Analiza un archivo Python, reutilizando el resultado si el mismo contenido se analizó hace poco.
+
+    Args:
+        content (str): Código fuente.
+
+    Returns:
+        PythonStructure: Estructura del archivo, o None si el código no es Python válido.
+    """
+    key = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError) as e:
+        logger.debug(f"No se pudo analizar el código Python: {e}")
+        structure = None
+    else:
+        collector = _Collector(get_source_index(content))
+        collector.visit_body(tree.body)
+        structure = PythonStructure(
+            sorted(collector.definitions, key=lambda definition: definition.line),
+            collector.assignments
+        )
+
+    with _cache_lock:
+        _cache[key] = structure
+        while len(_cache) > MAX_CACHED_STRUCTURES:
+            _cache.popitem(last=False)
+    return structure
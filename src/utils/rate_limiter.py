@@ -0,0 +1,313 @@
+"""
+Limitación de velocidad por proveedor y control adaptativo de concurrencia para llamadas a LLM.
+"""
+
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Prioridades de las peticiones (menor valor = se atiende antes)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BACKGROUND = 10
+
+# Límites por defecto de cada proveedor (peticiones y tokens por minuto)
+PROVIDER_LIMITS = {
+    'openai': {'rpm': 500, 'tpm': 60000, 'max_concurrency': 16},
+    'claude': {'rpm': 50, 'tpm': 40000, 'max_concurrency': 8},
+    'fake': {'rpm': 500, 'tpm': 60000, 'max_concurrency': 16}
+}
+
+_local = threading.local()
+
+
+def current_priority():
+    """
+    Devuelve la prioridad de las peticiones del hilo actual.
+
+    Returns:
+        int: Prioridad configurada con `request_priority` o PRIORITY_DEFAULT.
+    """
+    return getattr(_local, 'priority', PRIORITY_DEFAULT)
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Establece la prioridad de las peticiones LLM realizadas dentro del bloque.
+
+    Args:
+        priority (int): Prioridad (menor valor = mayor prioridad).
+    """
+    previous = getattr(_local, 'priority', None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        if previous is None:
+            del _local.priority
+        else:
+            _local.priority = previous
+
+
+def is_rate_limit_error(error):
+    """
+    Indica si una excepción corresponde a un límite de velocidad (HTTP 429).
+
+    Args:
+        error (Exception): Excepción lanzada por el cliente del proveedor.
+
+    Returns:
+        bool: True si es un error de límite de velocidad.
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status == 429 or 'RateLimit' in type(error).__name__
+
+
+def is_timeout_error(error):
+    """
+    Indica si una excepción corresponde a un tiempo de espera agotado.
+
+    Args:
+        error (Exception): Excepción lanzada por el cliente del proveedor.
+
+    Returns:
+        bool: True si es un error de timeout.
+    """
+    return isinstance(error, TimeoutError) or 'Timeout' in type(error).__name__
+
+
+def get_retry_after(error):
+    """
+    Obtiene el valor de la cabecera Retry-After de un error del proveedor.
+
+    Args:
+        error (Exception): Excepción lanzada por el cliente del proveedor.
+
+    Returns:
+        float: Segundos a esperar o None si no se indica.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Cubo de tokens que se rellena de forma continua a una tasa por minuto."""
+
+    def __init__(self, per_minute):
+        """
+        Inicializa el cubo.
+
+        Args:
+            per_minute (float): Capacidad y tasa de relleno por minuto.
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount):
+        """
+        Intenta consumir tokens del cubo.
+
+        Args:
+            amount (float): Tokens a consumir.
+
+        Returns:
+            float: 0 si se consumieron, o segundos a esperar antes de reintentar.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+
+            self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+            self.updated = now
+            amount = min(amount, self.capacity)
+            if self.available >= amount:
+                self.available -= amount
+                return 0
+            return (amount - self.available) / self.rate
+
+    def acquire(self, amount=1):
+        """
+        Consume tokens del cubo, esperando lo necesario.
+
+        Args:
+            amount (float, opcional): Tokens a consumir.
+        """
+        while True:
+            wait = self._reserve(amount)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, 1.0))
+
+    def block_for(self, seconds):
+        """
+        Bloquea el cubo durante un tiempo (por ejemplo, al recibir Retry-After).
+
+        Args:
+            seconds (float): Segundos de bloqueo.
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.available = 0
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limita las peticiones simultáneas con un control AIMD.
+
+    El límite crece de forma aditiva con cada éxito y se reduce a la mitad ante un
+    429 o un timeout. Los llamadores en espera se atienden por orden de prioridad.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        """
+        Inicializa el limitador.
+
+        Args:
+            initial (int, opcional): Límite inicial de concurrencia.
+            minimum (int, opcional): Límite mínimo.
+            maximum (int, opcional): Límite máximo.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority=PRIORITY_DEFAULT):
+        """
+        Espera un hueco libre respetando la prioridad.
+
+        Args:
+            priority (int, opcional): Prioridad de la petición.
+        """
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] is not entry or self.in_flight >= int(self.limit):
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            self._cond.notify_all()
+
+    def release(self, overloaded=False, success=True):
+        """
+        Libera un hueco y ajusta el límite.
+
+        Args:
+            overloaded (bool, opcional): True si el proveedor indicó sobrecarga (429/timeout).
+            success (bool, opcional): True si la petición terminó correctamente.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(self.minimum, self.limit / 2)
+                logger.info(f"Concurrencia LLM reducida a {int(self.limit)}")
+            elif success:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class ProviderRateLimiter:
+    """Combina los límites de peticiones/minuto, tokens/minuto y concurrencia de un proveedor."""
+
+    def __init__(self, provider, rpm, tpm, max_concurrency=16):
+        """
+        Inicializa el limitador del proveedor.
+
+        Args:
+            provider (str): Nombre del proveedor.
+            rpm (int): Peticiones por minuto.
+            tpm (int): Tokens por minuto.
+            max_concurrency (int, opcional): Máximo de peticiones simultáneas.
+        """
+        self.provider = provider
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrencyLimiter(initial=min(4, max_concurrency), maximum=max_concurrency)
+        self.rate_limited = 0
+
+    @classmethod
+    def for_provider(cls, provider):
+        """
+        Crea un limitador con los valores por defecto del proveedor.
+
+        Los valores pueden sobrescribirse con LLM_RPM, LLM_TPM y LLM_MAX_CONCURRENCY.
+
+        Args:
+            provider (str): Nombre del proveedor.
+
+        Returns:
+            ProviderRateLimiter: Limitador configurado.
+        """
+        defaults = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS['openai'])
+        return cls(
+            provider,
+            rpm=int(os.getenv('LLM_RPM', defaults['rpm'])),
+            tpm=int(os.getenv('LLM_TPM', defaults['tpm'])),
+            max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', defaults['max_concurrency']))
+        )
+
+    @contextmanager
+    def slot(self, tokens, priority=None):
+        """
+        Reserva capacidad para una petición mientras dura el bloque.
+
+        Args:
+            tokens (int): Tokens estimados de la petición.
+            priority (int, opcional): Prioridad. Por defecto, la del hilo actual.
+        """
+        self.concurrency.acquire(current_priority() if priority is None else priority)
+        overloaded = False
+        success = False
+        try:
+            self.requests.acquire(1)
+            self.tokens.acquire(tokens)
+            yield
+            success = True
+        except Exception as e:
+            if is_rate_limit_error(e):
+                overloaded = True
+                self.rate_limited += 1
+                retry_after = get_retry_after(e)
+                if retry_after:
+                    logger.warning(f"Límite de {self.provider} alcanzado, esperando {retry_after}s (Retry-After)")
+                    self.requests.block_for(retry_after)
+                    self.tokens.block_for(retry_after)
+            elif is_timeout_error(e):
+                overloaded = True
+            raise
+        finally:
+            self.concurrency.release(overloaded=overloaded, success=success)
+
+    def get_stats(self):
+        """
+        Devuelve el estado del limitador.
+
+        Returns:
+            dict: Límite de concurrencia, peticiones en curso y 429 recibidos.
+        """
+        return {
+            'concurrency_limit': int(self.concurrency.limit),
+            'in_flight': self.concurrency.in_flight,
+            'rate_limited': self.rate_limited
+        }
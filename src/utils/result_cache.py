@@ -0,0 +1,166 @@
+"""
+Caché persistente de resultados de análisis (JSON) con una capa en memoria para las consultas frecuentes.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Entradas que se conservan en disco y en memoria
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MEMORY_ENTRIES = 1024
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class ResultCache:
+    """
+    Caché en disco (SQLite) de resultados serializables en JSON, con límite LRU.
+
+    Las consultas se resuelven primero en un diccionario en memoria y, si no están,
+    por la clave primaria de SQLite; las entradas leídas de disco pasan a memoria.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        """
+        Inicializa la caché.
+
+        Args:
+            path (str): Ruta al archivo SQLite de la caché.
+            max_entries (int, opcional): Número máximo de entradas en disco.
+            memory_entries (int, opcional): Número máximo de entradas en memoria.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)")
+        self._conn.commit()
+        logger.info(f"Caché de resultados en: {path}")
+
+    def get(self, key):
+        """
+        Obtiene un resultado almacenado.
+
+        Args:
+            key (str): Clave del resultado.
+
+        Returns:
+            object: Resultado deserializado, o None si no existe.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return json.loads(self._memory[key])
+
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._remember(key, row[0])
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        """
+        Almacena un resultado y aplica el límite de entradas.
+
+        Args:
+            key (str): Clave del resultado.
+            value (object): Resultado serializable en JSON.
+        """
+        text = json.dumps(value, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, last_access) VALUES (?, ?, ?)",
+                (key, text, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+            self._remember(key, text)
+
+    def _remember(self, key, text):
+        """
+        Guarda una entrada en la capa en memoria, descartando las menos usadas.
+
+        Args:
+            key (str): Clave del resultado.
+            text (str): Resultado serializado.
+        """
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Elimina de disco las entradas menos usadas recientemente si se supera el límite."""
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        self._conn.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access ASC LIMIT ?)",
+            (count - self.max_entries,)
+        )
+
+    def get_stats(self):
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos y número de entradas.
+        """
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': count
+        }
+
+
+def get_result_cache(path, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Obtiene la caché de resultados de una ruta, compartida por todo el proceso.
+
+    Args:
+        path (str): Ruta al archivo SQLite de la caché.
+        max_entries (int, opcional): Número máximo de entradas en disco.
+
+    Returns:
+        ResultCache: Caché de resultados, o None si no se puede abrir.
+    """
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            try:
+                cache = _caches[path] = ResultCache(path, max_entries)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Error al abrir la caché de resultados {path}: {e}")
+        return cache
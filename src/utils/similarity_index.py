@@ -0,0 +1,231 @@
+"""
+Índice en memoria de diffs casi duplicados basado en MinHash y LSH por bandas.
+"""
+
+import re
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Primo de Mersenne usado en las permutaciones de MinHash
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Cabeceras de diff que cambian entre cherry-picks y backports sin cambiar el contenido
+_DIFF_HEADER = re.compile(r'^(?:diff --git |index |--- |\+\+\+ |@@ |similarity index |rename (?:from|to) )')
+
+
+def _hash(value):
+    """Hash estable de 32 bits de una cadena."""
+    return struct.unpack('<I', hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest())[0]
+
+
+def shingles(text, size=5):
+    """
+    Obtiene los shingles (secuencias de tokens) de un diff o de un texto.
+
+    Se ignoran las cabeceras del diff (rutas, hashes y números de línea) para que
+    el mismo cambio aplicado en otra rama o con otro nombre de archivo coincida.
+
+    Args:
+        text (str): Diff o contenido.
+        size (int, opcional): Tokens por shingle.
+
+    Returns:
+        set: Hashes de los shingles.
+    """
+    tokens = []
+    for line in (text or '').split('\n'):
+        if _DIFF_HEADER.match(line):
+            continue
+        tokens.extend(_TOKEN_PATTERN.findall(line))
+        tokens.append('\n')
+    if len(tokens) < size:
+        return set()
+    return {_hash(' '.join(tokens[i:i + size])) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Calcula firmas MinHash con permutaciones universales (a*x + b) mod p."""
+
+    def __init__(self, num_perm=64, seed=1):
+        """
+        Inicializa el generador de firmas.
+
+        Args:
+            num_perm (int, opcional): Número de permutaciones (longitud de la firma).
+            seed (int, opcional): Semilla de las permutaciones.
+        """
+        self.num_perm = num_perm
+        self.permutations = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f'{seed}:{i}'.encode('utf-8'), digest_size=16).digest()
+            a, b = struct.unpack('<QQ', digest)
+            self.permutations.append((a % (_PRIME - 1) + 1, b % _PRIME))
+
+    def signature(self, shingle_set):
+        """
+        Calcula la firma MinHash de un conjunto de shingles.
+
+        Args:
+            shingle_set (set): Hashes de los shingles.
+
+        Returns:
+            tuple: Firma de `num_perm` valores, o None si el conjunto está vacío.
+        """
+        if not shingle_set:
+            return None
+        return tuple(
+            min(((a * value + b) % _PRIME) & _MAX_HASH for value in shingle_set)
+            for a, b in self.permutations
+        )
+
+    @staticmethod
+    def similarity(first, second):
+        """
+        Estima la similitud de Jaccard entre dos firmas.
+
+        Args:
+            first (tuple): Primera firma.
+            second (tuple): Segunda firma.
+
+        Returns:
+            float: Similitud estimada (0-1).
+        """
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class SimilarityIndex:
+    """
+    Índice acotado de firmas MinHash con LSH por bandas.
+
+    Cada firma se divide en `bands` bandas; dos firmas son candidatas si coinciden
+    en alguna banda completa, y se confirman si su similitud estimada alcanza el
+    umbral. Cuando se supera `max_entries`, se descartan las entradas usadas hace
+    más tiempo.
+    """
+
+    def __init__(self, threshold=0.9, max_entries=1000, num_perm=64, bands=16):
+        """
+        Inicializa el índice.
+
+        Args:
+            threshold (float, opcional): Similitud mínima para considerar dos diffs casi duplicados.
+            max_entries (int, opcional): Máximo de entradas en memoria.
+            num_perm (int, opcional): Longitud de las firmas.
+            bands (int, opcional): Número de bandas LSH (debe dividir a num_perm).
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._entries = OrderedDict()
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, text):
+        """
+        Calcula la firma de un diff o contenido.
+
+        Args:
+            text (str): Texto a indexar.
+
+        Returns:
+            tuple: Firma MinHash, o None si el texto es demasiado corto.
+        """
+        return self.hasher.signature(shingles(text))
+
+    def _band_keys(self, signature):
+        """Devuelve la clave de cada banda de una firma."""
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def query(self, signature):
+        """
+        Busca la entrada más parecida a una firma.
+
+        Args:
+            signature (tuple): Firma a buscar.
+
+        Returns:
+            tuple: (id de la entrada, valor, similitud) o None si ninguna alcanza el umbral.
+        """
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best = None
+            for entry_id in candidates:
+                stored, value = self._entries[entry_id]
+                similarity = MinHasher.similarity(signature, stored)
+                if similarity >= self.threshold and (best is None or similarity > best[2]):
+                    best = (entry_id, value, similarity)
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best[0])
+            return best
+
+    def add(self, signature, value):
+        """
+        Añade una firma con su valor asociado.
+
+        Args:
+            signature (tuple): Firma MinHash.
+            value (object): Valor asociado (por ejemplo, resultados de los módulos).
+
+        Returns:
+            int: Id de la nueva entrada.
+        """
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, value)
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, (old_signature, _) = self._entries.popitem(last=False)
+                for band, key in enumerate(self._band_keys(old_signature)):
+                    bucket = self._buckets[band].get(key)
+                    if bucket is not None:
+                        bucket.discard(old_id)
+                        if not bucket:
+                            del self._buckets[band][key]
+            return entry_id
+
+    def update(self, entry_id, value):
+        """
+        Sustituye el valor de una entrada existente.
+
+        Args:
+            entry_id (int): Id de la entrada.
+            value (object): Nuevo valor.
+        """
+        with self._lock:
+            if entry_id in self._entries:
+                signature, _ = self._entries[entry_id]
+                self._entries[entry_id] = (signature, value)
+                self._entries.move_to_end(entry_id)
+
+    def get_stats(self):
+        """
+        Devuelve las estadísticas del índice.
+
+        Returns:
+            dict: Entradas, coincidencias y búsquedas sin coincidencia.
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
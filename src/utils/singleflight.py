@@ -0,0 +1,93 @@
+"""
+Deduplicación de llamadas concurrentes idénticas (patrón "singleflight").
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """Llamada en curso compartida por todos los que esperan su resultado."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Agrupa las llamadas concurrentes con la misma clave en una sola ejecución.
+
+    El primer llamador ejecuta la función; los demás esperan y comparten su
+    resultado (o su excepción).
+    """
+
+    def __init__(self):
+        """Inicializa el registro de llamadas en curso y los contadores."""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Ejecuta `fn` una sola vez para todas las llamadas concurrentes con la misma clave.
+
+        Args:
+            key (str): Clave que identifica la llamada.
+            fn (callable): Función sin argumentos a ejecutar.
+
+        Returns:
+            object: Resultado de la función.
+
+        Raises:
+            Exception: La excepción lanzada por la función, propagada a todos los llamadores.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"Llamada LLM agrupada con una petición idéntica en curso ({key[:12]})")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def get_stats(self):
+        """
+        Devuelve los contadores de deduplicación.
+
+        Returns:
+            dict: Ejecuciones reales, llamadas agrupadas y llamadas en curso.
+        """
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': in_flight
+        }
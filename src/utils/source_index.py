@@ -0,0 +1,147 @@
+"""
+Índice de líneas de un archivo fuente: convierte posiciones en números de línea sin recorrer el texto.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+
+# Índices recientes que se conservan para que varios módulos analicen el mismo contenido
+MAX_CACHED_INDEXES = 8
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class SourceIndex:
+    """
+    Posiciones de inicio de cada línea de un texto, calculadas una sola vez.
+
+    Convertir una posición en número de línea cuesta O(log n) con búsqueda binaria,
+    y el texto de una línea se obtiene sin volver a dividir el contenido.
+    Las líneas se numeran desde 1.
+    """
+
+    def __init__(self, content):
+        """
+        Construye el índice.
+
+        Args:
+            content (str): Contenido del archivo.
+        """
+        self.content = content
+        starts = [0]
+        position = content.find('\n')
+        while position != -1:
+            starts.append(position + 1)
+            position = content.find('\n', position + 1)
+        self.line_starts = starts
+
+    @property
+    def line_count(self):
+        """Número de líneas del contenido."""
+        return len(self.line_starts)
+
+    def line_of(self, offset):
+        """
+        Devuelve el número de línea de una posición del contenido.
+
+        Args:
+            offset (int): Posición (por ejemplo, `match.start()`).
+
+        Returns:
+            int: Número de línea (desde 1).
+        """
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def line_text(self, line_num):
+        """
+        Devuelve el texto de una línea, sin el salto de línea final.
+
+        Args:
+            line_num (int): Número de línea (desde 1).
+
+        Returns:
+            str: Texto de la línea, o cadena vacía si está fuera de rango.
+        """
+        if line_num < 1 or line_num > len(self.line_starts):
+            return ''
+        start = self.line_starts[line_num - 1]
+        if line_num < len(self.line_starts):
+            return self.content[start:self.line_starts[line_num] - 1]
+        return self.content[start:]
+
+    def line_at(self, offset):
+        """
+        Devuelve el número y el texto de la línea que contiene una posición.
+
+        Args:
+            offset (int): Posición en el contenido.
+
+        Returns:
+            tuple: (número de línea, texto de la línea).
+        """
+        line_num = self.line_of(offset)
+        return line_num, self.line_text(line_num)
+
+    def lines(self, start_line=1, end_line=None):
+        """
+        Recorre las líneas de un rango sin dividir todo el contenido.
+
+        Args:
+            start_line (int, opcional): Primera línea (desde 1).
+            end_line (int, opcional): Última línea incluida (por defecto, la última del archivo).
+
+        Yields:
+            tuple: (número de línea, texto de la línea).
+        """
+        end_line = min(end_line or len(self.line_starts), len(self.line_starts))
+        for line_num in range(max(1, start_line), end_line + 1):
+            yield line_num, self.line_text(line_num)
+
+    def text_range(self, start_line, end_line):
+        """
+        Devuelve el texto de un rango de líneas.
+
+        Args:
+            start_line (int): Primera línea (desde 1).
+            end_line (int): Última línea incluida.
+
+        Returns:
+            str: Texto de las líneas, separadas por saltos de línea.
+        """
+        start_line = max(1, start_line)
+        end_line = min(end_line, len(self.line_starts))
+        if start_line > end_line:
+            return ''
+        start = self.line_starts[start_line - 1]
+        if end_line < len(self.line_starts):
+            return self.content[start:self.line_starts[end_line] - 1]
+        return self.content[start:]
+
+
+def get_source_index(content):
+    """
+    Obtiene el índice de un contenido, reutilizándolo si se calculó hace poco.
+
+    El revisor de código y el generador de docstrings procesan el mismo contenido
+    para cada evento, de modo que el índice se construye una sola vez.
+
+    Args:
+        content (str): Contenido del archivo.
+
+    Returns:
+        SourceIndex: Índice del contenido.
+    """
+    with _cache_lock:
+        index = _cache.get(content)
+        if index is not None:
+            _cache.move_to_end(content)
+            return index
+
+    index = SourceIndex(content)
+    with _cache_lock:
+        _cache[content] = index
+        while len(_cache) > MAX_CACHED_INDEXES:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,273 @@
+"""
+Salida estructurada de los LLM: extracción, reparación local y validación de JSON.
+"""
+
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_FENCE_PATTERN = re.compile(r'```(?:json)?\s*\n?(.*?)(?:\n?```|$)', re.DOTALL)
+_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+    'null': type(None)
+}
+
+
+class StructuredOutputError(ValueError):
+    """La respuesta del LLM no contiene JSON válido para el esquema esperado."""
+
+
+def extract_json(text):
+    """
+    Extrae el fragmento JSON de una respuesta, con o sin bloque de código.
+
+    Args:
+        text (str): Texto de la respuesta.
+
+    Returns:
+        str: Fragmento que empieza en el primer '{' o '[' (puede estar incompleto).
+    """
+    text = text or ''
+    fence = _FENCE_PATTERN.search(text)
+    if fence:
+        text = fence.group(1)
+
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        return text.strip()
+    start = min(starts)
+
+    depth = 0
+    in_string = escape = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def repair_json(text):
+    """
+    Corrige errores de sintaxis habituales en el JSON generado por un LLM.
+
+    Elimina comas finales, escapa saltos de línea dentro de cadenas, convierte los
+    literales de Python (True/False/None) y cierra las cadenas, arrays y objetos que
+    quedaron abiertos por una respuesta truncada.
+
+    Args:
+        text (str): JSON con posibles errores.
+
+    Returns:
+        str: JSON reparado.
+    """
+    output = []
+    stack = []
+    in_string = escape = False
+    key_start = None
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char == '\n':
+                char = '\\n'
+            output.append(char)
+        elif char == '"':
+            in_string = True
+            previous = next((c for c in reversed(output) if not c.isspace()), '')
+            if stack and stack[-1] == '}' and previous in ('{', ','):
+                key_start = len(output)
+            output.append(char)
+        elif char == ':':
+            key_start = None
+            output.append(char)
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            output.append(char)
+        elif char in '}]':
+            _strip_dangling(output)
+            if stack:
+                stack.pop()
+            output.append(char)
+        elif char.isalpha():
+            match = re.match(r'[A-Za-z]+', text[index:])
+            word = match.group(0)
+            output.append(_LITERALS.get(word, word))
+            index += len(word)
+            continue
+        else:
+            output.append(char)
+        index += 1
+
+    if in_string:
+        if escape:
+            output.pop()
+        output.append('"')
+    if key_start is not None:
+        # La respuesta terminó en una clave sin valor
+        del output[key_start:]
+    while stack:
+        _strip_dangling(output)
+        output.append(stack.pop())
+    return ''.join(output)
+
+
+def _strip_dangling(output):
+    """
+    Elimina del final de la salida las comas sobrantes y las claves sin valor antes de un cierre.
+
+    Args:
+        output (list): Fragmentos emitidos hasta el momento.
+    """
+    while True:
+        while output and output[-1].isspace():
+            output.pop()
+        if output and output[-1] == ',':
+            output.pop()
+        elif output and output[-1] == ':':
+            output.pop()
+            while output and output[-1].isspace():
+                output.pop()
+            if output and output[-1] == '"':
+                output.pop()
+                while output and not (output[-1] == '"' and (len(output) < 2 or output[-2] != '\\')):
+                    output.pop()
+                if output:
+                    output.pop()
+        else:
+            return
+
+
+def validate(data, schema, path='$'):
+    """
+    Valida un valor contra un esquema (subconjunto de JSON Schema: type, properties,
+    required, items y enum).
+
+    Args:
+        data (object): Valor a validar.
+        schema (dict): Esquema esperado.
+        path (str, opcional): Ruta del valor, para los mensajes de error.
+
+    Returns:
+        list: Errores encontrados (vacía si el valor es válido).
+    """
+    errors = []
+    expected = schema.get('type')
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        python_types = tuple(t for name in types for t in _flatten(_TYPES[name]))
+        is_bool = isinstance(data, bool) and 'boolean' not in types
+        if not isinstance(data, python_types) or is_bool:
+            return [f"{path}: se esperaba {expected}, se recibió {type(data).__name__}"]
+
+    if 'enum' in schema and data not in schema['enum']:
+        errors.append(f"{path}: valor no permitido {data!r}")
+
+    if isinstance(data, dict):
+        for key in schema.get('required', []):
+            if key not in data:
+                errors.append(f"{path}: falta el campo '{key}'")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in data:
+                errors.extend(validate(data[key], subschema, f"{path}.{key}"))
+        additional = schema.get('additionalProperties')
+        if isinstance(additional, dict):
+            for key, value in data.items():
+                if key not in schema.get('properties', {}):
+                    errors.extend(validate(value, additional, f"{path}.{key}"))
+    elif isinstance(data, list) and 'items' in schema:
+        for index, item in enumerate(data):
+            errors.extend(validate(item, schema['items'], f"{path}[{index}]"))
+    return errors
+
+
+def _flatten(python_type):
+    """Devuelve una tupla de tipos de Python."""
+    return python_type if isinstance(python_type, tuple) else (python_type,)
+
+
+def apply_defaults(data, schema):
+    """
+    Completa los campos opcionales ausentes con el valor 'default' de su esquema.
+
+    Args:
+        data (object): Valor validado.
+        schema (dict): Esquema esperado.
+
+    Returns:
+        object: El mismo valor, completado.
+    """
+    if isinstance(data, dict):
+        for key, subschema in schema.get('properties', {}).items():
+            if key not in data and 'default' in subschema:
+                data[key] = json.loads(json.dumps(subschema['default']))
+            if key in data:
+                apply_defaults(data[key], subschema)
+        additional = schema.get('additionalProperties')
+        if isinstance(additional, dict):
+            for key, value in data.items():
+                if key not in schema.get('properties', {}):
+                    apply_defaults(value, additional)
+    elif isinstance(data, list) and 'items' in schema:
+        for item in data:
+            apply_defaults(item, schema['items'])
+    return data
+
+
+def parse_structured(text, schema):
+    """
+    Interpreta la respuesta de un LLM como JSON válido para un esquema.
+
+    Primero se intenta decodificar el JSON tal cual y, si falla, se repara
+    localmente sin volver a llamar al LLM.
+
+    Args:
+        text (str): Texto de la respuesta.
+        schema (dict): Esquema esperado.
+
+    Returns:
+        object: Valor decodificado, validado y completado con los valores por defecto.
+
+    Raises:
+        StructuredOutputError: Si la respuesta no se puede reparar o no cumple el esquema.
+    """
+    fragment = extract_json(text)
+    try:
+        data = json.loads(fragment)
+    except ValueError:
+        try:
+            data = json.loads(repair_json(fragment))
+            logger.debug("JSON de la respuesta del LLM reparado localmente")
+        except ValueError as e:
+            raise StructuredOutputError(f"JSON no válido en la respuesta: {e}") from e
+
+    errors = validate(data, schema)
+    if errors:
+        raise StructuredOutputError(f"La respuesta no cumple el esquema: {'; '.join(errors[:5])}")
+    return apply_defaults(data, schema)